@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Per-frame analysis
+==================
+The detection logic that turns one camera frame into a detection state:
+an optional pixel-difference motion gate, model stage scheduling (YuNet
+every Nth frame with optical-flow face tracking in between, FER and SFace
+on timers for every face), landmark motion / fall analysis and face identity
+(cached per face — per optical-flow track, or per IoU-matched detection when
+tracking is off; see identity_cache.py). It has no Flask or socket.io
+dependency — app.py's camera producer drives one FrameAnalyzer per camera,
+and analyze_video.py drives one per video file, so live and offline runs
+produce the same results for the same frames and options (the motion gate,
+pose ROI and face tracking are off by default in both).
+
+All timers run on the frame's capture timestamp, never on wall-clock time.
+"""
+
+import time
+
+import face_gallery, vision
+from camera_manager import new_detection_state
+from face_gallery import match_features
+from face_tracking import FaceIds, FaceTracker
+from identity_cache import IdentityCache
+from motion_analysis import LandmarkMotionDetector
+
+FACE_DETECT_INTERVAL = 3     # run YuNet every Nth analysed frame (default; see FrameAnalyzer)
+EMOTION_INTERVAL     = 0.3   # emotion detection frequency (seconds) — near-simultaneous
+RECOGNITION_INTERVAL = 2.0   # SFace recognition frequency (seconds) without the identity cache
+
+
+class FrameAnalyzer:
+    """
+    Analysis state for one video stream. Call `process(frame, now)` for every
+    analysed frame; it returns the updated detection state plus the raw
+    landmarks / faces needed to draw overlays. `match(features)` scores a
+    list of SFace embeddings against the gallery → [(name, confidence)].
+    """
+    def __init__(self, match=match_features, gate=None, pose_roi=False,
+                 face_tracking=False, face_detect_interval=FACE_DETECT_INTERVAL):
+        self.match                = match
+        self.tracker              = FaceTracker() if face_tracking else None
+        self.face_ids             = self.tracker if face_tracking else FaceIds()   # ids the identity cache is keyed on
+        self.identities           = IdentityCache()
+        self.face_detect_interval = max(1, face_detect_interval)
+        self.gate                 = gate      # MotionGate, or None to run the models on every frame
+        self.roi                  = vision.PoseRoi() if pose_roi else None
+        self.motion_detector      = LandmarkMotionDetector()
+        self.state                = new_detection_state()
+        self.pose                 = None      # created on first in-process inference
+        self.frame_count          = 0
+        self.cached_faces         = []
+        self.last_emotion_time    = 0.0
+        self.last_recog_time      = 0.0
+        self.last_landmarks       = None
+        self.last_face_ids        = []
+        self.face_labels          = {}        # face id → {"name", "emotion", "emotion_confidence"}
+        self.last_pose_analysis   = self.motion_detector.analyse(None, 1, 1)
+
+    def infer_local(self, frame, stages, timings=None):
+        """Run the due model stages in this process (the analyzer owns the Pose tracker)."""
+        if self.pose is None:
+            self.pose = vision.create_pose()
+        return vision.infer_frame(self.pose, frame, **stages, timings=timings, roi=self.roi)
+
+    def process(self, frame, now, infer=None, timings=None):
+        """
+        Analyse one BGR frame captured at `now` (seconds).
+        `infer(frame, stages)` may run the models elsewhere (e.g. an inference
+        worker); returning None falls back to in-process inference.
+        `timings` (dict) collects per-stage seconds — see vision.infer_frame,
+        plus "motion" and "match" measured here.
+        Returns dict with: state, landmarks, faces, face_ids, face_labels,
+        pose_analysis, gated (face_labels is aligned with faces; gated=True: no motion, the models were skipped and the previous
+        results are returned with motion cleared).
+        """
+        h_frame, w_frame = frame.shape[:2]
+
+        # ── 0. Motion gate — skip every model on a static scene ──
+        if self.gate is not None:
+            t0 = time.perf_counter()
+            fall_pending = self.motion_detector.fall_active or self.motion_detector.fall_frame_count > 0
+            run = self.gate.should_infer(frame, now, force=fall_pending)
+            if timings is not None:
+                timings["gate"] = time.perf_counter() - t0
+            if not run:
+                return self._gated_result()
+
+        self.frame_count += 1
+        detect_now = self.frame_count % self.face_detect_interval == 0
+
+        # ── 1. Face tracking — move last frame's boxes onto this frame ──
+        if self.tracker is not None and not detect_now:
+            t0 = time.perf_counter()
+            self.cached_faces = self.tracker.predict(frame)
+            if timings is not None:
+                timings["face_track"] = time.perf_counter() - t0
+
+        # ── 2. Model inference ──
+        # Embeddings are only computed while some face needs (re-)recognition;
+        # faces first detected on this frame are picked up on the next.
+        version = face_gallery.gallery.version
+        want_feature = any(
+            self.identities.due(fid, now, version) for fid in self.face_ids.ids[:vision.MAX_FACES]
+        )
+        stages = {
+            "detect_faces_now": detect_now,
+            "cached_faces":     self.cached_faces,
+            "want_emotion":     (now - self.last_emotion_time) > EMOTION_INTERVAL,
+            "want_feature":     want_feature,
+        }
+        inference = infer(frame, stages) if infer is not None else None
+        if inference is None:
+            inference = self.infer_local(frame, stages, timings)
+        pose_landmarks = inference["landmarks"]
+
+        # ── 3. Landmark-based motion & fall detection ──
+        t0 = time.perf_counter()
+        pose_analysis = self.motion_detector.analyse(pose_landmarks, w_frame, h_frame, now=now)
+        if timings is not None:
+            timings["motion"] = time.perf_counter() - t0
+
+        is_motion = pose_analysis["motion"]
+        is_fall   = pose_analysis["is_fall"]
+        motion_status = "Motion Detected" if is_motion else "No Motion"
+        fall_status = "FALL DETECTED!" if is_fall else "No Fall"
+        if not is_fall and self.motion_detector.fall_frame_count > 3:
+            fall_status = "Possible Fall"
+
+        # ── 4. Faces (YuNet every Nth frame, tracked or cached in between) ──
+        faces = inference["faces"]
+        if detect_now:
+            faces = self.tracker.correct(frame, faces) if self.tracker is not None else self.face_ids.assign(faces)
+        self.cached_faces = faces
+        faces_count = len(faces)
+        face_ids = list(self.face_ids.ids)
+        labels = {
+            fid: self.face_labels.get(fid) or {"name": "Unknown", "emotion": "N/A", "emotion_confidence": 0.0}
+            for fid in face_ids
+        }
+        state = self.state
+
+        # ── 5. Emotion per face (every EMOTION_INTERVAL seconds) ──
+        if inference["emotions"] is not None:
+            for fid, (emotion, confidence) in zip(face_ids, inference["emotions"]):
+                labels[fid] = dict(labels[fid], emotion=emotion, emotion_confidence=confidence)
+            self.last_emotion_time = now
+
+        # ── 6. Recognition per face (when its cached identity is due) ──
+        features = inference["features"] or []
+        t0 = time.perf_counter()
+        # Without the cache SFace would run for every face every
+        # RECOGNITION_INTERVAL; only those recognitions count as hits when the
+        # cache serves them. A recognition that does run restarts that interval,
+        # so a face re-checked on its own (e.g. Unknown) never counts as a hit.
+        periodic = faces_count > 0 and (now - self.last_recog_time) > RECOGNITION_INTERVAL
+        if periodic:
+            self.last_recog_time = now
+        due = []
+        for i, fid in enumerate(face_ids):
+            if not self.identities.due(fid, now, version):
+                if periodic:
+                    self.identities.hit()
+            elif i < len(features):
+                due.append(i)
+        if due:
+            for i, (name, confidence) in zip(due, self.match([features[i] for i in due])):
+                self.identities.store(face_ids[i], name, confidence, now, version)
+            self.last_recog_time = now
+            if timings is not None:
+                timings["match"] = time.perf_counter() - t0
+        for fid in face_ids:
+            labels[fid] = dict(labels[fid], name=self.identities.name(fid))
+        self.identities.prune(face_ids)
+
+        # The top-level fields describe the primary (first) face, as before.
+        self.face_labels = labels
+        face_labels = [labels[fid] for fid in face_ids]
+        if face_labels:
+            primary = face_labels[0]
+            state["face_name"]          = primary["name"]
+            state["emotion"]            = primary["emotion"]
+            state["emotion_confidence"] = primary["emotion_confidence"]
+        else:
+            state["emotion"], state["face_name"] = "N/A", "No Face"
+
+        state.update(
+            faces          = [dict(label, id=fid) for fid, label in zip(face_ids, face_labels)],
+            motion         = motion_status,
+            fall           = fall_status,
+            faces_count    = faces_count,
+            pose_status    = pose_analysis["posture"],
+            activity       = pose_analysis["activity"],
+            landmark_count = pose_analysis["landmark_count"],
+        )
+        self.last_landmarks, self.last_pose_analysis = pose_landmarks, pose_analysis
+        self.last_face_ids = face_ids
+        return {
+            "state":         dict(state),
+            "landmarks":     pose_landmarks,
+            "faces":         faces,
+            "face_ids":      face_ids,
+            "face_labels":   face_labels,
+            "pose_analysis": pose_analysis,
+            "gated":         False,
+        }
+
+    def _gated_result(self):
+        self.state["motion"] = "No Motion"
+        self.last_pose_analysis = dict(self.last_pose_analysis, motion=False, motion_magnitude=0.0)
+        return {
+            "state":         dict(self.state),
+            "landmarks":     self.last_landmarks,
+            "faces":         self.cached_faces,
+            "face_ids":      self.last_face_ids,
+            "face_labels":   [self.face_labels[fid] for fid in self.last_face_ids],
+            "pose_analysis": self.last_pose_analysis,
+            "gated":         True,
+        }
+
+    def close(self):
+        if self.pose is not None:
+            vision.release_pose(self.pose)   # reset and pooled for the next camera
+            self.pose = None
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Offline video analysis
+======================
+Runs the live detection pipeline (MediaPipe Pose + LandmarkMotionDetector +
+YuNet/SFace + FER, via analysis.FrameAnalyzer) over recorded footage as fast
+as the CPU allows, and writes a compact timeline: one row whenever posture,
+activity, motion, fall, identity or emotion changes.
+
+    python analyze_video.py clip.mp4                       # JSONL to stdout
+    python analyze_video.py cam1.mp4 cam2.mp4 -j 2 -o timeline.csv
+    python analyze_video.py night.mp4 --stride 3 -o night.jsonl
+
+Inputs are any video_sources spec except live cameras (files, image
+directories, "synthetic:…" with --limit). `--stride N` analyses every Nth
+frame — motion is then measured between frames N apart, so it reads as N×
+more sensitive.
+Files are analysed in parallel worker processes (`--jobs`), each with its
+own models and face gallery.
+"""
+
+import argparse, csv, json, os, sys, time
+import multiprocessing as mp
+
+import cv2
+
+TIMELINE_FIELDS = [
+    "source", "frame", "t", "posture", "activity", "motion", "fall",
+    "faces", "identity", "emotion", "emotion_confidence",
+]
+# A new row is written when any of these change
+CHANGE_FIELDS = ("posture", "activity", "motion", "fall", "faces", "identity", "emotion")
+
+
+def _timeline_row(source, frame_index, t, state):
+    return {
+        "source":             source,
+        "frame":              frame_index,
+        "t":                  round(t, 3),
+        "posture":            state["pose_status"],
+        "activity":           state["activity"],
+        "motion":             state["motion"],
+        "fall":               state["fall"],
+        "faces":              state["faces_count"],
+        "identity":           state["face_name"],
+        "emotion":            state["emotion"],
+        "emotion_confidence": state["emotion_confidence"],
+    }
+
+
+def analyze_source(spec, stride=1, faces_dir=None, heartbeat=None, limit=None, gate=False,
+                   pose_roi=False, face_tracking=False, face_interval=None):
+    """
+    Analyse one recording. Returns (rows, summary); `t` in each row is seconds
+    of media time from the start of the recording. `heartbeat` (seconds), if
+    set, also writes an unchanged row at least that often; `limit` stops
+    after that many frames; `gate` skips the models on static frames
+    (motion_analysis.MotionGate) and `pose_roi` crops pose to the tracked
+    person (vision.PoseRoi); `face_tracking` tracks faces between YuNet
+    runs every `face_interval` frames — the live server's MOTION_GATE,
+    POSE_ROI and FACE_TRACKING options, all off by default in both.
+    """
+    # Imported here so worker processes load the models themselves.
+    import face_gallery, vision
+    from analysis import FrameAnalyzer, FACE_DETECT_INTERVAL
+    from motion_analysis import MotionGate
+    from video_sources import is_live, open_source
+
+    # Before opening it, so a webcam is never grabbed just to be rejected
+    if is_live(spec):
+        raise ValueError(f"{spec!r} is a live source; offline analysis needs a recording")
+
+    vision.load_face_models(download=False)
+    vision.load_emotion_model(download=False)
+    face_gallery.train_faces(faces_dir or face_gallery.KNOWN_FACES_DIR)
+
+    source = open_source(spec, pacing="fast")
+    if not source.isOpened():
+        source.release()
+        raise IOError(f"cannot open {spec!r}")
+
+    fps      = source.get(cv2.CAP_PROP_FPS)
+    analyzer = FrameAnalyzer(
+        gate=MotionGate() if gate else None, pose_roi=pose_roi,
+        face_tracking=face_tracking, face_detect_interval=face_interval or FACE_DETECT_INTERVAL,
+    )
+    rows, last_key, last_t = [], None, None
+    frame_index = analysed = gated = 0
+    t_first = None
+    started = time.time()
+    try:
+        while limit is None or frame_index < limit:
+            ok, frame, ts = source.read_frame()
+            if not ok:
+                break
+            if t_first is None:
+                t_first = ts
+            t = ts - t_first
+            result = analyzer.process(frame, ts)
+            analysed += 1
+            gated    += result["gated"]
+
+            row = _timeline_row(spec, frame_index, t, result["state"])
+            key = tuple(row[f] for f in CHANGE_FIELDS)
+            if key != last_key or (heartbeat and t - last_t >= heartbeat):
+                rows.append(row)
+                last_key, last_t = key, t
+
+            frame_index += 1
+            for _ in range(stride - 1):
+                if not source.grab():
+                    break
+                frame_index += 1
+    finally:
+        analyzer.close()
+        source.release()
+
+    elapsed = time.time() - started
+    media_s = frame_index / fps if fps else 0.0
+    summary = {
+        "source":   spec,
+        "frames":   frame_index,
+        "analysed": analysed,
+        "gated":    gated,
+        "rows":     len(rows),
+        "media_s":  round(media_s, 1),
+        "wall_s":   round(elapsed, 1),
+        "speed":    round(media_s / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+    return rows, summary
+
+
+def _analyze_job(args):
+    spec, options = args
+    try:
+        rows, summary = analyze_source(spec, **options)
+        return rows, summary, None
+    except Exception as e:
+        return [], {"source": spec}, repr(e)
+
+
+def write_timeline(rows, out, fmt):
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=TIMELINE_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        for row in rows:
+            out.write(json.dumps(row) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse recorded video into a detection timeline.")
+    parser.add_argument("sources", nargs="+", help="video files, image directories or synthetic specs")
+    parser.add_argument("-o", "--output", help="timeline file (.jsonl or .csv); stdout if omitted")
+    parser.add_argument("-f", "--format", choices=("jsonl", "csv"),
+                        help="output format (default: from --output extension, else jsonl)")
+    parser.add_argument("-s", "--stride", type=int, default=1, help="analyse every Nth frame")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="files analysed in parallel (worker processes)")
+    parser.add_argument("-n", "--limit", type=int, help="stop each input after N frames")
+    parser.add_argument("-g", "--motion-gate", action="store_true",
+                        help="skip the models on frames without pixel motion (faster on static footage)")
+    parser.add_argument("-r", "--pose-roi", action="store_true",
+                        help="run pose on a crop around the tracked person")
+    parser.add_argument("-t", "--face-tracking", action="store_true",
+                        help="track faces with optical flow between YuNet runs")
+    parser.add_argument("--face-interval", type=int, help="run YuNet every N analysed frames")
+    parser.add_argument("--faces-dir", help="known faces directory (default: backend/known_faces)")
+    parser.add_argument("--heartbeat", type=float, default=None,
+                        help="also write an unchanged row every N seconds of media time")
+    args = parser.parse_args(argv)
+
+    if args.stride < 1:
+        parser.error("--stride must be at least 1")
+    fmt = args.format or ("csv" if (args.output or "").lower().endswith(".csv") else "jsonl")
+
+    # Download any missing models once, before workers start (they never download).
+    import vision
+    vision.load_face_models()
+    vision.load_emotion_model()
+
+    options = {
+        "stride": args.stride, "faces_dir": args.faces_dir, "heartbeat": args.heartbeat,
+        "limit": args.limit, "gate": args.motion_gate, "pose_roi": args.pose_roi,
+        "face_tracking": args.face_tracking, "face_interval": args.face_interval,
+    }
+    jobs  = [(spec, options) for spec in args.sources]
+    n     = max(1, min(args.jobs, len(jobs)))
+    if n == 1:
+        results = [_analyze_job(job) for job in jobs]
+    else:
+        with mp.get_context("spawn").Pool(n) as pool:
+            results = pool.map(_analyze_job, jobs)
+
+    rows, failed = [], 0
+    for job_rows, summary, error in results:
+        if error:
+            failed += 1
+            print(f"[Analyze] {summary['source']}: failed — {error}", file=sys.stderr)
+            continue
+        rows.extend(job_rows)
+        print(
+            f"[Analyze] {summary['source']}: {summary['analysed']}/{summary['frames']} frames "
+            f"({summary['gated']} gated), "
+            f"{summary['rows']} timeline rows, {summary['media_s']}s of video in "
+            f"{summary['wall_s']}s ({summary['speed']}× real time)",
+            file=sys.stderr,
+        )
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as out:
+            write_timeline(rows, out, fmt)
+    else:
+        write_timeline(rows, sys.stdout, fmt)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
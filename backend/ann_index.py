@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Approximate nearest-neighbour index
+===================================
+An inverted-file (IVF) index over unit-length embeddings, in NumPy only.
+Spherical k-means splits the gallery into `n_lists` clusters; a probe is
+scored against the centroids first and then only against the members of
+its `n_probe` closest clusters, so matching cost grows with
+N / n_lists × n_probe instead of N.
+
+Member vectors are stored as float16 (half the memory) and upcast per
+list at search time.
+
+Indexes are copy-on-write: `add()` / `remove()` return a new index that
+shares every untouched list with the old one, so a published index can be
+searched without locks while the next one is being prepared
+(face_gallery swaps them inside its GallerySnapshot).
+
+    index = IVFIndex.build(names, embeddings)
+    keys, scores = index.search(probes)            # best key + cosine per probe
+    index = index.add(["Alice"], alice_vec).remove(["Bob"])
+
+gallery_benchmark.py measures recall and latency against exact search.
+"""
+
+import cv2
+import numpy as np
+
+
+def unit_rows(rows):
+    """(N, D) rows scaled to unit length, as float32."""
+    rows  = np.asarray(rows, np.float32).reshape(len(rows), -1)
+    norms = np.linalg.norm(rows, axis=1, keepdims=True)
+    return rows / np.maximum(norms, 1e-12)
+
+
+def as_float32(rows):
+    """float16 rows → float32 (OpenCV's conversion is several times faster than NumPy's)."""
+    try:
+        return cv2.convertFp16(np.ascontiguousarray(rows).view(np.int16))
+    except (AttributeError, cv2.error):
+        return np.asarray(rows, np.float32)
+
+
+def spherical_kmeans(vectors, k, iters=10, seed=0):
+    """Unit-length centroids (k, D) for unit-length `vectors` (N, D)."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        sums   = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        counts = np.bincount(assign, minlength=k)
+        empty  = counts == 0
+        if empty.any():                  # reseed empty clusters on random members
+            sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        centroids = unit_rows(sums)
+    return centroids
+
+
+class IVFIndex:
+    """Immutable IVF index; `keys` are any hashable ids (face_gallery uses names)."""
+
+    def __init__(self, centroids, list_keys, list_vectors, n_probe, built_size, where=None):
+        self.centroids    = centroids       # (L, D) unit rows
+        self.list_keys    = list_keys       # L lists of keys
+        self.list_vectors = list_vectors    # L arrays (m, D), row j belongs to list_keys[l][j]
+        self.n_probe      = n_probe
+        self.built_size   = built_size      # gallery size the centroids were trained on
+        self.where        = where if where is not None else {
+            key: l for l, keys in enumerate(list_keys) for key in keys
+        }
+
+    @classmethod
+    def build(cls, keys, vectors, n_lists=None, n_probe=None, iters=10, seed=0):
+        vectors = unit_rows(vectors)
+        keys    = list(keys)
+        n_lists = min(len(keys), n_lists or max(1, int(round(np.sqrt(len(keys))))))
+        n_probe = n_probe or max(8, n_lists // 5)
+        centroids = spherical_kmeans(vectors, n_lists, iters, seed)
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        list_keys, list_vectors = [], []
+        for l in range(n_lists):
+            members = np.flatnonzero(assign == l)
+            list_keys.append([keys[i] for i in members])
+            list_vectors.append(np.ascontiguousarray(vectors[members].astype(np.float16)))
+        return cls(centroids, list_keys, list_vectors, min(n_probe, n_lists), len(keys))
+
+    def __len__(self):
+        return len(self.where)
+
+    @property
+    def stale(self):
+        """True once the gallery has doubled or halved since the centroids were trained."""
+        return len(self) > 2 * self.built_size or len(self) < self.built_size / 2
+
+    def _with_lists(self, changes):
+        list_keys    = list(self.list_keys)
+        list_vectors = list(self.list_vectors)
+        where        = dict(self.where)
+        for l, (keys, vectors) in changes.items():
+            for key in list_keys[l]:
+                where.pop(key, None)
+            list_keys[l], list_vectors[l] = keys, vectors
+            where.update((key, l) for key in keys)
+        return IVFIndex(self.centroids, list_keys, list_vectors, self.n_probe, self.built_size, where)
+
+    def remove(self, keys):
+        """New index without `keys` (unknown keys are ignored)."""
+        drop = {}
+        for key in keys:
+            if key in self.where:
+                drop.setdefault(self.where[key], set()).add(key)
+        if not drop:
+            return self
+        changes = {}
+        for l, gone in drop.items():
+            keep = [j for j, k in enumerate(self.list_keys[l]) if k not in gone]
+            changes[l] = ([self.list_keys[l][j] for j in keep], self.list_vectors[l][keep])
+        return self._with_lists(changes)
+
+    def add(self, keys, vectors):
+        """New index with `keys` inserted (an existing key is replaced)."""
+        keys = list(keys)
+        if not keys:
+            return self
+        base    = self.remove(keys)
+        vectors = unit_rows(vectors).astype(np.float16)
+        assign  = np.argmax(vectors.astype(np.float32) @ base.centroids.T, axis=1)
+        changes = {}
+        for l in np.unique(assign):
+            new = np.flatnonzero(assign == l)
+            changes[int(l)] = (
+                base.list_keys[l] + [keys[i] for i in new],
+                np.vstack([base.list_vectors[l], vectors[new]]),
+            )
+        return base._with_lists(changes)
+
+    def search(self, probes, n_probe=None):
+        """
+        Best match per probe → (keys, scores): keys[i] is None and
+        scores[i] is -1 when every probed list is empty.
+        """
+        probes  = unit_rows(probes)
+        n_probe = min(n_probe or self.n_probe, len(self.centroids))
+        nearest = np.argsort(-(probes @ self.centroids.T), axis=1)[:, :n_probe]
+        keys    = [None] * len(probes)
+        scores  = np.full(len(probes), -1.0, np.float32)
+        for p, probe in enumerate(probes):
+            for l in nearest[p]:
+                members = self.list_vectors[l]
+                if not len(members):
+                    continue
+                s = as_float32(members) @ probe
+                j = int(np.argmax(s))
+                if s[j] > scores[p]:
+                    scores[p], keys[p] = s[j], self.list_keys[l][j]
+        return keys, scores
@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+"""
+Pipeline benchmark
+==================
+Drives the live detection pipeline (capture → FrameAnalyzer → overlays →
+JPEG encode, exactly as one camera producer runs it) over synthetic or
+recorded frames as fast as possible and reports per-stage latency
+percentiles, end-to-end FPS and peak RSS.
+
+    python benchmark.py                                 # DEFAULT_SOURCE, 300 frames
+    python benchmark.py --source clip.mp4 --frames 600 --json new.json
+    python benchmark.py --json new.json --baseline old.json --threshold 0.15
+
+The default source is `backend/benchmark_clip.mp4`, a recording you provide:
+20-30 s of one person walking, sitting down and facing the camera, taken
+with (or at the resolution of) the cameras being deployed. Only frames with
+a person and faces exercise every stage below; synthetic frames
+(`--source synthetic`) never produce emotion, face_feature or match samples,
+and the report says so.
+
+Stages (milliseconds; a stage appears only on frames where it ran):
+    capture      read + decode the frame
+    gate         motion gate (with --motion-gate; gated frames skip the model stages)
+    pose         MediaPipe Pose (incl. BGR→RGB; on the person crop with --pose-roi)
+    face_detect  YuNet (every FACE_DETECT_INTERVAL frames, or --face-interval)
+    face_track   optical-flow face tracking between YuNet runs (--face-tracking)
+    emotion      FER on every face, one batched pass (every EMOTION_INTERVAL seconds)
+    face_feature SFace alignment + batched embedding (once per face, then again
+                 when its cached identity is due — see identity_cache.py)
+    match        gallery matching of those embeddings
+    motion       LandmarkMotionDetector.analyse
+    draw         skeleton + face boxes + HUD
+    encode       JPEG encode at the top rendition quality
+    total        whole frame, capture to encoded JPEG
+
+With --baseline, any stage whose p95 grew by more than --threshold (and by
+more than --min-ms), or an FPS drop beyond --threshold, is reported and
+the exit status is 1. A baseline recorded with another source, resolution
+or pipeline options (COMPARED_CONFIG) is refused with exit status 2.
+"""
+
+import argparse, json, os, platform, sys, time
+
+import cv2
+import numpy as np
+
+STAGES = (
+    "capture", "gate", "pose", "face_detect", "face_track", "emotion", "face_feature",
+    "match", "motion", "draw", "encode", "total",
+)
+FACE_STAGES = ("emotion", "face_feature", "match")   # only run on frames with faces
+
+DEFAULT_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_clip.mp4")
+
+# Report settings that must match the baseline's for a comparison to mean anything
+COMPARED_CONFIG = ("source", "resolution", "render", "motion_gate", "pose_roi", "face_tracking", "face_interval")
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unavailable."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+def _summarize(samples):
+    ms = np.asarray(samples) * 1000.0
+    p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+    return {
+        "count":   int(ms.size),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms":  round(float(p50), 3),
+        "p95_ms":  round(float(p95), 3),
+        "p99_ms":  round(float(p99), 3),
+    }
+
+
+def run_benchmark(source_spec, frames=300, warmup=30, render=True, faces_dir=None, gate=False,
+                  pose_roi=False, face_tracking=False, face_interval=None):
+    """Run the pipeline over `warmup + frames` frames; returns the report dict."""
+    import face_gallery, vision
+    from analysis import FrameAnalyzer, FACE_DETECT_INTERVAL
+    from camera_manager import RENDITION_LADDER
+    from motion_analysis import MotionGate
+    from overlays import HudRenderer, render_overlays
+    from video_sources import open_source
+
+    vision.load_face_models(download=False)
+    vision.load_emotion_model(download=False)
+    face_gallery.train_faces(faces_dir or face_gallery.KNOWN_FACES_DIR)
+
+    source = open_source(source_spec, pacing="fast", loop=True)
+    if not source.isOpened():
+        raise IOError(f"cannot open {source_spec!r}")
+
+    analyzer = FrameAnalyzer(
+        gate=MotionGate() if gate else None, pose_roi=pose_roi,
+        face_tracking=face_tracking, face_detect_interval=face_interval or FACE_DETECT_INTERVAL,
+    )
+    hud      = HudRenderer()
+    quality  = [cv2.IMWRITE_JPEG_QUALITY, RENDITION_LADDER[0][1]]
+    samples  = {stage: [] for stage in STAGES}
+    measured = gated = 0
+    t_first  = None
+    size     = None
+    try:
+        for i in range(warmup + frames):
+            if i == warmup:
+                t_first = time.perf_counter()
+            t0 = time.perf_counter()
+            ok, frame, ts = source.read_frame()
+            if not ok:
+                break
+            timings = {"capture": time.perf_counter() - t0}
+            size = size or [frame.shape[1], frame.shape[0]]
+
+            result = analyzer.process(frame, ts, timings=timings)
+
+            if render:
+                t1 = time.perf_counter()
+                display = frame.copy()
+                render_overlays(display, result, hud)
+                t2 = time.perf_counter()
+                cv2.imencode(".jpg", display, quality)
+                timings["draw"]   = t2 - t1
+                timings["encode"] = time.perf_counter() - t2
+            timings["total"] = time.perf_counter() - t0
+
+            if i >= warmup:
+                measured += 1
+                gated    += result["gated"]
+                for stage, seconds in timings.items():
+                    samples[stage].append(seconds)
+    finally:
+        analyzer.close()
+        source.release()
+
+    wall = (time.perf_counter() - t_first) if t_first is not None else 0.0
+    identities = analyzer.identities.stats()
+    return {
+        "config": {
+            "source": str(source_spec), "resolution": size,
+            "frames": measured, "warmup": warmup, "render": render,
+            "motion_gate": gate, "gated_frames": gated, "pose_roi": pose_roi,
+            "face_tracking": face_tracking, "face_interval": face_interval or FACE_DETECT_INTERVAL,
+            "models": {
+                "yunet":   vision.yunet is not None,
+                "sface":   vision.sface is not None,
+                "emotion": vision.emotion_net is not None,
+            },
+        },
+        "platform": {
+            "python":  platform.python_version(),
+            "opencv":  cv2.__version__,
+            "machine": platform.machine(),
+            "system":  platform.system(),
+        },
+        "fps":         round(measured / wall, 2) if wall > 0 else 0.0,
+        "peak_rss_mb": _peak_rss_mb(),
+        "identity_cache": identities,
+        "stages":      {stage: _summarize(s) for stage, s in samples.items() if s},
+    }
+
+
+def _config_key(config, name):
+    value = config.get(name)
+    # The same clip may live in another directory on the machine that made the baseline
+    return os.path.basename(value) if name == "source" and value else value
+
+
+def config_differences(report, baseline):
+    """COMPARED_CONFIG settings that differ between the two reports, as strings."""
+    cur, base = report["config"], baseline.get("config", {})
+    return [
+        f"{name}: {base.get(name)!r} → {cur.get(name)!r}"
+        for name in COMPARED_CONFIG if _config_key(cur, name) != _config_key(base, name)
+    ]
+
+
+def compare(report, baseline, threshold, min_ms):
+    """
+    Regressions of `report` against `baseline` as human-readable strings.
+    Raises ValueError if the baseline was recorded under another configuration.
+    """
+    differences = config_differences(report, baseline)
+    if differences:
+        raise ValueError("baseline recorded with different settings — " + "; ".join(differences))
+    problems = []
+    for stage, base in baseline.get("stages", {}).items():
+        cur = report["stages"].get(stage)
+        if cur is None:
+            continue
+        grew = cur["p95_ms"] - base["p95_ms"]
+        if grew > min_ms and cur["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            problems.append(
+                f"{stage}: p95 {base['p95_ms']:.2f} → {cur['p95_ms']:.2f} ms "
+                f"(+{100 * grew / max(base['p95_ms'], 1e-9):.0f}%)"
+            )
+    base_fps = baseline.get("fps") or 0.0
+    if base_fps and report["fps"] < base_fps * (1 - threshold):
+        problems.append(f"fps: {base_fps:.1f} → {report['fps']:.1f}")
+    return problems
+
+
+def print_report(report, out=sys.stdout):
+    cfg = report["config"]
+    gated = f", {cfg['gated_frames']} gated" if cfg.get("motion_gate") else ""
+    print(f"[Benchmark] {cfg['source']}: {cfg['frames']} frames (+{cfg['warmup']} warm-up){gated}", file=out)
+    print(f"{'stage':<13}{'count':>7}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}   (ms)", file=out)
+    for stage in STAGES:
+        s = report["stages"].get(stage)
+        if s is None:
+            continue
+        print(
+            f"{stage:<13}{s['count']:>7}{s['mean_ms']:>9.2f}{s['p50_ms']:>9.2f}"
+            f"{s['p95_ms']:>9.2f}{s['p99_ms']:>9.2f}",
+            file=out,
+        )
+    missing = [stage for stage in FACE_STAGES if stage not in report["stages"]]
+    if missing:
+        print(f"[Benchmark] WARNING no samples for {', '.join(missing)} — the source shows no faces "
+              f"(or the models are missing), so regressions there cannot be detected.", file=out)
+    ids = report.get("identity_cache")
+    if ids:
+        print(f"identity cache: {ids['hits']} hits / {ids['misses']} misses "
+              f"({ids['hit_rate']:.1%} hit rate)", file=out)
+    rss = report["peak_rss_mb"]
+    print(f"FPS: {report['fps']:.1f}   peak RSS: {rss if rss is not None else 'n/a'} MB", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the per-frame detection pipeline.")
+    parser.add_argument("--source", default=DEFAULT_SOURCE,
+                        help="video_sources spec (file, image dir, synthetic:WxH@FPS); "
+                             "default: benchmark_clip.mp4 next to this script")
+    parser.add_argument("-n", "--frames", type=int, default=300, help="measured frames")
+    parser.add_argument("--warmup", type=int, default=30, help="frames run before measuring")
+    parser.add_argument("--no-render", action="store_true", help="skip overlay drawing + JPEG encode")
+    parser.add_argument("--motion-gate", action="store_true", help="enable the motion gate")
+    parser.add_argument("--pose-roi", action="store_true", help="crop pose to the tracked person")
+    parser.add_argument("--face-tracking", action="store_true", help="track faces between YuNet runs")
+    parser.add_argument("--face-interval", type=int, help="run YuNet every N frames")
+    parser.add_argument("--faces-dir", help="known faces directory (default: backend/known_faces)")
+    parser.add_argument("--json", help="write the machine-readable report here")
+    parser.add_argument("--baseline", help="previous --json report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed relative p95 / FPS regression (default 0.10 = 10%%)")
+    parser.add_argument("--min-ms", type=float, default=0.5,
+                        help="ignore p95 increases smaller than this many ms (noise floor)")
+    args = parser.parse_args(argv)
+
+    if args.source == DEFAULT_SOURCE and not os.path.exists(DEFAULT_SOURCE):
+        print(f"[Benchmark] {DEFAULT_SOURCE} not found. Record a 20-30 s clip of one person walking, "
+              f"sitting down and facing the camera and save it there, or pass --source "
+              f"(e.g. --source synthetic for a smoke test without faces).")
+        return 2
+
+    report = run_benchmark(
+        args.source, args.frames, args.warmup, not args.no_render, args.faces_dir,
+        args.motion_gate, args.pose_roi, args.face_tracking, args.face_interval,
+    )
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        try:
+            problems = compare(report, baseline, args.threshold, args.min_ms)
+        except ValueError as e:
+            print(f"[Benchmark] Not comparable with {args.baseline}: {e}")
+            return 2
+        for p in problems:
+            print(f"[Benchmark] REGRESSION {p}")
+        if problems:
+            return 1
+        print(f"[Benchmark] No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
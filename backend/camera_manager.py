@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+"""
+Camera registry
+===============
+One `CameraPipeline` per camera source (device index, RTSP URL, video file,
+image directory or synthetic pattern — see video_sources.py). Each pipeline owns its capture handle, its detection state, its
+producer thread and the latest-frame buffer its MJPEG viewers read from, so
+cameras run fully independently of each other.
+
+The per-frame analysis itself lives in app.py and is handed to the manager
+as the `producer(camera, generation)` callable.
+"""
+
+import threading, time
+import cv2
+
+from metrics import FRAMES_DROPPED, MJPEG_BYTES_SENT
+from video_sources import open_source
+
+DEFAULT_CAMERA_ID = "default"
+
+def new_detection_state():
+    return {
+        "face_name": "No Face",
+        "emotion": "N/A",
+        "emotion_confidence": 0.0,
+        "motion": "No Motion",
+        "fall": "No Fall",
+        "faces_count": 0,
+        "faces": [],                    # per face: {id, name, emotion, emotion_confidence}
+        "pose_status": "No Person",     # Standing / Sitting / Lying / Walking / …
+        "activity": "Idle",             # Idle / Walking / Waving / Bending / …
+        "landmark_count": 0,            # number of visible pose landmarks
+    }
+
+def parse_source(value):
+    """'0' → webcam index 0; anything else is a video_sources spec string."""
+    if isinstance(value, int):
+        return value
+    value = str(value).strip()
+    return int(value) if value.isdigit() else value
+
+
+# ─── Shared Frame Buffer (one producer → many MJPEG viewers) ─────────────────
+# Stream renditions as (scale, JPEG quality). Level 0 is encoded by the
+# producer itself; lower levels are encoded on demand by the first viewer that
+# needs them for a given frame and then shared by every viewer at that level.
+RENDITION_LADDER = (
+    (1.0,  65),
+    (0.75, 55),
+    (0.5,  45),
+    (0.35, 35),
+)
+
+def rendition_level(quality=None, width=None, frame_width=640):
+    """Best ladder level whose quality and width do not exceed what the viewer asked for."""
+    for level, (scale, q) in enumerate(RENDITION_LADDER):
+        if quality is not None and q > quality:
+            continue
+        if width is not None and scale * frame_width > width:
+            continue
+        return level
+    return len(RENDITION_LADDER) - 1
+
+def _multipart(jpeg_buffer):
+    """Build one MJPEG chunk with a single copy. Returns (part, zero-copy JPEG view)."""
+    size   = memoryview(jpeg_buffer).nbytes
+    header = b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n" % size
+    part   = b"".join((header, jpeg_buffer, b"\r\n"))
+    return part, memoryview(part)[len(header):len(header) + size]
+
+
+class EncodedFrame:
+    """
+    One JPEG, encoded once per camera frame and shared read-only by every
+    viewer. `part` is the complete multipart chunk, built with a single copy
+    out of the encoder's buffer; `jpeg` is a zero-copy view of its payload.
+    Viewers write `part` as-is, so per-viewer cost is just the socket write.
+    """
+    __slots__ = ("seq", "timestamp", "part", "jpeg", "_image", "_renditions", "_lock")
+
+    def __init__(self, seq, jpeg_buffer, timestamp=None, image=None):
+        self.seq       = seq
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.part, self.jpeg = _multipart(jpeg_buffer)
+        self._image      = image           # annotated frame, kept for lower renditions
+        self._renditions = {0: self.part}
+        self._lock       = threading.Lock()
+
+    def part_for(self, level):
+        """Multipart chunk for a ladder level, encoding it at most once per frame."""
+        part = self._renditions.get(level)
+        if part is not None or self._image is None:
+            return part or self.part
+        with self._lock:
+            part = self._renditions.get(level)
+            if part is None:
+                scale, quality = RENDITION_LADDER[level]
+                img = cv2.resize(self._image, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+                ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+                part = _multipart(buf)[0] if ok else self.part
+                self._renditions[level] = part
+        return part
+
+
+class LatestFrameBuffer:
+    """
+    Single-slot buffer holding the newest encoded frame.
+    The producer overwrites the slot and bumps a sequence number; every viewer
+    waits for a sequence newer than the one it last sent, so slow viewers
+    simply skip frames instead of queueing them up.
+    """
+    def __init__(self):
+        self._cond  = threading.Condition()
+        self._frame = None
+        self._seq   = 0
+
+    def publish(self, jpeg_buffer, timestamp=None, image=None):
+        """
+        Wrap an encoder output buffer (e.g. from cv2.imencode) and make it current.
+        Pass the annotated `image` it was encoded from to allow lower renditions.
+        """
+        frame = EncodedFrame(0, jpeg_buffer, timestamp, image)   # copy happens outside the lock
+        with self._cond:
+            self._seq  += 1
+            frame.seq   = self._seq
+            self._frame = frame
+            self._cond.notify_all()
+
+    def latest(self):
+        with self._cond:
+            return self._frame
+
+    def reset(self):
+        with self._cond:
+            self._frame = None
+            self._cond.notify_all()
+
+    def wait_next(self, last_seq, timeout=1.0):
+        """Block until a frame newer than `last_seq` exists. Returns EncodedFrame or None."""
+        with self._cond:
+            if self._seq == last_seq or self._frame is None:
+                self._cond.wait(timeout)
+            if self._frame is None or self._seq == last_seq:
+                return None
+            return self._frame
+
+
+# ─── Per-camera pipeline ──────────────────────────────────────────────────────
+class CameraPipeline:
+    def __init__(self, camera_id, source, producer, name=None, location=None,
+                 pacing="realtime", loop=False):
+        self.id       = str(camera_id)
+        self.source   = parse_source(source)
+        self.name     = name or self.id
+        self.location = location
+        self.pacing   = pacing               # recorded sources only
+        self.loop     = loop
+        self._producer = producer
+
+        self.capture    = None
+        self.active     = False
+        self.lock       = threading.Lock()     # guards `capture`
+        self.generation = 0                    # bumped on every stop → old loops exit fast
+        self.thread     = None
+
+        self.frame_buffer = LatestFrameBuffer()
+        self.viewers      = 0                  # connected MJPEG clients
+        self._viewers_lock = threading.Lock()
+        self.latest_frame = None               # newest raw frame (written by the producer)
+        self.frame_lock   = threading.Lock()
+
+        self.state      = new_detection_state()
+        self.state_lock = threading.Lock()
+
+    # ── lifecycle ──
+    def open(self):
+        with self.lock:
+            if self.capture is not None and self.capture.isOpened():
+                self.active = True
+                self._ensure_producer()
+                return True
+            cap = open_source(self.source, pacing=self.pacing, loop=self.loop)
+            if cap.isOpened():
+                self.capture = cap
+                self.active  = True
+                print(f"[Camera:{self.id}] Opened {self.source!r}")
+                self._ensure_producer()
+                return True
+            self.capture = None
+            self.active  = False
+            print(f"[Camera:{self.id}] Failed to open {self.source!r}")
+            return False
+
+    def _ensure_producer(self):
+        """Start the capture/analysis thread for the current generation (caller holds lock)."""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(
+            target=self._producer, args=(self, self.generation),
+            name=f"camera-{self.id}", daemon=True,
+        )
+        self.thread.start()
+
+    def close(self):
+        self.active = False
+        self.generation += 1     # signal the producer and all viewers to exit
+        thread = self.thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+        self.thread = None
+        self.frame_buffer.reset()
+        with self.lock:
+            if self.capture is not None:
+                try:
+                    self.capture.release()
+                except Exception:
+                    pass
+                self.capture = None
+                print(f"[Camera:{self.id}] Released")
+
+    def is_current(self, generation):
+        return self.active and self.generation == generation
+
+    # ── producer side ──
+    def read(self):
+        """Grab the next frame. Returns (ok, frame, capture_ts); ok is False once closed."""
+        with self.lock:
+            if self.capture is None or not self.capture.isOpened():
+                return False, None, time.time()
+            return self.capture.read_frame()
+
+    def is_live(self):
+        cap = self.capture
+        return cap is None or cap.live
+
+    def set_latest_frame(self, frame):
+        with self.frame_lock:
+            self.latest_frame = frame
+
+    def snapshot_frame(self):
+        with self.frame_lock:
+            return None if self.latest_frame is None else self.latest_frame.copy()
+
+    def has_viewers(self):
+        return self.viewers > 0
+
+    def update_state(self, **values):
+        with self.state_lock:
+            self.state.update(values)
+
+    def get_state(self):
+        with self.state_lock:
+            return dict(self.state)
+
+    # ── consumer side ──
+    def stream(self, level=0, fps=None, adaptive=True):
+        """
+        MJPEG consumer — streams whatever the producer last published.
+        `level` is the best RENDITION_LADDER entry this viewer wants and `fps`
+        caps its frame rate. With `adaptive`, a viewer whose socket is slow to
+        drain steps down the ladder and climbs back once it keeps up. All of
+        this runs on the viewer's own thread; the producer never waits on it.
+        """
+        my_gen = self.generation   # snapshot — if this changes, we must exit
+        best = max(0, min(level, len(RENDITION_LADDER) - 1))
+        min_interval = 1.0 / fps if fps else 0.0
+
+        # The producer only renders overlays while this count is non-zero.
+        with self._viewers_lock:
+            self.viewers += 1
+        try:
+            yield from self._stream_loop(my_gen, best, min_interval, adaptive)
+        finally:
+            with self._viewers_lock:
+                self.viewers -= 1
+
+    def _stream_loop(self, my_gen, best, min_interval, adaptive):
+        seq = 0
+        current = best
+        frame_interval = 1.0 / 24  # smoothed producer interval, refined below
+        prev_ts = None
+        slow = fast = 0
+        next_due = time.monotonic()   # when the next chunk may go out under the fps cap
+
+        while self.is_current(my_gen):
+            frame = self.frame_buffer.wait_next(seq, timeout=1.0)
+            if frame is None:
+                continue
+            if time.time() - frame.timestamp > 1.0:
+                # Left over from before anyone was watching (the producer
+                # stops rendering when headless) — wait for a fresh one.
+                seq = frame.seq
+                continue
+            if seq and frame.seq > seq + 1:
+                # Published while this viewer was still sending the last one
+                FRAMES_DROPPED.inc(frame.seq - seq - 1, camera=self.id, reason="viewer_skipped")
+            if prev_ts is not None and frame.timestamp > prev_ts:
+                frame_interval = 0.9 * frame_interval + 0.1 * (frame.timestamp - prev_ts)
+            prev_ts = frame.timestamp
+            seq = frame.seq
+
+            part = frame.part_for(current)
+            t0 = time.monotonic()
+            yield part
+            drain = time.monotonic() - t0   # time the server spent writing the chunk
+            MJPEG_BYTES_SENT.inc(len(part), camera=self.id, rendition=str(current))
+            budget = max(min_interval, frame_interval)
+
+            if adaptive:
+                if drain > 0.8 * budget:
+                    slow, fast = slow + 1, 0
+                    if slow >= 3 and current < len(RENDITION_LADDER) - 1:
+                        current, slow = current + 1, 0
+                elif drain < 0.3 * budget:
+                    slow, fast = 0, fast + 1
+                    if fast >= 48 and current > best:
+                        current, fast = current - 1, 0
+
+            if min_interval:
+                # Advance by whole intervals so the cap holds from the first
+                # frame; after a long stall, restart from now instead of bursting.
+                next_due = max(next_due + min_interval, time.monotonic())
+                wait = next_due - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+
+    def to_dict(self):
+        return {
+            "id":       self.id,
+            "name":     self.name,
+            "location": self.location,
+            "source":   str(self.source),
+            "active":   self.active,
+            "viewers":  self.viewers,
+        }
+
+
+# ─── Registry ─────────────────────────────────────────────────────────────────
+class CameraManager:
+    """Registry of all configured cameras, keyed by camera id."""
+    def __init__(self, producer, pacing="realtime", loop=False):
+        self._producer  = producer
+        self._pacing    = pacing
+        self._loop      = loop
+        self._cameras   = {}
+        self._lock      = threading.Lock()
+        self.default_id = None
+
+    def add(self, camera_id, source, name=None, location=None):
+        cam = CameraPipeline(
+            camera_id, source, self._producer, name=name, location=location,
+            pacing=self._pacing, loop=self._loop,
+        )
+        with self._lock:
+            old = self._cameras.get(cam.id)
+            self._cameras[cam.id] = cam
+            if self.default_id is None:
+                self.default_id = cam.id
+        if old is not None:
+            old.close()
+        return cam
+
+    def get(self, camera_id=None):
+        """Look up a camera; `None` returns the default camera."""
+        with self._lock:
+            key = self.default_id if camera_id is None else str(camera_id)
+            return self._cameras.get(key)
+
+    def all(self):
+        with self._lock:
+            return list(self._cameras.values())
+
+    def close_all(self):
+        """Stop every camera's producer and release its capture (app.py, at exit)."""
+        for cam in self.all():
+            cam.close()
+
+    def load_from_config(self, spec):
+        """
+        Register cameras from a `CAMERA_SOURCES` string:
+            "0"                                    → one webcam, id "default"
+            "living=0,kitchen=rtsp://10.0.0.5/s1"  → named cameras
+        """
+        for i, entry in enumerate(e.strip() for e in (spec or "").split(",")):
+            if not entry:
+                continue
+            key, sep, rest = entry.partition("=")
+            if sep and rest and "/" not in key and not key.isdigit():
+                camera_id, source = key, rest
+            else:
+                camera_id, source = (DEFAULT_CAMERA_ID if i == 0 else f"camera{i}"), entry
+            self.add(camera_id.strip(), source.strip())
+
+    def load_from_supabase(self, client):
+        """Register every active row of the `cameras` table. Returns number loaded."""
+        result = client.table("cameras").select("id,name,location,stream_url,status").execute()
+        loaded = 0
+        for row in result.data or []:
+            if not row.get("stream_url") or row.get("status") == "inactive":
+                continue
+            self.add(row["id"], row["stream_url"], name=row.get("name"), location=row.get("location"))
+            loaded += 1
+        return loaded
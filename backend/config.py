@@ -15,4 +15,71 @@ class Config:
     # Supabase
     SUPABASE_URL    = os.environ.get("SUPABASE_URL", "")
     SUPABASE_KEY    = os.environ.get("SUPABASE_KEY", "")
-    SUPABASE_BUCKET = "known-faces"
\ No newline at end of file
+    SUPABASE_BUCKET = "known-faces"
+    # Threads downloading known_persons photos at startup (photo_sync.py)
+    PHOTO_SYNC_WORKERS = int(os.environ.get("PHOTO_SYNC_WORKERS", "8"))
+
+    # Flask's debug reloader (restarts on code changes, but imports the app twice)
+    USE_RELOADER    = os.environ.get("USE_RELOADER", "1").lower() in ("1", "true", "yes")
+
+    # Cameras used when the Supabase `cameras` table is unavailable or empty.
+    # Comma-separated `id=source` pairs; a source is a device index, file or URL.
+    CAMERA_SOURCES  = os.environ.get("CAMERA_SOURCES", "0")
+
+    # Recorded sources (files, image dirs, synthetic): "realtime" or "fast"
+    VIDEO_PACING    = os.environ.get("VIDEO_PACING", "realtime")
+    VIDEO_LOOP      = os.environ.get("VIDEO_LOOP", "0").lower() in ("1", "true", "yes")
+
+    # Keep every camera analysing from startup (socket.io events and fall
+    # alerts with nobody watching); overlays are still only drawn for viewers.
+    HEADLESS_ANALYSIS = os.environ.get("HEADLESS_ANALYSIS", "0").lower() in ("1", "true", "yes")
+
+    # Skip pose / face / emotion on frames without pixel motion; a keep-alive
+    # inference still runs at least every MOTION_GATE_KEEPALIVE seconds. Off by
+    # default, like --motion-gate in analyze_video.py / benchmark.py: a gated
+    # frame reuses the previous pose, which can delay fall detection.
+    MOTION_GATE           = os.environ.get("MOTION_GATE", "0").lower() in ("1", "true", "yes")
+    MOTION_GATE_KEEPALIVE = float(os.environ.get("MOTION_GATE_KEEPALIVE", "1.0"))
+
+    # Run MediaPipe Pose on a crop around the person tracked in the previous frame.
+    # Off by default, like --pose-roi in analyze_video.py / benchmark.py.
+    POSE_ROI              = os.environ.get("POSE_ROI", "0").lower() in ("1", "true", "yes")
+
+    # Track faces with optical flow between YuNet runs (every FACE_DETECT_INTERVAL
+    # frames); with tracking on, the interval can be raised to ~6-10. Off by
+    # default, like --face-tracking in analyze_video.py / benchmark.py.
+    FACE_TRACKING         = os.environ.get("FACE_TRACKING", "0").lower() in ("1", "true", "yes")
+    FACE_DETECT_INTERVAL  = int(os.environ.get("FACE_DETECT_INTERVAL", "3"))
+
+    # Gallery size from which face matching uses the approximate IVF index
+    # (ann_index.py) instead of exact search. Per gallery_benchmark.py, at 5k
+    # persons IVF with its default n_probe is ~2x faster per probe (0.2 vs
+    # 0.4 ms) and finds the exact best match for ~86% of probes on uniform
+    # random embeddings — a lower bound; a miss usually falls below
+    # MATCH_THRESHOLD and shows as Unknown until the next retry. Raise it to
+    # trade speed for exact recall.
+    ANN_MIN_PERSONS       = int(os.environ.get("ANN_MIN_PERSONS", "5000"))
+
+    # Execution backend of the FER and SFace models: "opencv" (cv2.dnn) or
+    # "onnxruntime" (needs the onnxruntime package, else falls back to opencv);
+    # any other value stops startup (vision.configure_backends).
+    # ONNX Runtime threads (0 = its default of one per core; with inference
+    # workers use about cores / workers) and graph optimisation level
+    # (disable | basic | extended | all). dnn_benchmark.py compares the two.
+    EMOTION_BACKEND        = os.environ.get("EMOTION_BACKEND", "opencv").lower()
+    SFACE_BACKEND          = os.environ.get("SFACE_BACKEND", "opencv").lower()
+    ORT_INTRA_OP_THREADS   = int(os.environ.get("ORT_INTRA_OP_THREADS", "0"))
+    ORT_INTER_OP_THREADS   = int(os.environ.get("ORT_INTER_OP_THREADS", "0"))
+    ORT_GRAPH_OPTIMIZATION = os.environ.get("ORT_GRAPH_OPTIMIZATION", "all").lower()
+
+    # Frame sizes (WxH) the detectors are warmed up for at startup, so the
+    # first frame of a camera at that resolution does not pay buffer set-up.
+    WARMUP_FRAME_SIZES = [
+        tuple(int(v) for v in size.lower().split("x"))
+        for size in os.environ.get("WARMUP_FRAME_SIZES", "640x480").split(",") if size.strip()
+    ]
+
+    # Detector worker processes fed through shared memory (0 = run in-process).
+    # Frames larger than INFERENCE_MAX_FRAME_BYTES are analysed in-process.
+    INFERENCE_WORKERS         = int(os.environ.get("INFERENCE_WORKERS", "0"))
+    INFERENCE_MAX_FRAME_BYTES = int(os.environ.get("INFERENCE_MAX_FRAME_BYTES", 1920 * 1080 * 3))
\ No newline at end of file
@@ -7,6 +7,8 @@ import pickle
 import time
 import warnings
 
+from video_sources import open_source
+
 warnings.filterwarnings('ignore')
 
 # ── TensorFlow — optional, graceful degradation if DLL is broken ──────────────
@@ -348,7 +350,7 @@ class FaceEmotionRecognizer:
         print("  - Press 'a' to add current face to database")
         print("  - Press 's' to save a screenshot")
 
-        cap = cv2.VideoCapture(0)
+        cap = open_source(os.environ.get("VIDEO_SOURCE", "0"))
         if not cap.isOpened():
             print("Error: Could not open webcam")
             return
@@ -602,7 +604,7 @@ class FaceEmotionRecognizer:
             print("Error: Could not load face cascade classifier")
             return
 
-        cap = cv2.VideoCapture(0)
+        cap = open_source(os.environ.get("VIDEO_SOURCE", "0"))
         if not cap.isOpened():
             print("Error: Could not open webcam")
             return
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+DNN backend benchmark
+=====================
+OpenCV DNN (vision.BatchedNet) against ONNX Runtime (ort_backend.OrtNet)
+for the FER and SFace models, on identical inputs.
+
+    python dnn_benchmark.py                                      # both models, batches 1 / 4 / 8
+    python dnn_benchmark.py --models emotion --threads 1 2 4 --opt basic all --json dnn.json
+
+The inputs are seeded random 112×112 images, turned into one blob per model
+with the preprocessing vision.py uses (FER: pixels / 255, SFace: raw pixels,
+both RGB); that same blob goes to every backend. Each row is the median ms per
+batch over --repeat runs after a warm-up pass, plus the largest absolute
+difference from the OpenCV output. OpenCV runs with cv2.setNumThreads set to
+the same --threads value (0 = library default), so rows compare like for
+like. Without onnxruntime installed only the OpenCV rows are produced.
+
+The models are the files the server downloads into backend/models/.
+"""
+
+import argparse, json, os, statistics, sys, time
+
+import cv2
+import numpy as np
+
+import ort_backend, vision
+
+MODELS = {
+    # name: (path, blob scale)
+    "emotion": (vision.EMOTION_MODEL_PATH, 1.0 / 255.0),
+    "sface":   (vision.SFACE_MODEL_PATH,   1.0),
+}
+
+
+def _median_ms(fn, blob, repeat):
+    fn(blob)
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(blob)
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times) * 1000.0
+
+
+def run(model, path=None, batches=(1, 4, 8), threads=(0,), opts=("all",), inter_threads=0,
+        repeat=30, seed=0):
+    path, scale = path or MODELS[model][0], MODELS[model][1]
+    rng    = np.random.default_rng(seed)
+    images = list(rng.integers(0, 256, (max(batches), 112, 112, 3), dtype=np.uint8))
+    blob   = cv2.dnn.blobFromImages(images, scale, (112, 112), (0, 0, 0), swapRB=True)
+    report = {"model": model, "path": os.path.basename(path), "repeat": repeat, "rows": []}
+
+    default_threads = cv2.getNumThreads()
+    reference = {}
+    for n_threads in threads:
+        cv2.setNumThreads(n_threads or default_threads)
+        net = vision.BatchedNet(path, batches)
+        net.warm_up()
+        for b in batches:
+            reference.setdefault(b, net.forward(blob[:b]))
+            report["rows"].append({
+                "backend": "opencv", "threads": n_threads, "optimization": None, "batch": b,
+                "ms": round(_median_ms(net.forward, blob[:b], repeat), 3), "max_abs_diff": 0.0,
+            })
+    cv2.setNumThreads(default_threads)
+
+    if not ort_backend.AVAILABLE:
+        report["onnxruntime"] = None
+        return report
+    report["onnxruntime"] = ort_backend.ort.__version__
+    for n_threads in threads:
+        for opt in opts:
+            net = ort_backend.OrtNet(
+                path, warm_sizes=batches, intra_op_threads=n_threads,
+                inter_op_threads=inter_threads, graph_optimization=opt,
+            )
+            net.warm_up()
+            for b in batches:
+                diff = float(np.max(np.abs(net.forward(blob[:b]) - reference[b])))
+                report["rows"].append({
+                    "backend": "onnxruntime", "threads": n_threads, "optimization": opt, "batch": b,
+                    "ms": round(_median_ms(net.forward, blob[:b], repeat), 3),
+                    "max_abs_diff": round(diff, 6),
+                })
+    return report
+
+
+def print_report(report, out=sys.stdout):
+    ort_note = f"onnxruntime {report['onnxruntime']}" if report["onnxruntime"] else "onnxruntime not installed"
+    print(f"[DNN] {report['model']} ({report['path']}), median of {report['repeat']} runs, {ort_note}", file=out)
+    print(f"  {'backend':<13}{'threads':>8}{'opt':>10}{'batch':>7}{'ms':>10}{'ms/face':>10}{'max diff':>11}", file=out)
+    for row in report["rows"]:
+        threads = row["threads"] or "default"
+        print(
+            f"  {row['backend']:<13}{threads:>8}{row['optimization'] or '-':>10}{row['batch']:>7}"
+            f"{row['ms']:>10.3f}{row['ms'] / row['batch']:>10.3f}{row['max_abs_diff']:>11.2e}", file=out,
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OpenCV DNN vs ONNX Runtime for the FER and SFace models.")
+    parser.add_argument("--models", nargs="+", choices=sorted(MODELS), default=sorted(MODELS))
+    parser.add_argument("--emotion-model", help=f"FER ONNX (default {vision.EMOTION_MODEL_PATH})")
+    parser.add_argument("--sface-model", help=f"SFace ONNX (default {vision.SFACE_MODEL_PATH})")
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 4, 8], help="faces per forward pass")
+    parser.add_argument("--threads", type=int, nargs="+", default=[0], help="intra-op threads (0 = default)")
+    parser.add_argument("--inter-threads", type=int, default=0, help="ONNX Runtime inter-op threads")
+    parser.add_argument("--opt", nargs="+", choices=ort_backend.GRAPH_LEVELS, default=["all"],
+                        help="ONNX Runtime graph optimisation levels")
+    parser.add_argument("--repeat", type=int, default=30, help="timed runs per row")
+    parser.add_argument("--json", help="write the reports here")
+    args = parser.parse_args(argv)
+
+    paths = {"emotion": args.emotion_model, "sface": args.sface_model}
+    reports = []
+    for model in args.models:
+        path = paths[model] or MODELS[model][0]
+        if not os.path.exists(path):
+            print(f"[DNN] {model}: {path} not found — start the server once to download it.")
+            continue
+        report = run(model, path, args.batches, args.threads, args.opt, args.inter_threads, args.repeat)
+        print_report(report)
+        reports.append(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+    return 0 if reports else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
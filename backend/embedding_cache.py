@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Embedding cache
+===============
+On-disk store of the SFace embedding computed for each gallery photo, so
+train_faces() only runs YuNet + SFace on photos it has not seen before.
+
+Entries are keyed by "<person>/<sha1 of the photo bytes>", so renamed or
+re-downloaded photos with the same content still hit, and an edited photo
+misses. The whole file is tied to a model version (vision.face_model_version,
+the sha1 of each model file) and is ignored if the detector or recogniser
+model changes, even to a file of the same size. Photos where no
+face was found are cached too (as a NaN row), so they are not re-scanned on
+every start.
+
+The cache is one `.npz` (keys + float32 embedding matrix + model version)
+written atomically next to the photos: `<faces_dir>/.embedding_cache.npz`.
+"""
+
+import hashlib, os
+
+import numpy as np
+
+CACHE_NAME = ".embedding_cache.npz"
+
+
+def photo_key(person, data):
+    return f"{person}/{hashlib.sha1(data).hexdigest()}"
+
+
+class EmbeddingCache:
+    """
+    One per gallery directory; face_gallery keeps it in memory between
+    retrains. Call `begin()` before each pass over the photos — `save()`
+    drops entries that pass did not touch.
+    """
+    def __init__(self, faces_dir, model_version):
+        self.path          = os.path.join(faces_dir, CACHE_NAME)
+        self.model_version = model_version
+        self.entries       = {}     # key → (1, D) float32 embedding, or None (no face)
+        self.used          = set()
+        self.hits          = 0
+        self.misses        = 0
+        self._dirty        = False
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if str(data["model_version"]) != self.model_version:
+                    print("[Embedding Cache] Model changed — recomputing every photo.")
+                    return
+                for key, row in zip(data["keys"], data["features"]):
+                    self.entries[str(key)] = None if row.size == 0 or np.isnan(row).any() else row[None, :].copy()
+        except Exception as e:
+            print(f"[Embedding Cache] Ignoring unreadable {self.path}: {e}")
+            self.entries = {}
+
+    def begin(self):
+        self.used   = set()
+        self.hits   = 0
+        self.misses = 0
+
+    def get(self, key):
+        """(found, embedding-or-None)."""
+        self.used.add(key)
+        if key in self.entries:
+            self.hits += 1
+            return True, self.entries[key]
+        self.misses += 1
+        return False, None
+
+    def put(self, key, feature):
+        self.entries[key] = None if feature is None else np.asarray(feature, np.float32).reshape(1, -1)
+        self._dirty = True
+
+    def save(self, persons=None):
+        """
+        Write the cache if anything changed, dropping photos this pass did not
+        see — of every person, or only of `persons` after a partial pass.
+        """
+        stale = {
+            key for key in set(self.entries) - self.used
+            if persons is None or key.split("/", 1)[0] in persons
+        }
+        for key in stale:
+            del self.entries[key]
+        if not (self._dirty or stale):
+            return
+        dims = {f.shape[1] for f in self.entries.values() if f is not None}
+        dim  = dims.pop() if len(dims) == 1 else 0
+        keys = sorted(self.entries)
+        features = np.full((len(keys), dim), np.nan, np.float32)
+        for i, key in enumerate(keys):
+            if self.entries[key] is not None and dim:
+                features[i] = self.entries[key][0]
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                np.savez(f, keys=np.array(keys, dtype=str), features=features,
+                         model_version=np.array(self.model_version))
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError as e:
+            print(f"[Embedding Cache] Could not write {self.path}: {e}")
@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+"""
+Known-face gallery
+==================
+SFace embeddings for every person under `known_faces/<name>/`, and matching
+of live embeddings against them. Shared by the web server and the offline
+tools; the models themselves are loaded through vision.py.
+
+The gallery is held as an immutable GallerySnapshot — one contiguous float16
+matrix of L2-normalised exemplar embeddings, up to MAX_EXEMPLARS per person
+— so a probe is scored against every person with one matrix-vector product
+(many probes: one matmul) and matched to the person owning its best row. Every change publishes
+a new snapshot with a higher `version`; matching just reads the module-level
+reference and never takes a lock. The snapshot is the only in-memory copy of
+the gallery: updates diff against its rows rather than a float32 side copy.
+
+Writers — `train_faces()` (full rescan, at startup) and `update_person()` /
+`remove_person()` (one person, on register / delete) — are serialised by
+`face_lock`, so changes apply in the order they were made and a slow full
+retrain can never overwrite a newer single-person update. A single-person
+update only re-embeds that person's photos and patches the previous
+snapshot, so it costs the same with ten people or ten thousand.
+
+Embeddings of individual photos are cached on disk (embedding_cache.py),
+so a retrain only runs YuNet + SFace on new or changed photos.
+
+Galleries of ANN_MIN_PERSONS or more also carry an IVF index (ann_index.py).
+Updates patch it incrementally — only people added, changed or removed are
+inserted / deleted — and the clusters are retrained only once the gallery
+has doubled or halved.
+"""
+
+import os, threading
+import cv2
+import numpy as np
+
+import vision
+from ann_index import IVFIndex, as_float32
+from embedding_cache import EmbeddingCache, photo_key
+from metrics import REGISTRY, FACE_RECOGNITION
+
+KNOWN_FACES_DIR = os.path.join(os.path.dirname(__file__), "known_faces")
+
+MATCH_THRESHOLD = 0.363      # SFace cosine similarity ≥ this means same person
+ANN_MIN_PERSONS = 5000       # exact search below this gallery size (app.py sets it from Config)
+MAX_EXEMPLARS   = 5          # photo embeddings kept per person (the most mutually different)
+SCORE_CHUNK     = 4096       # float16 rows upcast per matmul block
+
+
+def _normalize(rows):
+    rows  = np.asarray(rows, np.float32)
+    norms = np.linalg.norm(rows, axis=1, keepdims=True)
+    return rows / np.maximum(norms, 1e-12)
+
+
+def _encode(exemplars):
+    """(k, D) exemplars → the unit-length float16 rows a snapshot stores for them."""
+    return _normalize(np.asarray(exemplars, np.float32).reshape(-1, np.shape(exemplars)[-1])).astype(np.float16)
+
+
+def select_exemplars(features, k=None):
+    """
+    Up to `k` (default MAX_EXEMPLARS) unit-length rows of a person's photo
+    embeddings, chosen to be mutually different: the photo closest to the
+    mean first, then repeatedly the one least similar to those already kept
+    — so glasses / no-glasses or profile / frontal photos all survive.
+    """
+    k = k or MAX_EXEMPLARS
+    unit = _normalize(np.asarray(features, np.float32).reshape(-1, np.shape(features)[-1]))
+    if len(unit) <= k:
+        return unit
+    mean    = _normalize(unit.mean(axis=0, keepdims=True))[0]
+    chosen  = [int(np.argmax(unit @ mean))]
+    closest = unit @ unit[chosen[0]]
+    while len(chosen) < k:
+        closest[chosen] = np.inf
+        i = int(np.argmin(closest))
+        chosen.append(i)
+        closest = np.maximum(closest, unit @ unit[i])
+    return unit[chosen]
+
+
+class GallerySnapshot:
+    """
+    Read-only gallery. Every person keeps up to MAX_EXEMPLARS unit-length
+    embeddings; all of them live in one C-contiguous float16 `matrix` (R, D)
+    and `owners[r]` is the index into `names` of row r's person. A person's
+    rows are contiguous and `owners` never decreases. A probe's score for a
+    person is its best cosine over that person's rows. `version` grows with
+    every change (identity_cache uses it to spot stale matches); `index`
+    (IVFIndex or None) serves best() instead of exact search.
+    """
+    def __init__(self, names=(), matrix=None, owners=None, version=0, index=None):
+        self.names   = tuple(names)
+        self.matrix  = matrix if matrix is not None else np.empty((0, 0), np.float16)
+        self.owners  = owners if owners is not None else np.empty(0, np.int32)
+        self.version = version
+        self.index   = index
+        self.matrix.setflags(write=False)
+        self.owners.setflags(write=False)
+        self._ids    = None             # name → index into names, built on first exemplars()
+
+    @classmethod
+    def from_embeddings(cls, embeddings, version=0, index=None):
+        """{name: (k, D) exemplars} → snapshot."""
+        return cls().with_changes(embeddings, version, index)
+
+    def with_changes(self, changes, version, index=None):
+        """New snapshot with `changes` ({name: exemplars, or None to remove}) applied."""
+        keep      = np.array([name not in changes for name in self.names], bool)
+        names     = [name for name, k in zip(self.names, keep) if k]
+        remap     = np.cumsum(keep, dtype=np.int32) - 1
+        rows_kept = keep[self.owners] if len(self.owners) else np.zeros(0, bool)
+        matrices, owners = [], []
+        if rows_kept.any():
+            matrices.append(self.matrix[rows_kept])
+            owners.append(remap[self.owners[rows_kept]])
+        for name, exemplars in changes.items():
+            if exemplars is None:
+                continue
+            rows = _encode(exemplars)
+            matrices.append(rows)
+            owners.append(np.full(len(rows), len(names), np.int32))
+            names.append(name)
+        if not names:
+            return GallerySnapshot(version=version, index=index)
+        return GallerySnapshot(
+            names, np.ascontiguousarray(np.vstack(matrices)), np.concatenate(owners), version, index,
+        )
+
+    def with_index(self, index):
+        """The same gallery with another IVF index (or None)."""
+        return GallerySnapshot(self.names, self.matrix, self.owners, self.version, index)
+
+    def exemplars(self, name):
+        """`name`'s float16 rows of the matrix — (0, D) if they are not in the gallery."""
+        if self._ids is None:
+            self._ids = {n: i for i, n in enumerate(self.names)}
+        i = self._ids.get(name)
+        if i is None:
+            return self.matrix[:0]
+        start, stop = np.searchsorted(self.owners, (i, i + 1))
+        return self.matrix[start:stop]
+
+    def row_keys(self):
+        """IVF keys (name, j) of every matrix row, j counting within its person."""
+        starts = np.searchsorted(self.owners, self.owners)
+        return [(self.names[o], int(j)) for o, j in zip(self.owners, np.arange(len(self.owners)) - starts)]
+
+    def __len__(self):
+        return len(self.names)
+
+    def row_scores(self, probes):
+        """(P, D) embeddings → (P, R) cosine similarity to every exemplar row."""
+        probes = _normalize(probes)
+        out = np.empty((len(probes), len(self.owners)), np.float32)
+        for start in range(0, len(self.owners), SCORE_CHUNK):
+            block = as_float32(self.matrix[start:start + SCORE_CHUNK])
+            out[:, start:start + SCORE_CHUNK] = probes @ block.T
+        return out
+
+    def best(self, probes):
+        """Closest person per probe (max over their exemplars) → (names, cosine scores)."""
+        if self.index is not None:
+            keys, scores = self.index.search(probes)
+            return [k[0] if k is not None else None for k in keys], scores
+        scores = self.row_scores(probes)
+        best   = scores.argmax(axis=1)
+        return [self.names[self.owners[r]] for r in best], scores[np.arange(len(best)), best]
+
+
+def _next_index(old, new, changed, removed):
+    """
+    IVF index over every exemplar row of snapshot `new` (keys: (name, j)),
+    patched from `old.index` when it can be — only `changed` and `removed`
+    people's rows are deleted and re-inserted.
+    """
+    if len(new) < ANN_MIN_PERSONS:
+        return None
+    previous = old.index
+    if previous is None or previous.stale:
+        return IVFIndex.build(new.row_keys(), as_float32(new.matrix))
+    gone = [(n, j) for n in changed + removed for j in range(len(old.exemplars(n)))]
+    rows = [new.exemplars(n) for n in changed]
+    keys = [(n, j) for n, r in zip(changed, rows) for j in range(len(r))]
+    return previous.remove(gone).add(keys, as_float32(np.vstack(rows)) if keys else [])
+
+
+gallery    = GallerySnapshot()
+face_lock  = threading.Lock()  # serialises gallery writers; matching never takes it
+_caches    = {}                # faces_dir → EmbeddingCache, kept between updates
+
+def _cache_for(faces_dir):
+    version = vision.face_model_version()
+    cache = _caches.get(faces_dir)
+    if cache is None or cache.model_version != version:
+        cache = _caches[faces_dir] = EmbeddingCache(faces_dir, version)
+    cache.begin()
+    return cache
+
+def _photo_feature(data, fname):
+    """SFace embedding of the first face in an encoded photo, or None."""
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+
+    # Sub-scale massive uploaded photos
+    h, w = img.shape[:2]
+    if h > 1000 or w > 1000:
+        scale = 1000.0 / max(h, w)
+        img = cv2.resize(img, (0, 0), fx=scale, fy=scale)
+
+    faces = vision.detect_faces(img)
+    if len(faces) == 0:
+        return None
+    # SFace alignCrop expects the face array output from YuNet
+    feature = vision.face_feature(img, faces[0])
+    if feature is None:
+        print(f"[SFace] Align error on {fname}")
+    return feature
+
+
+def _person_exemplars(faces_dir, person_name, cache):
+    """Exemplar SFace embeddings (k, D) from one person's photos, or None if none has a face."""
+    person_dir = os.path.join(faces_dir, person_name)
+    if not os.path.isdir(person_dir):
+        return None
+    person_features = []
+    for fname in os.listdir(person_dir):
+        if not fname.lower().endswith((".jpg", ".jpeg", ".png")):
+            continue
+        try:
+            with open(os.path.join(person_dir, fname), "rb") as f:
+                data = f.read()
+        except OSError:
+            continue
+        key = photo_key(person_name, data)
+        found, feature = cache.get(key)
+        if not found:
+            feature = _photo_feature(data, fname)
+            cache.put(key, feature)
+        if feature is not None:
+            person_features.append(feature)
+    if not person_features:
+        return None
+    return select_exemplars(np.vstack(person_features))
+
+
+def _publish(changes):
+    """Swap in a snapshot with `changes` ({name: exemplars or None}) applied. Hold face_lock."""
+    global gallery
+    changed  = [n for n, e in changes.items() if e is not None]
+    removed  = [n for n, e in changes.items() if e is None]
+    snapshot = gallery.with_changes(changes, gallery.version + 1)
+    gallery  = snapshot.with_index(_next_index(gallery, snapshot, changed, removed))
+
+
+def train_faces(faces_dir=KNOWN_FACES_DIR):
+    """Extract deep CNN features for all users using SFace."""
+    global gallery
+    if vision.yunet is None or vision.sface is None:
+        return
+    if not os.path.isdir(faces_dir):
+        return
+
+    new_embeddings = {}
+    print("[SFace] Training deep features...")
+    with face_lock:
+        cache = _cache_for(faces_dir)
+        for person_name in sorted(os.listdir(faces_dir)):
+            if not os.path.isdir(os.path.join(faces_dir, person_name)):
+                continue
+            emb = _person_exemplars(faces_dir, person_name, cache)
+            if emb is not None:
+                new_embeddings[person_name] = emb
+        cache.save()
+        print(f"[SFace] {cache.hits} photo embeddings from cache, {cache.misses} computed.")
+
+        removed  = [n for n in gallery.names if n not in new_embeddings]
+        changed  = [n for n, e in new_embeddings.items() if not np.array_equal(gallery.exemplars(n), _encode(e))]
+        snapshot = GallerySnapshot.from_embeddings(new_embeddings, gallery.version + 1)
+        gallery  = snapshot.with_index(_next_index(gallery, snapshot, changed, removed))
+        print(f"[SFace] Deep features loaded for {len(gallery)} persons: {list(gallery.names)}")
+
+
+def update_person(name, faces_dir=KNOWN_FACES_DIR):
+    """
+    Re-embed one person's photos and publish the change (added, updated, or
+    removed if no photo has a face). Returns True if they have an embedding.
+    """
+    if vision.yunet is None or vision.sface is None:
+        return False
+    with face_lock:
+        cache = _cache_for(faces_dir)
+        emb = _person_exemplars(faces_dir, name, cache)
+        cache.save(persons={name})
+        _publish({name: emb})
+    print(f"[SFace] Updated '{name}' ({'embedded' if emb is not None else 'no face found'}), "
+          f"gallery v{gallery.version}: {len(gallery)} persons")
+    return emb is not None
+
+
+def remove_person(name, faces_dir=KNOWN_FACES_DIR):
+    """Drop one person from the gallery (and their cached photo embeddings)."""
+    with face_lock:
+        cache = _caches.get(faces_dir)
+        if cache is not None:
+            cache.begin()
+            cache.save(persons={name})
+        _publish({name: None})
+    print(f"[SFace] Removed '{name}', gallery v{gallery.version}: {len(gallery)} persons")
+
+
+def match_features(features):
+    """
+    Match several SFace embeddings (None where a face had none) with one
+    matmul → [(name, UI confidence)] aligned with `features`.
+    """
+    snapshot = gallery
+    results  = [("Unknown", 0.0)] * len(features)
+    valid    = [i for i, f in enumerate(features) if f is not None]
+    if len(valid) < len(features):
+        FACE_RECOGNITION.inc(len(features) - len(valid), result="no_feature")
+    if not valid:
+        return results
+    if not len(snapshot):
+        FACE_RECOGNITION.inc(len(valid), result="empty_gallery")
+        return results
+
+    names, scores = snapshot.best(
+        np.vstack([np.asarray(features[i], np.float32).reshape(1, -1) for i in valid])
+    )
+    for row, i in enumerate(valid):
+        score = float(scores[row])
+        if names[row] is not None and score >= MATCH_THRESHOLD:
+            # Scale score for UI (0.363 -> 0%, 1.0 -> 100%)
+            conf_ui = min(1.0, (score - MATCH_THRESHOLD) / (1.0 - MATCH_THRESHOLD))
+            results[i] = (names[row], round(conf_ui, 2))
+            FACE_RECOGNITION.inc(result="known")
+        else:
+            FACE_RECOGNITION.inc(result="unknown")
+    return results
+
+
+REGISTRY.gauge(
+    "elderlycare_gallery_persons", "Persons with an embedding in the face gallery.",
+    callback=lambda: len(gallery),
+)
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Face tracking
+=============
+Propagates YuNet detections between detection frames with pyramidal
+Lucas-Kanade optical flow, so face boxes (and the emotion / SFace crops
+taken from them) follow a moving face instead of lagging behind until the
+next detection. Each face keeps a stable track id across frames.
+
+  detection frame  → YuNet boxes matched to existing tracks by IoU (ids kept)
+  other frames     → every track's box + 5 landmarks moved by the median
+                     flow of points inside it (forward-backward checked)
+
+FaceIds is the IoU matching alone, for when tracking is off: boxes stay put
+between detections, and a detection keeps the id of the previous one it
+overlaps.
+"""
+
+import cv2
+import numpy as np
+
+_LK_PARAMS = dict(
+    winSize=(15, 15), maxLevel=2,
+    criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03),
+)
+
+
+def _iou(a, b):
+    ax0, ay0, aw, ah = a[:4]
+    bx0, by0, bw, bh = b[:4]
+    ix = max(0.0, min(ax0 + aw, bx0 + bw) - max(ax0, bx0))
+    iy = max(0.0, min(ay0 + ah, by0 + bh) - max(ay0, by0))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+class FaceIds:
+    """
+    Stable ids for YuNet detections: `assign()` on every detection frame
+    returns them with ids (in `self.ids`) carried over from the previous
+    detections they overlap by at least MATCH_IOU, best overlap first.
+    """
+    MATCH_IOU = 0.3
+
+    def __init__(self):
+        self.faces    = np.empty((0, 15), np.float32)
+        self.ids      = []
+        self._next_id = 1
+
+    def assign(self, detections):
+        """Replace the faces with fresh YuNet `detections`, keeping ids of faces that overlap."""
+        detections = np.asarray(detections, np.float32).reshape(-1, 15)
+        pairs = sorted(
+            ((_iou(d, t), di, ti) for di, d in enumerate(detections) for ti, t in enumerate(self.faces)),
+            reverse=True,
+        )
+        ids, used = [None] * len(detections), set()
+        for iou, di, ti in pairs:
+            if iou < self.MATCH_IOU:
+                break
+            if ids[di] is None and ti not in used:
+                ids[di] = self.ids[ti]
+                used.add(ti)
+        for di in range(len(detections)):
+            if ids[di] is None:
+                ids[di] = self._next_id
+                self._next_id += 1
+
+        self.faces = detections
+        self.ids   = ids
+        return detections if len(detections) else []
+
+
+class FaceTracker(FaceIds):
+    """
+    Per-camera face tracks. `correct()` on frames where YuNet ran, `predict()`
+    on the frames in between; both return YuNet-format (N, 15) rows, with
+    the matching ids in `self.ids`. Not threadsafe — one per FrameAnalyzer.
+    """
+    GRID         = 4      # GRID × GRID flow points inside each box, plus its 5 landmarks
+    MIN_POINTS   = 5      # fewer surviving points → the track is lost
+    MAX_FB_ERROR = 1.0    # px, forward-backward consistency
+    SEARCH       = 0.5    # flow is computed inside the face boxes grown by this much per side
+
+    def __init__(self):
+        super().__init__()
+        self.prev_gray = None
+
+    def _points(self, face):
+        x, y, w, h = face[:4]
+        g = (np.arange(self.GRID) + 0.5) / self.GRID
+        gx, gy = np.meshgrid(x + w * (0.2 + 0.6 * g), y + h * (0.2 + 0.6 * g))
+        grid = np.stack([gx.ravel(), gy.ravel()], axis=1)
+        return np.vstack([grid, face[4:14].reshape(5, 2)]).astype(np.float32)
+
+    def predict(self, frame):
+        """Move every track to `frame` by optical flow; returns the tracked faces."""
+        if not len(self.faces):
+            self.prev_gray = None
+            return []
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.prev_gray is None or self.prev_gray.shape != gray.shape:
+            self.prev_gray = gray
+            return self.faces
+
+        # LK builds an image pyramid per call — only do it over the area around the faces.
+        h, w = gray.shape
+        x, y, fw, fh = self.faces[:, 0], self.faces[:, 1], self.faces[:, 2], self.faces[:, 3]
+        pad = np.maximum(fw, fh) * self.SEARCH + 16
+        rx0, ry0 = int(max(0, (x - pad).min())), int(max(0, (y - pad).min()))
+        rx1, ry1 = int(min(w, (x + fw + pad).max())), int(min(h, (y + fh + pad).max()))
+        if rx1 - rx0 < 16 or ry1 - ry0 < 16:
+            self.prev_gray = gray
+            return self.faces
+        prev_roi, roi = self.prev_gray[ry0:ry1, rx0:rx1], gray[ry0:ry1, rx0:rx1]
+        offset = np.array([rx0, ry0], np.float32)
+
+        per_face = self.GRID * self.GRID + 5
+        p0 = (np.vstack([self._points(f) for f in self.faces]) - offset).reshape(-1, 1, 2)
+        p1, st, _ = cv2.calcOpticalFlowPyrLK(prev_roi, roi, p0, None, **_LK_PARAMS)
+        pb, st_b, _ = cv2.calcOpticalFlowPyrLK(roi, prev_roi, p1, None, **_LK_PARAMS)
+        fb_ok = (st.ravel() == 1) & (st_b.ravel() == 1) & (
+            np.linalg.norm((p0 - pb).reshape(-1, 2), axis=1) < self.MAX_FB_ERROR
+        )
+        p0, p1 = p0.reshape(-1, 2) + offset, p1.reshape(-1, 2) + offset
+
+        kept_faces, kept_ids = [], []
+        for i, (face, track_id) in enumerate(zip(self.faces, self.ids)):
+            sl = slice(i * per_face, (i + 1) * per_face)
+            ok = fb_ok[sl]
+            if ok.sum() < self.MIN_POINTS:
+                continue                          # lost — YuNet will pick it up again
+            a, b = p0[sl][ok], p1[sl][ok]
+            ca, cb = np.median(a, axis=0), np.median(b, axis=0)
+            da = np.median(np.linalg.norm(a - ca, axis=1))
+            db = np.median(np.linalg.norm(b - cb, axis=1))
+            scale = float(np.clip(db / da, 0.8, 1.25)) if da > 1e-3 else 1.0
+
+            moved = face.copy()
+            x, y, w, h = face[:4]
+            cx, cy = x + w / 2, y + h / 2
+            ncx, ncy = cb + ((cx, cy) - ca) * scale
+            moved[:4] = (ncx - w * scale / 2, ncy - h * scale / 2, w * scale, h * scale)
+            moved[4:14] = (cb + (face[4:14].reshape(5, 2) - ca) * scale).ravel()
+            kept_faces.append(moved)
+            kept_ids.append(track_id)
+
+        self.prev_gray = gray
+        self.faces = np.array(kept_faces, np.float32).reshape(-1, 15)
+        self.ids   = kept_ids
+        return self.faces if kept_faces else []
+
+    def correct(self, frame, detections):
+        """Replace the tracks with fresh YuNet `detections`, keeping ids of faces that overlap."""
+        faces = self.assign(detections)
+        self.prev_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if len(faces) else None
+        return faces
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Gallery matching benchmark
+==========================
+Recall and latency of the IVF index (ann_index.py) against exact search
+(GallerySnapshot's matrix product) on synthetic SFace-sized galleries.
+
+    python gallery_benchmark.py                                # 1k / 5k / 20k persons
+    python gallery_benchmark.py --sizes 50000 --n-probe 16 32 64 --json ann.json
+
+Each person is a random unit vector; probes are gallery members plus
+Gaussian noise scaled so a probe's cosine to its own person is about
+--similarity (SFace matches sit around 0.5-0.8). Recall is the fraction of
+probes whose IVF best match equals the exact best match. Latency is per
+single probe (the live path matches a handful of faces at a time). The
+incremental rows time one add + remove on a built index, which is what a
+retrain does after a single registration or deletion.
+
+Uniform random embeddings have no cluster structure, so they are the worst
+case for IVF — treat the recall figures as a lower bound.
+"""
+
+import argparse, json, sys, time
+
+import numpy as np
+
+from ann_index import IVFIndex, unit_rows
+from face_gallery import GallerySnapshot
+
+
+def _per_probe_ms(fn, probes, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for p in probes:
+            fn(p[None, :])
+        best = min(best, time.perf_counter() - t0)
+    return best / len(probes) * 1000.0
+
+
+def run(size, dim=128, n_probes=200, similarity=0.6, n_probe_values=(8, 16, 32, 64), seed=0):
+    rng     = np.random.default_rng(seed)
+    names   = [f"person{i}" for i in range(size)]
+    vectors = unit_rows(rng.normal(size=(size, dim)))
+    members = rng.choice(size, n_probes, replace=size < n_probes)
+    noise   = unit_rows(rng.normal(size=(n_probes, dim)))
+    # cos(member, member·a + noise·b) ≈ similarity for near-orthogonal noise
+    probes  = unit_rows(vectors[members] * similarity + noise * np.sqrt(1 - similarity ** 2))
+
+    exact = GallerySnapshot.from_embeddings(dict(zip(names, vectors)))
+    truth, _ = exact.best(probes)
+    report = {
+        "size": size, "dim": dim, "probes": n_probes, "similarity": similarity,
+        "exact_ms": round(_per_probe_ms(exact.best, probes), 4),
+    }
+
+    t0 = time.perf_counter()
+    index = IVFIndex.build(names, vectors, seed=seed)
+    report["build_s"] = round(time.perf_counter() - t0, 3)
+    report["lists"]   = len(index.centroids)
+    report["n_probe"] = index.n_probe
+
+    t0 = time.perf_counter()
+    index.add(["newcomer"], unit_rows(rng.normal(size=(1, dim)))).remove([names[0]])
+    report["update_ms"] = round((time.perf_counter() - t0) * 1000.0, 3)
+
+    report["ivf"] = []
+    for n_probe in n_probe_values:
+        found, _ = index.search(probes, n_probe=n_probe)
+        recall   = float(np.mean([f == t for f, t in zip(found, truth)]))
+        ms       = _per_probe_ms(lambda p: index.search(p, n_probe=n_probe), probes)
+        report["ivf"].append({"n_probe": n_probe, "recall": round(recall, 4), "ms": round(ms, 4)})
+    return report
+
+
+def print_report(report, out=sys.stdout):
+    print(
+        f"[Gallery] {report['size']} persons, {report['lists']} lists, default n_probe {report['n_probe']} "
+        f"(build {report['build_s']} s, add+remove {report['update_ms']} ms)", file=out,
+    )
+    print(f"  {'exact':<12}{'recall':>8}{1.0:>8.3f}   {report['exact_ms']:>8.3f} ms/probe", file=out)
+    for row in report["ivf"]:
+        label = f"ivf/{row['n_probe']}"
+        print(f"  {label:<12}{'recall':>8}{row['recall']:>8.3f}   {row['ms']:>8.3f} ms/probe", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="IVF vs exact gallery matching: recall and latency.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000], help="gallery sizes")
+    parser.add_argument("--dim", type=int, default=128, help="embedding size (SFace: 128)")
+    parser.add_argument("--probes", type=int, default=200, help="probes per gallery size")
+    parser.add_argument("--similarity", type=float, default=0.6, help="probe-to-person cosine")
+    parser.add_argument("--n-probe", type=int, nargs="+", default=[8, 16, 32, 64], help="IVF lists searched")
+    parser.add_argument("--json", help="write the reports here")
+    args = parser.parse_args(argv)
+
+    reports = []
+    for size in args.sizes:
+        report = run(size, args.dim, args.probes, args.similarity, args.n_probe)
+        print_report(report)
+        reports.append(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
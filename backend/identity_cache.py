@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Identity cache
+==============
+Remembers who each face track is, so SFace alignment + embedding + gallery
+matching run once when a track is born instead of every few seconds for as
+long as the person stays in view. A cached identity is re-verified only when
+
+  - the track is new (no entry yet),
+  - the last match was Unknown or low-confidence (retried every RETRY s),
+  - the confirmed identity is older than TTL, or
+  - the gallery changed since the match (face_gallery.gallery.version).
+
+Keyed by face_tracking ids: optical-flow track ids with FACE_TRACKING on,
+otherwise ids of YuNet detections matched to the previous ones by IoU
+(FaceIds). Either way it relies on ids surviving between frames. One cache
+per FrameAnalyzer; not threadsafe.
+
+A miss is a recognition that ran. A hit is one that was avoided: a face on a
+frame where recognition without the cache (every RECOGNITION_INTERVAL,
+analysis.py) was due, whose identity came from the cache instead.
+"""
+
+from metrics import IDENTITY_CACHE
+
+
+class IdentityCache:
+    TTL            = 30.0   # seconds a confirmed identity is trusted
+    RETRY          = 2.0    # seconds between attempts on Unknown / low-confidence tracks
+    MIN_CONFIDENCE = 0.3    # UI confidence below this counts as low-confidence
+
+    def __init__(self):
+        self.entries = {}   # track id → (name, confidence, checked_at, gallery_version)
+        self.hits    = 0
+        self.misses  = 0
+
+    def due(self, track_id, now, version):
+        """True if `track_id` needs (re-)recognition at time `now`."""
+        entry = self.entries.get(track_id)
+        if entry is None or entry[3] != version:
+            return True
+        name, confidence, checked_at, _ = entry
+        confirmed = name != "Unknown" and confidence >= self.MIN_CONFIDENCE
+        return now - checked_at >= (self.TTL if confirmed else self.RETRY)
+
+    def name(self, track_id, default="Unknown"):
+        entry = self.entries.get(track_id)
+        return entry[0] if entry is not None else default
+
+    def store(self, track_id, name, confidence, now, version):
+        self.entries[track_id] = (name, confidence, now, version)
+        self.misses += 1
+        IDENTITY_CACHE.inc(result="miss")
+
+    def hit(self):
+        """A due periodic recognition served from the cache (see module docstring)."""
+        self.hits += 1
+        IDENTITY_CACHE.inc(result="hit")
+
+    def prune(self, live_ids):
+        """Forget tracks that ended."""
+        live = set(live_ids)
+        for track_id in [t for t in self.entries if t not in live]:
+            del self.entries[track_id]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits":     self.hits,
+            "misses":   self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "tracks":   len(self.entries),
+        }
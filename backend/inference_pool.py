@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+Process-pool inference
+======================
+Optional mode (INFERENCE_WORKERS > 0) that moves MediaPipe Pose, YuNet, SFace
+and FER out of the web process so multi-camera deployments can use every
+core instead of sharing the GIL with Flask.
+
+  web process                              worker process (× N)
+  ───────────                              ────────────────────
+  frame ──memcpy──→ SharedFrameRing slot ──→ np.ndarray view (no pickling)
+  task (slot, shape, flags) ──Queue──────→ vision.infer_frame()
+  ←──────────────Queue── landmarks (33×4), faces (N×15), emotions, features
+
+Each camera is pinned to one worker so its MediaPipe Pose tracker keeps its
+temporal state between frames; new cameras go to the least-loaded worker.
+
+Workers load the face and emotion models from the files the web process
+downloaded, through their own ModelRegistry: a model that is missing when a
+worker starts (still downloading, or failed offline) is retried with the
+same backoff, so the worker picks it up once the web process has it.
+"""
+
+import itertools, queue, signal, threading, time
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import vision
+from model_registry import ModelRegistry
+
+
+class SharedFrameRing:
+    """Fixed number of equally sized frame slots in one shared-memory block."""
+    def __init__(self, slots, slot_bytes, name=None):
+        self.slots      = slots
+        self.slot_bytes = slot_bytes
+        self._owner     = name is None
+        if self._owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+
+    def view(self, slot, shape):
+        """uint8 ndarray of `shape` backed directly by the slot's memory."""
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+
+    def write(self, slot, frame):
+        np.copyto(self.view(slot, frame.shape), frame)
+
+    def close(self):
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+def _worker_main(shm_name, slots, slot_bytes, tasks, results, pose_roi=False, warm_frame_sizes=(),
+                 backends=None):
+    # Ctrl+C reaches the whole process group; the web process stops workers via close()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    vision.configure_backends(**(backends or {}))
+    models = ModelRegistry()
+    models.register("face", lambda: vision.load_face_models(download=False),
+                    check=lambda: vision.yunet is not None and vision.sface is not None,
+                    warm=(lambda: vision.warm_up_face_models(warm_frame_sizes)) if warm_frame_sizes else None)
+    models.register("emotion", lambda: vision.load_emotion_model(download=False),
+                    check=lambda: vision.emotion_net is not None,
+                    warm=vision.warm_up_emotion_model if warm_frame_sizes else None)
+    models.warm_up()
+    if warm_frame_sizes:
+        vision.warm_up_poses(1, warm_frame_sizes[0])
+    ring  = SharedFrameRing(slots, slot_bytes, name=shm_name)
+    poses = {}   # camera_id → (Pose tracker, PoseRoi or None)
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        job_id, camera_id, slot, shape, detect_now, cached_faces, want_emotion, want_feature = task
+        try:
+            # Cheap once loaded; otherwise reloads a missing model when its retry is due
+            models.ensure("face")
+            models.ensure("emotion")
+            tracker = poses.get(camera_id)
+            if tracker is None:
+                tracker = poses[camera_id] = (vision.create_pose(), vision.PoseRoi() if pose_roi else None)
+            pose, roi = tracker
+            frame = ring.view(slot, shape)
+            out = vision.infer_frame(
+                pose, frame, detect_now, cached_faces, want_emotion, want_feature, roi=roi
+            )
+            results.put((job_id, {
+                "landmarks": vision.landmarks_to_array(out["landmarks"]),
+                "faces":     np.asarray(out["faces"], dtype=np.float32),
+                "emotions":  out["emotions"],
+                "features":  out["features"],
+            }, None))
+        except Exception as e:
+            results.put((job_id, None, repr(e)))
+
+    for pose, _ in poses.values():
+        pose.close()
+    ring.close()
+
+
+class InferencePool:
+    """
+    Pool of detector worker processes fed through a SharedFrameRing.
+    `infer()` is called from each camera's producer thread and blocks until
+    that frame's results are back; cameras run in parallel on different workers.
+    A camera goes to the worker with the fewest cameras when it is first seen.
+    A worker that dies (OOM, crash in a native model) fails its pending frames
+    at once, gets its slots back and is restarted.
+    """
+    HEALTH_CHECK = 0.5      # seconds between liveness checks of the workers
+
+    def __init__(self, workers, max_frame_bytes, slots_per_worker=2, pose_roi=False, warm_frame_sizes=(),
+                 backends=None):
+        self.workers    = workers
+        self.slot_bytes = max_frame_bytes
+        slots           = workers * slots_per_worker
+        self.ring       = SharedFrameRing(slots, max_frame_bytes)
+
+        self._free    = queue.Queue()
+        for i in range(slots):
+            self._free.put(i)
+        self._job_ids = itertools.count()
+        self._pending = {}                   # job_id → [Event, result, error, slot, worker]
+        self._cameras = {}                   # camera_id → worker index
+        self._lock    = threading.Lock()
+        self._closed  = False
+
+        self._ctx     = mp.get_context("spawn")
+        self._args    = (self.ring.name, slots, max_frame_bytes)
+        self._options = (pose_roi, tuple(warm_frame_sizes), backends)
+        self._results = self._ctx.Queue()
+        self._tasks   = [None] * workers
+        self._procs   = [None] * workers
+        for i in range(workers):
+            self._spawn(i)
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+        print(f"[Inference] Started {workers} worker processes ({slots} shared frame slots).")
+
+    def _spawn(self, i):
+        # A fresh task queue, so a restarted worker does not pick up frames already failed
+        self._tasks[i] = self._ctx.Queue()
+        self._procs[i] = self._ctx.Process(
+            target=_worker_main, args=(*self._args, self._tasks[i], self._results, *self._options),
+            name=f"inference-{i}", daemon=True,
+        )
+        self._procs[i].start()
+
+    def _restart_if_dead(self, i):
+        """Fail worker `i`'s pending frames and restart it if it exited. True if it had."""
+        with self._lock:
+            proc = self._procs[i]
+            if self._closed or proc.is_alive():
+                return False
+            failed = [(job_id, w) for job_id, w in self._pending.items() if w[4] == i]
+            for job_id, _ in failed:
+                del self._pending[job_id]
+            self._spawn(i)
+        print(f"[Inference] Worker {i} exited (code {proc.exitcode}), restarted; "
+              f"{len(failed)} pending frames failed.")
+        for _, waiter in failed:
+            # The process is gone, so nothing reads these slots any more
+            self._free.put(waiter[3])
+            waiter[2] = f"worker {i} exited with code {proc.exitcode}"
+            waiter[0].set()
+        return True
+
+    def _worker_for(self, camera_id):
+        with self._lock:
+            worker = self._cameras.get(camera_id)
+            if worker is None:
+                counts = [0] * self.workers
+                for w in self._cameras.values():
+                    counts[w] += 1
+                worker = self._cameras[camera_id] = counts.index(min(counts))
+        return worker
+
+    def accepts(self, frame):
+        return frame.nbytes <= self.slot_bytes
+
+    def _collect(self):
+        last_check = time.monotonic()
+        while True:
+            try:
+                msg = self._results.get(timeout=self.HEALTH_CHECK)
+            except queue.Empty:
+                msg = ()
+            if time.monotonic() - last_check >= self.HEALTH_CHECK:
+                last_check = time.monotonic()
+                for i in range(self.workers):
+                    self._restart_if_dead(i)
+            if msg is None:
+                break
+            if not msg:
+                continue
+            job_id, result, error = msg
+            with self._lock:
+                waiter = self._pending.pop(job_id, None)
+            if waiter is not None:
+                # The worker is done with the frame, so its slot can be reused —
+                # also when infer() already gave up waiting for this answer.
+                self._free.put(waiter[3])
+                waiter[1], waiter[2] = result, error
+                waiter[0].set()
+
+    def infer(self, camera_id, frame, detect_faces_now, cached_faces, want_emotion, want_feature,
+              timeout=5.0):
+        """Same contract as vision.infer_frame(), executed in the camera's worker."""
+        worker = self._worker_for(camera_id)
+        if self._restart_if_dead(worker):
+            # The restarted worker still has to load its models; run this frame elsewhere
+            raise RuntimeError(f"inference worker {worker} had exited and is restarting")
+        slot = self._free.get(timeout=timeout)
+        try:
+            self.ring.write(slot, frame)
+        except Exception:
+            self._free.put(slot)
+            raise
+        # From here the slot is released by _collect() once the worker answers
+        # (or is found dead), never on timeout: a late worker may still be reading the frame.
+        job_id = next(self._job_ids)
+        waiter = [threading.Event(), None, None, slot, worker]
+        with self._lock:
+            self._pending[job_id] = waiter
+            tasks = self._tasks[worker]
+        faces  = np.asarray(cached_faces, dtype=np.float32) if len(cached_faces) else []
+        tasks.put((
+            job_id, camera_id, slot, frame.shape,
+            detect_faces_now, faces, want_emotion, want_feature,
+        ))
+        if not waiter[0].wait(timeout):
+            raise TimeoutError(f"inference worker {worker} did not answer in {timeout}s")
+
+        result, error = waiter[1], waiter[2]
+        if error is not None:
+            raise RuntimeError(f"inference worker failed: {error}")
+        result["landmarks"] = vision.array_to_landmarks(result["landmarks"])
+        if len(result["faces"]) == 0:
+            result["faces"] = []
+        return result
+
+    def close(self):
+        """Stop the workers and free the shared memory (app.py runs this at exit)."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        for q in self._tasks:
+            q.put(None)
+        for p in self._procs:
+            p.join(timeout=2.0)
+            if p.is_alive():
+                p.terminate()
+        self._results.put(None)
+        self.ring.close()
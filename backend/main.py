@@ -1,6 +1,10 @@
+import os
 import cv2
 
-cap = cv2.VideoCapture(0)
+from video_sources import open_source
+
+# VIDEO_SOURCE: device index, video file, image directory, URL or "synthetic"
+cap = open_source(os.environ.get("VIDEO_SOURCE", "0"))
 
 ret, frame1 = cap.read()
 frame1_gray = cv2.cvtColor(frame1, cv2.COLOR_BGR2GRAY)
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Metrics
+=======
+Minimal Prometheus-compatible counters, gauges and histograms, rendered in
+the text exposition format by `/metrics` (app.py).
+
+Recording is a dict lookup plus an add under a per-metric lock; nothing is
+formatted until someone scrapes. Gauges can be backed by a callback so
+values that already exist elsewhere (viewer counts, gallery size) cost
+nothing between scrapes.
+"""
+
+import bisect, threading
+
+# Seconds — covers sub-millisecond stages up to a stalled frame
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_str(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _fmt(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name   = name
+        self.help   = help_text
+        self.labels = tuple(labels)
+        self._lock  = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(labels.get(n, "") for n in self.labels)
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_label_str(self.labels, k)} {_fmt(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=(), callback=None):
+        """`callback()` → number (no labels) or {label tuple: number}, read at scrape time."""
+        super().__init__(name, help_text, labels)
+        self._values   = {}
+        self._callback = callback
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def _samples(self):
+        if self._callback is not None:
+            values = self._callback()
+            items = values.items() if isinstance(values, dict) else [((), values)]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [f"{self.name}{_label_str(self.labels, k)} {_fmt(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        self._series = {}    # label key → [bucket counts…, +Inf count, sum]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i]  += 1
+            series[-1] += value
+
+    def _samples(self):
+        with self._lock:
+            items = [(k, list(s)) for k, s in self._series.items()]
+        lines = []
+        names = self.labels + ("le",)
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_label_str(names, key + (_fmt(bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_str(self.labels, key)} {_fmt(series[-1])}")
+            lines.append(f"{self.name}_count{_label_str(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock    = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=(), callback=None):
+        return self.register(Gauge(name, help_text, labels, callback))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def expose(self):
+        """Text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.expose())
+            except Exception as e:      # a failing callback must not break the scrape
+                lines.append(f"# {metric.name} unavailable: {e}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ─── Hot-path metrics ─────────────────────────────────────────────────────────
+FRAMES_CAPTURED  = REGISTRY.counter(
+    "elderlycare_frames_captured_total", "Frames read from the camera source.", ("camera",))
+FRAMES_PROCESSED = REGISTRY.counter(
+    "elderlycare_frames_processed_total", "Frames run through the detection pipeline.", ("camera",))
+FRAMES_GATED     = REGISTRY.counter(
+    "elderlycare_frames_gated_total", "Frames the motion gate let skip model inference.", ("camera",))
+FRAMES_DROPPED   = REGISTRY.counter(
+    "elderlycare_frames_dropped_total",
+    "Frames lost: failed reads, or published frames a viewer skipped.", ("camera", "reason"))
+STAGE_SECONDS    = REGISTRY.histogram(
+    "elderlycare_stage_seconds", "Per-stage pipeline latency in seconds.", ("stage",))
+SOCKETIO_EMITS   = REGISTRY.counter(
+    "elderlycare_socketio_emits_total", "socket.io events emitted.", ("event",))
+MJPEG_BYTES_SENT = REGISTRY.counter(
+    "elderlycare_mjpeg_bytes_sent_total", "MJPEG bytes written to viewers, per RENDITION_LADDER level.",
+    ("camera", "rendition"))
+FACE_RECOGNITION = REGISTRY.counter(
+    "elderlycare_face_recognition_total", "Embeddings matched against the gallery.", ("result",))
+IDENTITY_CACHE   = REGISTRY.counter(
+    "elderlycare_identity_cache_total",
+    "Face recognitions: hit = a due periodic recognition served by the track's cached identity, "
+    "miss = recognition ran.", ("result",))
@@ -8,6 +8,8 @@ import sys
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 
+from video_sources import open_source
+
 # Fix encoding issues on Windows
 if sys.platform == 'win32':
     import io
@@ -152,8 +154,8 @@ except Exception as e:
     print(f"[WARNING] Could not pre-load models: {str(e).replace(chr(0x1f517), '').replace(chr(0x26d3), '')[:150]}")
     print("[INFO] Models will be downloaded on first detection...")
 
-# Initialize video capture (0 = default webcam, or pass video path)
-cap = cv2.VideoCapture(0)
+# Initialize video capture (VIDEO_SOURCE: webcam index, video path, image dir, URL or "synthetic")
+cap = open_source(os.environ.get("VIDEO_SOURCE", "0"))
 
 # Load Haar Cascade for face detection
 face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Model registry
+==============
+Deferred loading of the detectors, so importing app.py costs no model
+downloads, no MediaPipe import and no ONNX parsing. Each model is a named
+loader that runs at most once:
+
+  - `warm_up()` / `start_warm_up()` load everything (app.py starts it in a
+    background thread when the server launches, so HTTP is answered at once);
+  - `ensure(name)` loads one model on first use — or waits for the warm-up
+    thread if it is already loading it — for code paths that need it now;
+  - `status()` feeds `/ready`: state, load and warm-up time per model, and
+    `ready` once every required model is loaded.
+
+A model that fails (e.g. its download while offline at boot) is retried
+with exponential backoff — RETRY_BASE seconds, doubling up to RETRY_MAX —
+by the warm-up thread and by any `ensure()` after the retry is due.
+
+Loaders in this codebase log and swallow their own errors, so each entry can
+take a `check()` that says whether the model is actually usable afterwards,
+and a `warm()` run right after a successful load (dummy inputs through the
+model, so the first real frame does not pay buffer allocation). Load and
+warm-up times are kept per model, and the whole warm-up's duration in
+`warm_up_seconds`.
+
+    models = ModelRegistry()
+    models.register("face", vision.load_face_models, check=lambda: vision.yunet is not None,
+                    warm=vision.warm_up_face_models)
+    models.start_warm_up()
+    models.ensure("face")      # blocks until loaded (or failed)
+"""
+
+import threading, time
+
+PENDING, LOADING, READY, FAILED = "pending", "loading", "ready", "failed"
+
+RETRY_BASE = 5.0      # seconds before the first retry of a failed model
+RETRY_MAX  = 300.0
+
+
+class _Entry:
+    def __init__(self, name, loader, check, required, warm):
+        self.name     = name
+        self.loader   = loader
+        self.check    = check
+        self.required = required
+        self.warm     = warm
+        self.state    = PENDING
+        self.seconds  = None                # load time
+        self.warm_seconds = None
+        self.error    = None
+        self.attempts = 0
+        self.retry_at = None                # time.monotonic() of the next retry while FAILED
+        self.lock     = threading.Lock()    # held for the whole load, so callers queue behind it
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._entries = {}                  # insertion order = warm-up order
+        self._lock    = threading.Lock()
+        self._thread  = None
+        self.created  = time.time()
+        self.warm_up_seconds = None         # the whole warm_up(), once finished
+
+    def register(self, name, loader, check=None, required=True, warm=None):
+        """`required` models must be loaded for `ready()`; the rest only degrade features."""
+        self._entries[name] = _Entry(name, loader, check, required, warm)
+
+    @staticmethod
+    def _due(entry):
+        return entry.state == PENDING or (entry.state == FAILED and time.monotonic() >= entry.retry_at)
+
+    def ensure(self, name):
+        """Load (and warm up) `name` unless it already was; True when it is usable.
+        A failed model is only retried once its backoff has passed."""
+        entry = self._entries[name]
+        if entry.state == READY or (entry.state == FAILED and not self._due(entry)):
+            return entry.state == READY
+        with entry.lock:
+            if self._due(entry):
+                self._load(entry)
+        return entry.state == READY
+
+    def _load(self, entry):
+        entry.state     = LOADING
+        entry.attempts += 1
+        t0 = time.perf_counter()
+        try:
+            entry.loader()
+            ok = entry.check() if entry.check else True
+            entry.error = None if ok else "not available after loading (see log)"
+        except Exception as e:
+            ok, entry.error = False, str(e)
+            print(f"[Models] {entry.name} failed to load: {e}")
+        entry.seconds = time.perf_counter() - t0
+        print(f"[Models] {entry.name}: {'loaded' if ok else FAILED} in {entry.seconds:.2f}s")
+        if ok and entry.warm:
+            self._warm(entry)
+        if not ok:
+            backoff = min(RETRY_MAX, RETRY_BASE * 2 ** (entry.attempts - 1))
+            entry.retry_at = time.monotonic() + backoff
+            print(f"[Models] {entry.name}: retrying in {backoff:.0f}s")
+        # Only now, so nobody gets past the fast path above with a cold model
+        entry.state = READY if ok else FAILED
+
+    def _warm(self, entry):
+        t0 = time.perf_counter()
+        try:
+            entry.warm()
+        except Exception as e:
+            print(f"[Models] {entry.name} warm-up failed (model still usable): {e}")
+        entry.warm_seconds = time.perf_counter() - t0
+        print(f"[Models] {entry.name}: warmed up in {entry.warm_seconds:.2f}s")
+
+    def warm_up(self, names=None):
+        """Load and warm up `names` (default: every model, in registration order)."""
+        t0 = time.perf_counter()
+        for name in names or list(self._entries):
+            self.ensure(name)
+        self.warm_up_seconds = time.perf_counter() - t0
+        print(f"[Models] Warm-up finished in {self.warm_up_seconds:.2f}s")
+
+    def retry_failed(self, names=None):
+        """Retry failed models as their backoff expires, until all of them are loaded."""
+        entries = [self._entries[n] for n in names or list(self._entries)]
+        while True:
+            failed = [e for e in entries if e.state == FAILED]
+            if not failed:
+                return
+            time.sleep(max(0.0, min(e.retry_at for e in failed) - time.monotonic()))
+            for e in failed:
+                self.ensure(e.name)
+
+    def _run(self, names):
+        self.warm_up(names)
+        self.retry_failed(names)
+
+    def start_warm_up(self, names=None):
+        """`warm_up()` then `retry_failed()` in a daemon thread; later calls are
+        no-ops. Returns the thread."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, args=(names,), name="model-warm-up", daemon=True,
+                )
+                self._thread.start()
+        return self._thread
+
+    def ready(self):
+        return all(e.state == READY for e in self._entries.values() if e.required)
+
+    def status(self):
+        return {
+            "ready":    self.ready(),
+            "uptime_s": round(time.time() - self.created, 3),
+            "warm_up_s": None if self.warm_up_seconds is None else round(self.warm_up_seconds, 3),
+            "models": {
+                e.name: {
+                    "state":    e.state,
+                    "required": e.required,
+                    "load_s":   None if e.seconds is None else round(e.seconds, 3),
+                    "warm_s":   None if e.warm_seconds is None else round(e.warm_seconds, 3),
+                    "error":    e.error,
+                    "attempts": e.attempts,
+                    "retry_in_s": None if e.state != FAILED else round(max(0.0, e.retry_at - time.monotonic()), 1),
+                }
+                for e in self._entries.values()
+            },
+        }
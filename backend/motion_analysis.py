@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+Landmark motion analysis
+========================
+Motion, activity, posture and fall detection from MediaPipe Pose landmarks,
+plus the cheap pixel-difference MotionGate that decides whether the models
+need to run at all. No Flask, no models — the live server (app.py) and the
+offline tools (analyze_video.py, benchmark.py) share it.
+"""
+
+import math, time
+import cv2
+
+# MediaPipe Pose landmark indices (mediapipe.python.solutions.pose.PoseLandmark)
+# of the keypoints used below. Spelled out rather than imported: importing
+# MediaPipe takes over a second and is deferred to model warm-up (vision.py).
+KEY_LANDMARKS = {
+    "nose":           0,
+    "left_shoulder":  11,
+    "right_shoulder": 12,
+    "left_hip":       23,
+    "right_hip":      24,
+    "left_knee":      25,
+    "right_knee":     26,
+    "left_ankle":     27,
+    "right_ankle":    28,
+    "left_wrist":     15,
+    "right_wrist":    16,
+    "left_elbow":     13,
+    "right_elbow":    14,
+}
+
+
+class LandmarkMotionDetector:
+    """
+    Uses MediaPipe Pose landmarks (33 body keypoints) to detect:
+      • Motion   — by tracking frame-to-frame landmark displacement
+      • Activity — walking, waving, bending, idle
+      • Posture  — standing, sitting, lying down
+      • Fall     — sudden postural collapse (shoulder-to-ankle ratio change)
+    """
+    def __init__(self):
+        self.prev_landmarks = None
+        self.prev_time = None
+        # Fall detection state
+        self.fall_active = False
+        self.fall_cooldown_until = 0.0
+        self.standing_height_history = []   # recent torso-to-ankle heights
+        self.posture_history = []           # last N posture labels
+        self.fall_frame_count = 0
+        self.prev_nose_y = None             # for rapid nose drop detection
+        self.prev_nose_time = None
+        # Motion smoothing
+        self.motion_history = []            # last N motion magnitudes
+
+    def _landmark_to_px(self, lm, w, h):
+        """Convert a normalised landmark to pixel coords."""
+        return int(lm.x * w), int(lm.y * h)
+
+    def _visible(self, lm, threshold=0.5):
+        """Return True if the landmark visibility is above threshold."""
+        return lm.visibility > threshold
+
+    def _dist(self, p1, p2):
+        return math.hypot(p1[0] - p2[0], p1[1] - p2[1])
+
+    def analyse(self, landmarks, frame_w, frame_h, now=None):
+        """
+        Analyse a set of MediaPipe Pose landmarks.
+        `now` is the frame's capture timestamp (defaults to wall-clock time),
+        so replayed recordings keep their real timing.
+        Returns dict with:  motion, activity, posture, is_fall, landmark_count
+        """
+        now = time.time() if now is None else now
+        result = {
+            "motion": False,
+            "motion_magnitude": 0.0,
+            "activity": "Idle",
+            "posture": "Unknown",
+            "is_fall": False,
+            "landmark_count": 0,
+        }
+
+        if landmarks is None:
+            self.prev_landmarks = None
+            self.prev_time = None
+            self.fall_frame_count = 0
+            result["posture"] = "No Person"
+            return result
+
+        lms = landmarks.landmark
+        result["landmark_count"] = sum(1 for lm in lms if lm.visibility > 0.5)
+
+        # ── Key landmark pixel positions ──────────────────────────────────────
+        kp = {}
+        for name, idx in KEY_LANDMARKS.items():
+            lm = lms[idx]
+            if self._visible(lm, 0.4):
+                kp[name] = self._landmark_to_px(lm, frame_w, frame_h)
+
+        # ── Motion detection via landmark displacement ────────────────────────
+        current_positions = []
+        for lm in lms:
+            if lm.visibility > 0.5:
+                current_positions.append((lm.x, lm.y))
+            else:
+                current_positions.append(None)
+
+        if self.prev_landmarks is not None and self.prev_time is not None:
+            dt = max(now - self.prev_time, 0.001)
+            total_disp = 0.0
+            count = 0
+            for cur, prev in zip(current_positions, self.prev_landmarks):
+                if cur is not None and prev is not None:
+                    dx = (cur[0] - prev[0]) * frame_w
+                    dy = (cur[1] - prev[1]) * frame_h
+                    total_disp += math.hypot(dx, dy)
+                    count += 1
+            if count > 0:
+                avg_disp = total_disp / count
+                velocity = avg_disp / dt   # pixels/sec
+                self.motion_history.append(avg_disp)
+                if len(self.motion_history) > 10:
+                    self.motion_history.pop(0)
+                smoothed = sum(self.motion_history) / len(self.motion_history)
+                result["motion_magnitude"] = round(smoothed, 1)
+                result["motion"] = smoothed > 2.0   # threshold in px
+
+        self.prev_landmarks = current_positions
+        self.prev_time = now
+
+        # ── Posture classification using body geometry ────────────────────────
+        posture = "Unknown"
+        if "left_shoulder" in kp and "right_shoulder" in kp:
+            mid_shoulder_y = (kp["left_shoulder"][1] + kp["right_shoulder"][1]) / 2.0
+            mid_shoulder_x = (kp["left_shoulder"][0] + kp["right_shoulder"][0]) / 2.0
+            shoulder_width = self._dist(kp["left_shoulder"], kp["right_shoulder"])
+
+            if "left_hip" in kp and "right_hip" in kp:
+                mid_hip_y = (kp["left_hip"][1] + kp["right_hip"][1]) / 2.0
+                torso_height = abs(mid_hip_y - mid_shoulder_y)
+
+                # Get ankle position if available
+                ankle_y = None
+                if "left_ankle" in kp and "right_ankle" in kp:
+                    ankle_y = (kp["left_ankle"][1] + kp["right_ankle"][1]) / 2.0
+                elif "left_ankle" in kp:
+                    ankle_y = kp["left_ankle"][1]
+                elif "right_ankle" in kp:
+                    ankle_y = kp["right_ankle"][1]
+
+                knee_y = None
+                if "left_knee" in kp and "right_knee" in kp:
+                    knee_y = (kp["left_knee"][1] + kp["right_knee"][1]) / 2.0
+                elif "left_knee" in kp:
+                    knee_y = kp["left_knee"][1]
+                elif "right_knee" in kp:
+                    knee_y = kp["right_knee"][1]
+
+                # Body height = shoulder to ankle
+                body_height = 0
+                if ankle_y is not None:
+                    body_height = abs(ankle_y - mid_shoulder_y)
+
+                # Ratio of shoulder width to body height
+                if body_height > 0:
+                    width_to_height = shoulder_width / body_height
+                else:
+                    width_to_height = 0
+
+                # Classify posture
+                if torso_height < 30:
+                    # Very short torso -- likely lying down (horizontal)
+                    posture = "Lying Down"
+                elif width_to_height > 0.7:
+                    # Wide relative to tall -- horizontal
+                    posture = "Lying Down"
+                elif knee_y is not None and ankle_y is not None:
+                    knee_to_hip = abs(knee_y - mid_hip_y)
+                    ankle_to_knee = abs(ankle_y - knee_y) if ankle_y else 0
+                    if knee_to_hip < torso_height * 0.5 and body_height < torso_height * 2.2:
+                        posture = "Sitting"
+                    else:
+                        posture = "Standing"
+                else:
+                    posture = "Standing"
+
+                # ── Fall Detection using geometry ─────────────────────────────
+                # Multi-signal fall detection:
+                #   Signal 1: Posture changed to Lying Down (body horizontal)
+                #   Signal 2: Rapid nose drop (head drops fast)
+                #   Signal 3: Body height collapsed quickly
+                if now > self.fall_cooldown_until:
+                    if body_height > 0:
+                        self.standing_height_history.append((now, body_height, torso_height))
+                        # Keep 3 seconds of history
+                        self.standing_height_history = [
+                            (t, bh, th) for t, bh, th in self.standing_height_history
+                            if now - t < 3.0
+                        ]
+
+                    # -- Signal 1: Lying posture after being upright --
+                    if posture == "Lying Down":
+                        self.fall_frame_count += 1
+                        was_tall = any(
+                            bh > torso_height * 1.5
+                            for t, bh, th in self.standing_height_history
+                            if now - t < 2.0 and now - t > 0.1
+                        )
+                        # 5 frames in lying posture, or 2 if recently standing
+                        if self.fall_frame_count >= 5 or (was_tall and self.fall_frame_count >= 2):
+                            if not self.fall_active:
+                                self.fall_active = True
+                                result["is_fall"] = True
+                                self.fall_cooldown_until = now + 5.0
+                                print("[FALL] FALL DETECTED via lying posture!")
+                    else:
+                        self.fall_frame_count = max(self.fall_frame_count - 1, 0)
+                        if self.fall_frame_count <= 0:
+                            self.fall_active = False
+
+                    # -- Signal 2: Rapid nose drop (head falls fast) --
+                    if "nose" in kp and not self.fall_active:
+                        nose_y = kp["nose"][1]
+                        if self.prev_nose_y is not None and self.prev_nose_time is not None:
+                            dt = now - self.prev_nose_time
+                            if 0.05 < dt < 1.5:
+                                drop = (nose_y - self.prev_nose_y) / frame_h
+                                # Head dropped > 30% of frame height rapidly
+                                if drop > 0.30:
+                                    if not self.fall_active:
+                                        self.fall_active = True
+                                        result["is_fall"] = True
+                                        self.fall_cooldown_until = now + 5.0
+                                        print("[FALL] FALL DETECTED via rapid nose drop!")
+                        self.prev_nose_y = nose_y
+                        self.prev_nose_time = now
+
+                    # -- Signal 3: Body height collapsed > 40% in < 2s --
+                    if len(self.standing_height_history) >= 2 and not self.fall_active:
+                        oldest_t, oldest_bh, _ = self.standing_height_history[0]
+                        newest_t, newest_bh, _ = self.standing_height_history[-1]
+                        dt = newest_t - oldest_t
+                        if 0.2 < dt < 2.0 and oldest_bh > 50:
+                            height_drop = (oldest_bh - newest_bh) / oldest_bh
+                            if height_drop > 0.40:
+                                self.fall_active = True
+                                result["is_fall"] = True
+                                self.fall_cooldown_until = now + 5.0
+                                print("[FALL] FALL DETECTED via body height collapse!")
+                else:
+                    self.fall_active = False
+                    self.fall_frame_count = 0
+
+        result["posture"] = posture
+
+        # ── Activity classification ───────────────────────────────────────────
+        activity = "Idle"
+        mag = result["motion_magnitude"]
+        if mag > 15:
+            activity = "Walking"
+        elif mag > 5:
+            activity = "Moving"
+        elif mag > 2:
+            activity = "Slight Movement"
+
+        # Detect waving (wrist above shoulder)
+        for side in ["left", "right"]:
+            if f"{side}_wrist" in kp and f"{side}_shoulder" in kp:
+                wrist_y = kp[f"{side}_wrist"][1]
+                shoulder_y = kp[f"{side}_shoulder"][1]
+                if wrist_y < shoulder_y - 40:   # wrist is above shoulder
+                    if mag > 3:
+                        activity = "Waving"
+                    else:
+                        activity = "Hand Raised"
+
+        # Detect bending (nose close to hip level)
+        if "nose" in kp and "left_hip" in kp and "right_hip" in kp:
+            nose_y = kp["nose"][1]
+            hip_y = (kp["left_hip"][1] + kp["right_hip"][1]) / 2.0
+            if nose_y > hip_y - 30 and posture != "Sitting" and posture != "Lying Down":
+                activity = "Bending"
+
+        result["activity"] = activity
+        result["is_fall"] = result["is_fall"] or self.fall_active
+        return result
+
+
+# ─── Pixel-difference motion gate ─────────────────────────────────────────────
+class MotionGate:
+    """
+    The grayscale absdiff + threshold detector from main.py, run on a frame
+    downscaled to `width` px, deciding whether the model stages (pose, faces,
+    emotion) need to run on this frame. A static room then costs one small
+    resize + diff per frame instead of a MediaPipe pass.
+
+    Inference still runs:
+      • on every frame with motion, and for `hold` seconds after it stops
+        (so a fall's aftermath is always analysed);
+      • whenever the caller forces it (e.g. a fall is being confirmed);
+      • at least every `keepalive` seconds, bounding how stale the pose
+        state can get — and therefore fall-detection latency — to that.
+    """
+    def __init__(self, width=160, pixel_threshold=25, min_area=0.0016, keepalive=1.0, hold=2.0):
+        self.width           = width
+        self.pixel_threshold = pixel_threshold
+        self.min_area        = min_area       # fraction of pixels that must change
+        self.keepalive       = keepalive
+        self.hold            = hold
+        self.prev_gray       = None
+        self.motion_ratio    = 0.0
+        self.last_motion     = float("-inf")
+        self.last_run        = float("-inf")
+
+    def _small_gray(self, frame):
+        h, w = frame.shape[:2]
+        if w > self.width:
+            # INTER_LINEAR is ~5× cheaper than INTER_AREA here; the blur below
+            # absorbs the extra sampling noise.
+            frame = cv2.resize(frame, (self.width, max(1, h * self.width // w)), interpolation=cv2.INTER_LINEAR)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def has_motion(self, frame):
+        """Difference against the previous frame; True if enough pixels changed."""
+        gray = self._small_gray(frame)
+        prev, self.prev_gray = self.prev_gray, gray
+        if prev is None or prev.shape != gray.shape:
+            return True
+        diff = cv2.absdiff(prev, gray)
+        _, thresh = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+        thresh = cv2.dilate(thresh, None, iterations=1)
+        self.motion_ratio = cv2.countNonZero(thresh) / thresh.size
+        return self.motion_ratio >= self.min_area
+
+    def should_infer(self, frame, now, force=False):
+        motion = self.has_motion(frame)
+        if motion:
+            self.last_motion = now
+        due = (
+            force
+            or motion
+            or now - self.last_motion < self.hold
+            or now - self.last_run >= self.keepalive
+        )
+        if due:
+            self.last_run = now
+        return due
+
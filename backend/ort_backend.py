@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+ONNX Runtime backend
+====================
+Optional CPU execution of the FER and SFace ONNX models through ONNX
+Runtime instead of cv2.dnn, selected per model with EMOTION_BACKEND /
+SFACE_BACKEND (config.py). `onnxruntime` is not a hard dependency:
+without it AVAILABLE is False and vision.py keeps the OpenCV nets.
+
+  - Thread pools and graph optimisation come from OPTIONS (ORT_INTRA_OP_THREADS,
+    ORT_INTER_OP_THREADS, ORT_GRAPH_OPTIMIZATION), set once at startup.
+  - Sessions are cached per (model file, options) and shared: a session's
+    run() is threadsafe, so every camera thread uses the same one, and
+    reloading a model reuses the already-optimised graph.
+  - Dynamic batch dimensions take any number of faces in one run(); models
+    exported with a fixed batch of 1 are run once per face.
+
+    net = OrtNet("models/fer_emotion.onnx")
+    preds = net.forward(blob)                      # (N, 3, 112, 112) → (N, 7)
+
+dnn_benchmark.py compares it with the OpenCV DNN path on the same inputs.
+"""
+
+import os, threading
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+AVAILABLE = ort is not None
+
+# 0 threads = ONNX Runtime's default (one intra-op thread per physical core).
+# With INFERENCE_WORKERS > 0 every worker has its own pools, so set
+# intra_op_threads to about cores / workers.
+OPTIONS = {
+    "intra_op_threads":   0,
+    "inter_op_threads":   0,
+    "graph_optimization": "all",     # disable | basic | extended | all
+}
+
+GRAPH_LEVELS = ("disable", "basic", "extended", "all")
+
+_sessions      = {}                  # (path, options) → InferenceSession
+_sessions_lock = threading.Lock()
+
+
+def _session_options(intra_op_threads, inter_op_threads, graph_optimization):
+    opts = ort.SessionOptions()
+    opts.intra_op_num_threads = intra_op_threads
+    opts.inter_op_num_threads = inter_op_threads
+    # inter-op threads are only used when independent graph branches may run in parallel
+    opts.execution_mode = ort.ExecutionMode.ORT_PARALLEL if inter_op_threads > 1 else ort.ExecutionMode.ORT_SEQUENTIAL
+    opts.graph_optimization_level = {
+        "disable":  ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        "basic":    ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        "all":      ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }[graph_optimization]
+    return opts
+
+
+def session(path, **options):
+    """Shared InferenceSession for `path` with OPTIONS (overridden by `options`)."""
+    if ort is None:
+        raise RuntimeError("onnxruntime is not installed")
+    opts = {**OPTIONS, **options}
+    if opts["graph_optimization"] not in GRAPH_LEVELS:
+        raise ValueError(f"graph_optimization must be one of {GRAPH_LEVELS}")
+    key = (os.path.abspath(path), tuple(sorted(opts.items())))
+    with _sessions_lock:
+        sess = _sessions.get(key)
+        if sess is None:
+            sess = _sessions[key] = ort.InferenceSession(
+                path, sess_options=_session_options(**opts), providers=["CPUExecutionProvider"],
+            )
+    return sess
+
+
+class OrtNet:
+    """Drop-in for vision.BatchedNet (forward / warm_up) on a shared ONNX Runtime session."""
+    backend = "onnxruntime"
+
+    def __init__(self, path, input_size=(112, 112), warm_sizes=(1,), **options):
+        self.path        = path
+        self.input_size  = input_size
+        self.warm_sizes  = tuple(warm_sizes)
+        self.session     = session(path, **options)
+        inp              = self.session.get_inputs()[0]
+        self.input_name  = inp.name
+        self.fixed_batch = inp.shape[0] == 1          # symbolic / None when dynamic
+
+    def _run(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+    def forward(self, blob):
+        """(N, C, H, W) blob → (N, outputs)."""
+        blob = np.ascontiguousarray(blob, dtype=np.float32)
+        n = blob.shape[0]
+        if self.fixed_batch:
+            return np.stack([self._run(blob[i:i + 1]).reshape(-1) for i in range(n)])
+        return self._run(blob).reshape(n, -1)
+
+    def warm_up(self):
+        w, h = self.input_size
+        for size in self.warm_sizes:
+            self.forward(np.zeros((size, 3, h, w), np.float32))
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Overlay rendering
+=================
+Skeleton, face boxes and the status HUD drawn onto MJPEG frames. Only runs
+while someone is watching a camera (app.py) or when a benchmark measures it.
+"""
+
+import cv2
+import numpy as np
+
+EMOTION_COLORS = {
+    "Happy":    (0, 255, 255),  "Sad":      (255, 80, 80),
+    "Angry":    (0, 0, 255),    "Fear":     (200, 0, 200),
+    "Surprise": (0, 165, 255),  "Disgust":  (0, 128, 128),
+    "Neutral":  (0, 255, 0),    "N/A":      (180, 180, 180),
+}
+
+# Built on first draw so importing this module does not import MediaPipe.
+SKELETON_LANDMARK_STYLES = None
+
+# -- Color map by body region --
+# Fingertips (red, large)  |  Wrists/Ankles (yellow)
+# Elbows/Knees (green)     |  Shoulders/Hips (cyan)
+# Face/Nose (white)        |  Feet (orange)
+def _skeleton_styles():
+    global SKELETON_LANDMARK_STYLES
+    if SKELETON_LANDMARK_STYLES is None:
+        from mediapipe.python.solutions.pose import PoseLandmark as _PL
+        SKELETON_LANDMARK_STYLES = {
+            # Fingertips & thumbs -- RED, big circles
+            _PL.LEFT_INDEX:   {"color": (0, 0, 255),   "radius": 7, "label": ""},
+            _PL.RIGHT_INDEX:  {"color": (0, 0, 255),   "radius": 7, "label": ""},
+            _PL.LEFT_PINKY:   {"color": (200, 0, 255), "radius": 6, "label": ""},
+            _PL.RIGHT_PINKY:  {"color": (200, 0, 255), "radius": 6, "label": ""},
+            _PL.LEFT_THUMB:   {"color": (0, 100, 255), "radius": 6, "label": ""},
+            _PL.RIGHT_THUMB:  {"color": (0, 100, 255), "radius": 6, "label": ""},
+            # Wrists -- YELLOW
+            _PL.LEFT_WRIST:   {"color": (0, 255, 255), "radius": 6, "label": "W"},
+            _PL.RIGHT_WRIST:  {"color": (0, 255, 255), "radius": 6, "label": "W"},
+            # Elbows -- GREEN
+            _PL.LEFT_ELBOW:   {"color": (0, 255, 0),   "radius": 5, "label": ""},
+            _PL.RIGHT_ELBOW:  {"color": (0, 255, 0),   "radius": 5, "label": ""},
+            # Shoulders -- CYAN
+            _PL.LEFT_SHOULDER:  {"color": (255, 255, 0), "radius": 6, "label": "S"},
+            _PL.RIGHT_SHOULDER: {"color": (255, 255, 0), "radius": 6, "label": "S"},
+            # Hips -- CYAN
+            _PL.LEFT_HIP:     {"color": (255, 200, 0), "radius": 6, "label": "H"},
+            _PL.RIGHT_HIP:    {"color": (255, 200, 0), "radius": 6, "label": "H"},
+            # Knees -- GREEN
+            _PL.LEFT_KNEE:    {"color": (0, 255, 100), "radius": 5, "label": "K"},
+            _PL.RIGHT_KNEE:   {"color": (0, 255, 100), "radius": 5, "label": "K"},
+            # Ankles -- YELLOW
+            _PL.LEFT_ANKLE:   {"color": (0, 220, 255), "radius": 6, "label": "A"},
+            _PL.RIGHT_ANKLE:  {"color": (0, 220, 255), "radius": 6, "label": "A"},
+            # Feet -- ORANGE
+            _PL.LEFT_HEEL:    {"color": (0, 140, 255), "radius": 4, "label": ""},
+            _PL.RIGHT_HEEL:   {"color": (0, 140, 255), "radius": 4, "label": ""},
+            _PL.LEFT_FOOT_INDEX:  {"color": (0, 165, 255), "radius": 5, "label": ""},
+            _PL.RIGHT_FOOT_INDEX: {"color": (0, 165, 255), "radius": 5, "label": ""},
+            # Nose -- WHITE
+            _PL.NOSE:         {"color": (255, 255, 255), "radius": 5, "label": ""},
+        }
+    return SKELETON_LANDMARK_STYLES
+
+
+def draw_skeleton(display, pose_landmarks):
+    """Draw custom skeleton with highlighted fingertips and motion points."""
+    if not pose_landmarks:
+        return
+    from mediapipe.python.solutions import drawing_utils as mp_drawing, pose as mp_pose
+
+    h_frame, w_frame = display.shape[:2]
+    lms = pose_landmarks.landmark
+
+    # First draw all connections as thin lines
+    mp_drawing.draw_landmarks(
+        display,
+        pose_landmarks,
+        mp_pose.POSE_CONNECTIONS,
+        landmark_drawing_spec=mp_drawing.DrawingSpec(color=(40, 40, 40), thickness=1, circle_radius=0),
+        connection_drawing_spec=mp_drawing.DrawingSpec(color=(0, 200, 200), thickness=2),
+    )
+
+    # Draw each landmark with its custom style
+    for lm_id, style in _skeleton_styles().items():
+        lm = lms[lm_id]
+        if lm.visibility > 0.4:
+            px = int(lm.x * w_frame)
+            py = int(lm.y * h_frame)
+            # Filled circle
+            cv2.circle(display, (px, py), style["radius"], style["color"], -1)
+            # Thin border for contrast
+            cv2.circle(display, (px, py), style["radius"], (0, 0, 0), 1)
+            # Optional label
+            if style["label"]:
+                cv2.putText(display, style["label"], (px + style["radius"] + 2, py + 4),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.35, (255, 255, 255), 1)
+
+def draw_face_boxes(display, faces, labels):
+    """`labels[i]` ({name, emotion, emotion_confidence}) is drawn on `faces[i]`."""
+    for face_data, label in zip(faces, labels):
+        current_name, current_emotion = label["name"], label["emotion"]
+        current_emo_conf = label["emotion_confidence"]
+        box_color = EMOTION_COLORS.get(current_emotion, (0, 255, 0))
+        fx, fy, fw, fh = map(int, face_data[:4])
+        cv2.rectangle(display, (fx, fy), (fx+fw, fy+fh), box_color, 2)
+        label_y = max(fy - 10, 20)
+        name_text = current_name
+        (tw, th), _ = cv2.getTextSize(name_text, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
+        cv2.rectangle(display, (fx, label_y-th-6), (fx+tw+8, label_y+4), (0,0,0), -1)
+        cv2.putText(display, name_text, (fx+4, label_y),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, box_color, 2)
+        emo_text = f"{current_emotion} {int(current_emo_conf*100)}%"
+        cv2.rectangle(display, (fx, fy+fh), (fx+fw, fy+fh+28), (0,0,0), -1)
+        cv2.putText(display, emo_text, (fx+4, fy+fh+20),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.55, (255,255,255), 1)
+
+class HudRenderer:
+    """
+    Status panel + fall banner. Instead of copying the whole frame and running
+    addWeighted over it, only the panel region is darkened (one LUT pass).
+    Each text line is rasterised once into a cached set of pixel coordinates
+    and re-rasterised only when its text changes; drawing it is then a single
+    indexed assignment. One renderer per camera (the cache is not threadsafe).
+    """
+    PANEL_W, PANEL_H = 381, 161   # cv2.rectangle((0,0), (380,160)) is inclusive
+    FONT = cv2.FONT_HERSHEY_SIMPLEX
+    # Same result as blending a (20,20,20) box at 0.55 over the frame at 0.45
+    DIM_LUT = cv2.addWeighted(
+        np.full((1, 256), 20, np.uint8), 0.55, np.arange(256, dtype=np.uint8)[None, :], 0.45, 0
+    )
+    MAX_GLYPHS = 256
+
+    def __init__(self):
+        self._glyphs = {}   # (text, org, scale, thickness, frame size) → (ys, xs)
+
+    def _put_text(self, display, text, org, scale, color, thickness):
+        h, w = display.shape[:2]
+        key = (text, org, scale, thickness, h, w)
+        pixels = self._glyphs.get(key)
+        if pixels is None:
+            mask = np.zeros((h, w), np.uint8)
+            cv2.putText(mask, text, org, self.FONT, scale, 255, thickness)
+            pixels = np.nonzero(mask)
+            if len(self._glyphs) >= self.MAX_GLYPHS:
+                self._glyphs.clear()
+            self._glyphs[key] = pixels
+        display[pixels] = color
+
+    def draw(self, display, motion_status, fall_status, pose_analysis, faces_count):
+        h_frame, w_frame = display.shape[:2]
+        panel = display[:min(self.PANEL_H, h_frame), :min(self.PANEL_W, w_frame)]
+        panel[...] = cv2.LUT(panel, self.DIM_LUT)
+
+        m_color = (0,210,255) if pose_analysis["motion"] else (100,255,100)
+        f_color = (0,0,255) if "FALL" in fall_status else (100,255,100)
+        lines = (
+            (f"Motion  : {motion_status}",                        m_color),
+            (f"Fall    : {fall_status}",                          f_color),
+            (f"Posture : {pose_analysis['posture']}",             (255,200,0)),
+            (f"Activity: {pose_analysis['activity']}",            (200,180,255)),
+            (f"Faces   : {faces_count}",                          (255,220,0)),
+            (f"Landmarks: {pose_analysis['landmark_count']}/33",  (0,255,200)),
+        )
+        for i, (text, color) in enumerate(lines):
+            self._put_text(display, text, (10, 24 + 26 * i), 0.55, color, 2)
+
+        if "FALL" in fall_status:
+            banner = "!! FALL DETECTED - CHECK IMMEDIATELY !!"
+            (bw, bh), _ = cv2.getTextSize(banner, self.FONT, 0.8, 2)
+            bx = max((w_frame-bw)//2, 0)
+            cv2.rectangle(display, (bx-10, 8), (bx+bw+10, bh+24), (0,0,200), -1)
+            self._put_text(display, banner, (bx, bh+16), 0.8, (255,255,255), 2)
+
+
+def render_overlays(display, result, hud):
+    """Draw one FrameAnalyzer.process() result onto `display` in place."""
+    state = result["state"]
+    draw_skeleton(display, result["landmarks"])
+    draw_face_boxes(display, result["faces"], result["face_labels"])
+    hud.draw(display, state["motion"], state["fall"], result["pose_analysis"], state["faces_count"])
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Photo sync
+==========
+Downloads the `known_persons` photos from Supabase Storage into
+`known_faces/<name>/photo.jpg` with a bounded pool of threads.
+
+  - Each thread keeps one keep-alive HTTP(S) connection per host, so a
+    large gallery costs one TLS handshake per thread, not one per photo.
+  - A local manifest (`<faces_dir>/.sync_manifest.json`) remembers the URL,
+    ETag, Last-Modified and SHA-1 of every photo. Requests are conditional
+    (If-None-Match / If-Modified-Since), so unchanged photos come back as
+    304 with no body, and a photo changed on the server is replaced.
+  - Connection errors, 429 and 5xx responses are retried with exponential
+    backoff; other 4xx responses fail that photo only.
+  - Files are written atomically and left untouched when the downloaded
+    bytes are identical, so embedding_cache entries stay valid.
+
+    stats = PhotoSync(faces_dir).run([{"name": "Alice", "photo_url": "https://…"}])
+"""
+
+import hashlib, http.client, json, os, random, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+MANIFEST_NAME = ".sync_manifest.json"
+PHOTO_NAME    = "photo.jpg"
+RETRY_STATUS  = {429, 500, 502, 503, 504}
+MAX_REDIRECTS = 3
+
+
+class _RetryableError(Exception):
+    pass
+
+
+class PhotoSync:
+    def __init__(self, faces_dir, workers=8, retries=3, backoff=0.5, timeout=15.0):
+        self.faces_dir = faces_dir
+        self.workers   = max(1, workers)
+        self.retries   = retries
+        self.backoff   = backoff
+        self.timeout   = timeout
+        self.manifest_path = os.path.join(faces_dir, MANIFEST_NAME)
+        self.manifest  = self._load_manifest()
+        self._lock     = threading.Lock()
+        self._local    = threading.local()
+        self._conns    = []          # every connection opened, closed after run()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    # ── HTTP ────────────────────────────────────────────────────────────────
+    def _connection(self, scheme, netloc):
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        conn = conns.get((scheme, netloc))
+        if conn is None:
+            cls  = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = conns[(scheme, netloc)] = cls(netloc, timeout=self.timeout)
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def _drop_connection(self, scheme, netloc):
+        conn = self._local.conns.pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def _get(self, url, headers):
+        """(status, headers, body) after following redirects, on a reused connection."""
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            path  = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            conn  = self._connection(parts.scheme, parts.netloc)
+            try:
+                conn.request("GET", path, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (OSError, http.client.HTTPException) as e:
+                self._drop_connection(parts.scheme, parts.netloc)
+                raise _RetryableError(str(e))
+            if resp.will_close:
+                self._drop_connection(parts.scheme, parts.netloc)
+            if resp.status in (301, 302, 303, 307, 308) and resp.getheader("Location"):
+                url = urljoin(url, resp.getheader("Location"))
+                continue
+            return resp.status, resp, body
+        raise IOError(f"too many redirects for {url}")
+
+    # ── One photo ───────────────────────────────────────────────────────────
+    def _sync_one(self, name, url):
+        path  = os.path.join(self.faces_dir, name, PHOTO_NAME)
+        entry = self.manifest.get(name) or {}
+        local_sha1 = None
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                local_sha1 = hashlib.sha1(f.read()).hexdigest()
+
+        headers = {}
+        # Only ask for a 304 if the local file is the one the manifest describes.
+        if entry.get("url") == url and local_sha1 and entry.get("sha1") == local_sha1:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        for attempt in range(self.retries + 1):
+            try:
+                status, resp, body = self._get(url, headers)
+                if status in RETRY_STATUS:
+                    raise _RetryableError(f"HTTP {status}")
+                break
+            except _RetryableError as e:
+                if attempt == self.retries:
+                    raise IOError(f"{e} after {attempt + 1} attempts")
+                time.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+
+        if status == 304:
+            return "unchanged"
+        if status != 200:
+            raise IOError(f"HTTP {status}")
+
+        sha1 = hashlib.sha1(body).hexdigest()
+        if sha1 != local_sha1:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = path + ".part"
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, path)
+        with self._lock:
+            self.manifest[name] = {
+                "url":           url,
+                "etag":          resp.getheader("ETag"),
+                "last_modified": resp.getheader("Last-Modified"),
+                "sha1":          sha1,
+            }
+        return "downloaded" if sha1 != local_sha1 else "unchanged"
+
+    def _sync_safe(self, person):
+        name, url = person
+        try:
+            return name, self._sync_one(name, url), None
+        except Exception as e:
+            return name, "failed", e
+
+    # ── Whole gallery ───────────────────────────────────────────────────────
+    def run(self, persons):
+        """
+        Sync every {"name", "photo_url"} row. Returns counts plus `changed`,
+        the names whose local photo was created or replaced.
+        """
+        jobs = [(p.get("name", "Unknown"), p.get("photo_url", "")) for p in persons]
+        jobs = [(name, url) for name, url in jobs if url]
+        stats = {"downloaded": 0, "unchanged": 0, "failed": 0, "changed": []}
+        started = time.time()
+        try:
+            with ThreadPoolExecutor(self.workers, thread_name_prefix="photo-sync") as pool:
+                for name, result, error in pool.map(self._sync_safe, jobs):
+                    stats[result] += 1
+                    if result == "downloaded":
+                        stats["changed"].append(name)
+                    elif error is not None:
+                        print(f"[Supabase Sync] Failed to download photo for '{name}': {error}")
+        finally:
+            for conn in self._conns:
+                conn.close()
+        if os.path.isdir(self.faces_dir):
+            self._save_manifest()
+        print(
+            f"[Supabase Sync] {stats['downloaded']} photos downloaded, {stats['unchanged']} unchanged, "
+            f"{stats['failed']} failed in {time.time() - started:.1f}s ({self.workers} threads)"
+        )
+        return stats
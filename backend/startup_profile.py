@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Startup profile
+===============
+How long the backend takes to import and to start answering HTTP, and how
+long the background model loading and warm-up (model_registry.py) take
+after that.
+
+    python startup_profile.py                        # import profile + launch on port 5057
+    python startup_profile.py --top 20 --json startup.json
+
+Two measurements:
+
+  1. Import profile — `python -X importtime -c "import app"`: total import
+     time and the slowest modules app.py imports directly. MediaPipe and the
+     detector models must not show up here.
+  2. Launch — starts `python app.py` (without the debug reloader unless
+     --reloader, which imports the app a second time), polls `/` until it
+     answers, then `/ready` until every required model is loaded or
+     --ready-timeout passes.
+"""
+
+import argparse, http.client, json, os, re, signal, subprocess, sys, time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_profile(top=10):
+    t0   = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - t0
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = IMPORT_LINE.match(line)
+        if m:
+            rows.append((m.group(4), len(m.group(3)), int(m.group(2)) / 1e6))
+    total  = next((s for name, _, s in rows if name == "app"), None)
+    direct = sorted((r for r in rows if r[1] == 3), key=lambda r: -r[2])   # imported by app.py itself
+    return {
+        "ok":          proc.returncode == 0,
+        "wall_s":      round(wall, 3),
+        "import_s":    None if total is None else round(total, 3),
+        "slowest":     [{"module": name, "s": round(s, 3)} for name, _, s in direct[:top]],
+        "mediapipe":   any(name.startswith("mediapipe") for name, _, _ in rows),
+        "error":       None if proc.returncode == 0 else proc.stderr.strip().splitlines()[-1:],
+    }
+
+
+def _get(port, path):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+    try:
+        conn.request("GET", path)
+        resp = conn.getresponse()
+        return resp.status, resp.read()
+    finally:
+        conn.close()
+
+
+def launch_profile(port=5057, ready_timeout=120.0, reloader=False, http_timeout=30.0):
+    env  = dict(os.environ, PORT=str(port), USE_RELOADER="1" if reloader else "0")
+    t0   = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "app.py"], cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+    report = {"port": port, "reloader": reloader, "first_http_s": None, "ready_s": None, "ready": None}
+    try:
+        while time.perf_counter() - t0 < http_timeout and proc.poll() is None:
+            try:
+                _get(port, "/")
+                report["first_http_s"] = round(time.perf_counter() - t0, 3)
+                break
+            except OSError:
+                time.sleep(0.02)
+        if report["first_http_s"] is None:
+            return report
+        while True:
+            status, body = _get(port, "/ready")
+            report["ready"] = json.loads(body)
+            if status == 200:
+                report["ready_s"] = round(time.perf_counter() - t0, 3)
+                break
+            if time.perf_counter() - t0 > ready_timeout or not any(
+                m["state"] in ("pending", "loading") for m in report["ready"]["models"].values()
+            ):
+                break    # timed out, or warm-up finished with a required model missing
+            time.sleep(0.25)
+        return report
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)   # with the reloader the server runs in a child
+        proc.wait()
+
+
+def print_report(imports, launch, out=sys.stdout):
+    if not imports["ok"]:
+        print(f"[Startup] import app failed: {imports['error']}", file=out)
+    else:
+        print(
+            f"[Startup] import app: {imports['import_s']}s (process {imports['wall_s']}s), "
+            f"MediaPipe imported: {'yes' if imports['mediapipe'] else 'no'}", file=out,
+        )
+        for row in imports["slowest"]:
+            print(f"  {row['module']:<28}{row['s']:>8.3f} s", file=out)
+    if launch is None:
+        return
+    if launch["first_http_s"] is None:
+        print(f"[Startup] server did not answer on port {launch['port']}", file=out)
+        return
+    reloader = " (with reloader)" if launch["reloader"] else ""
+    print(f"[Startup] first HTTP response {launch['first_http_s']}s after launch{reloader}", file=out)
+    ready = f"{launch['ready_s']}s after launch" if launch["ready_s"] is not None else "not reached"
+    status = launch["ready"] or {}
+    warm   = f", warm-up {status['warm_up_s']}s" if status.get("warm_up_s") is not None else ""
+    print(f"[Startup] /ready: {ready}{warm}", file=out)
+    for name, model in status.get("models", {}).items():
+        load = "" if model["load_s"] is None else f"load {model['load_s']:.2f}s"
+        warm = "" if model["warm_s"] is None else f"warm {model['warm_s']:.2f}s"
+        flag = "" if model["required"] else " (optional)"
+        print(f"  {name:<10}{model['state']:<9}{load:>12}{warm:>12}{flag}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backend import time and time to first HTTP response.")
+    parser.add_argument("--top", type=int, default=10, help="slowest direct imports to list")
+    parser.add_argument("--port", type=int, default=5057, help="port for the launched server")
+    parser.add_argument("--ready-timeout", type=float, default=120.0, help="seconds to wait for /ready")
+    parser.add_argument("--reloader", action="store_true", help="launch with Flask's debug reloader")
+    parser.add_argument("--no-launch", action="store_true", help="import profile only")
+    parser.add_argument("--json", help="write the report here")
+    args = parser.parse_args(argv)
+
+    imports = import_profile(args.top)
+    launch  = None if args.no_launch else launch_profile(args.port, args.ready_timeout, args.reloader)
+    print_report(imports, launch)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"imports": imports, "launch": launch}, f, indent=2)
+    return 0 if imports["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+import os, sys
+
+# The backend modules are imported by name, as app.py does.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
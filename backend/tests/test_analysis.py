@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+import face_gallery
+from analysis import RECOGNITION_INTERVAL, FrameAnalyzer
+from identity_cache import IdentityCache
+from motion_analysis import MotionGate
+
+FPS = 10
+
+
+def _face(x, y, w=60, h=60):
+    return [x, y, w, h] + [x + w / 2, y + h / 2] * 5 + [0.9]
+
+
+class Models:
+    """Stands in for infer_frame: fixed face boxes, counts the recognitions."""
+    def __init__(self, faces, name="Ann", confidence=0.9):
+        self.faces, self.name, self.confidence = np.array(faces, np.float32), name, confidence
+        self.matched = 0
+
+    def infer(self, frame, stages):
+        faces = self.faces if stages["detect_faces_now"] else stages["cached_faces"]
+        n = len(faces)
+        return {
+            "landmarks": None,
+            "faces":     faces,
+            "emotions":  [("Neutral", 0.5)] * n if stages["want_emotion"] and n else None,
+            "features":  [np.ones(128, np.float32)] * n if stages["want_feature"] and n else None,
+        }
+
+    def match(self, features):
+        self.matched += len(features)
+        return [(self.name, self.confidence)] * len(features)
+
+
+def _run(analyzer, models, seconds, start=0.0):
+    frame = np.random.default_rng(0).integers(0, 256, (240, 320, 3), dtype=np.uint8)
+    for i in range(int(seconds * FPS)):
+        result = analyzer.process(frame, start + i / FPS, infer=models.infer)
+    return result
+
+
+@pytest.mark.parametrize("tracking", [False, True])
+def test_a_confirmed_face_is_recognised_once(tracking):
+    models   = Models([_face(100, 80)])
+    analyzer = FrameAnalyzer(match=models.match, face_tracking=tracking)
+
+    result = _run(analyzer, models, 10.0)
+
+    assert models.matched == 1
+    assert result["state"]["face_name"] == "Ann"
+    stats = analyzer.identities.stats()
+    assert stats["misses"] == 1
+    # Without the cache SFace would have run every RECOGNITION_INTERVAL after the first
+    assert stats["hits"] == int(10.0 / RECOGNITION_INTERVAL) - 1
+
+
+def test_faces_keep_ids_by_overlap_without_tracking():
+    models   = Models([_face(100, 80), _face(200, 60)])
+    analyzer = FrameAnalyzer(match=models.match)
+    first = _run(analyzer, models, 1.0)["face_ids"]
+
+    models.faces = np.array([_face(205, 62), _face(104, 78)], np.float32)    # both moved a little
+    second = _run(analyzer, models, 1.0, start=1.0)["face_ids"]
+
+    assert second == first[::-1]
+    assert models.matched == 2
+
+
+def test_unknown_faces_are_retried():
+    models   = Models([_face(100, 80)], name="Unknown", confidence=0.0)
+    analyzer = FrameAnalyzer(match=models.match)
+
+    _run(analyzer, models, 10.0)
+
+    # Re-checked every RETRY seconds: nothing was saved, so nothing counts as a hit
+    assert models.matched == int(10.0 / IdentityCache.RETRY)
+    assert analyzer.identities.stats() == {"hits": 0, "misses": models.matched, "hit_rate": 0.0, "tracks": 1}
+
+
+def test_a_gallery_change_re_recognises(monkeypatch):
+    models   = Models([_face(100, 80)])
+    analyzer = FrameAnalyzer(match=models.match)
+    _run(analyzer, models, 1.0)
+
+    monkeypatch.setattr(face_gallery, "gallery", face_gallery.gallery.with_changes({}, version=99))
+    _run(analyzer, models, 1.0, start=1.0)
+
+    assert models.matched == 2
+    assert analyzer.identities.stats()["misses"] == 2
+
+
+def test_ids_of_faces_that_left_are_forgotten():
+    models   = Models([_face(100, 80)])
+    analyzer = FrameAnalyzer(match=models.match)
+    _run(analyzer, models, 1.0)
+
+    models.faces = np.empty((0, 15), np.float32)
+    result = _run(analyzer, models, 1.0, start=1.0)
+
+    assert result["face_ids"] == [] and analyzer.identities.stats()["tracks"] == 0
+    assert result["state"]["face_name"] == "No Face"
+
+
+def test_gate_skips_a_static_scene_unless_a_fall_is_pending():
+    models   = Models([])
+    analyzer = FrameAnalyzer(match=models.match, gate=MotionGate(keepalive=10.0, hold=0.0))
+    frame    = np.zeros((240, 320, 3), np.uint8)
+
+    assert not analyzer.process(frame, 0.0, infer=models.infer)["gated"]   # first frame
+    assert analyzer.process(frame, 0.1, infer=models.infer)["gated"]
+
+    analyzer.motion_detector.fall_frame_count = 1                         # a fall being confirmed
+    assert not analyzer.process(frame, 0.2, infer=models.infer)["gated"]
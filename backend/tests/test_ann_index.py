@@ -0,0 +1,102 @@
+import numpy as np
+
+from ann_index import IVFIndex, as_float32, spherical_kmeans, unit_rows
+
+
+def _gallery(n=400, dim=64, seed=0):
+    rng = np.random.default_rng(seed)
+    return [f"p{i}" for i in range(n)], unit_rows(rng.normal(size=(n, dim)).astype(np.float32))
+
+
+def test_every_member_matches_itself():
+    keys, vectors = _gallery()
+    index = IVFIndex.build(keys, vectors)
+
+    found, scores = index.search(vectors, n_probe=len(index.centroids))
+
+    assert found == keys
+    np.testing.assert_allclose(scores, 1.0, atol=1e-3)
+
+
+def test_default_probe_finds_self_matches():
+    keys, vectors = _gallery()
+    index = IVFIndex.build(keys, vectors)
+
+    found, scores = index.search(vectors)
+
+    # A vector is always in the list of its closest centroid, which is probed first
+    assert found == keys
+    np.testing.assert_allclose(scores, 1.0, atol=1e-3)
+
+
+def test_add_and_remove_are_copy_on_write():
+    keys, vectors = _gallery()
+    index = IVFIndex.build(keys[:-1], vectors[:-1])
+    lists_before = [list(k) for k in index.list_keys]
+
+    added   = index.add([keys[-1]], vectors[-1:])
+    removed = added.remove([keys[0]])
+
+    # The original index is untouched and still serves its own members
+    assert [list(k) for k in index.list_keys] == lists_before
+    assert keys[-1] not in index.where and keys[0] in index.where
+    assert len(index) == len(keys) - 1
+    assert len(added) == len(keys) and len(removed) == len(keys) - 1
+    assert keys[0] not in removed.where and keys[-1] in removed.where
+    # Lists the change did not touch are shared, not copied
+    touched = {added.where[keys[-1]]}
+    for l in range(len(index.list_keys)):
+        if l not in touched:
+            assert added.list_vectors[l] is index.list_vectors[l]
+
+    found, scores = removed.search(vectors[-1:], n_probe=len(index.centroids))
+    assert found == [keys[-1]] and scores[0] > 0.999
+    found, _ = removed.search(vectors[:1], n_probe=len(index.centroids))
+    assert found != [keys[0]]
+
+
+def test_add_replaces_an_existing_key():
+    keys, vectors = _gallery(n=50)
+    index = IVFIndex.build(keys, vectors)
+    moved = unit_rows(np.ones((1, vectors.shape[1]), np.float32))
+
+    updated = index.add([keys[3]], moved)
+
+    assert len(updated) == len(index)
+    assert sum(k == keys[3] for lst in updated.list_keys for k in lst) == 1
+    found, scores = updated.search(moved, n_probe=len(index.centroids))
+    assert found == [keys[3]] and scores[0] > 0.999
+
+
+def test_remove_unknown_keys_returns_same_index():
+    keys, vectors = _gallery(n=20)
+    index = IVFIndex.build(keys, vectors)
+    assert index.remove(["nobody"]) is index
+
+
+def test_stale_once_gallery_doubles_or_halves():
+    keys, vectors = _gallery(n=40)
+    index = IVFIndex.build(keys[:20], vectors[:20])
+    assert not index.stale
+    assert index.add(keys[20:], vectors[20:]).add(["x"], vectors[:1]).stale
+    assert index.remove(keys[:11]).stale
+
+
+def test_spherical_kmeans_returns_unit_centroids():
+    _, vectors = _gallery(n=100)
+    centroids = spherical_kmeans(vectors, 8)
+    assert centroids.shape == (8, vectors.shape[1])
+    np.testing.assert_allclose(np.linalg.norm(centroids, axis=1), 1.0, atol=1e-5)
+
+
+def test_as_float32_matches_numpy():
+    rows = np.random.default_rng(1).normal(size=(5, 7)).astype(np.float16)
+    out  = as_float32(rows)
+    assert out.dtype == np.float32
+    np.testing.assert_array_equal(out, rows.astype(np.float32))
+
+
+def test_unit_rows():
+    rows = unit_rows([[3.0, 4.0], [0.0, 0.0]])
+    assert rows.dtype == np.float32
+    np.testing.assert_allclose(rows, [[0.6, 0.8], [0.0, 0.0]])
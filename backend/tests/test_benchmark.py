@@ -0,0 +1,35 @@
+import pytest
+
+from benchmark import compare
+
+
+def _report(p95=10.0, fps=20.0, **config):
+    base = {"source": "/data/clip.mp4", "resolution": [640, 480], "render": True, "motion_gate": False,
+            "pose_roi": False, "face_tracking": False, "face_interval": 3}
+    return {"config": {**base, **config}, "fps": fps, "stages": {"pose": {"p95_ms": p95}}}
+
+
+def test_regressions_beyond_the_threshold_are_reported():
+    assert compare(_report(10.5), _report(10.0), threshold=0.1, min_ms=0.5) == []
+    problems = compare(_report(13.0, fps=15.0), _report(10.0), threshold=0.1, min_ms=0.5)
+    assert [p.split(":")[0] for p in problems] == ["pose", "fps"]
+
+
+def test_same_clip_in_another_directory_is_comparable():
+    assert compare(_report(source="/elsewhere/clip.mp4"), _report(), threshold=0.1, min_ms=0.5) == []
+
+
+@pytest.mark.parametrize("setting", [
+    {"source": "/data/other.mp4"}, {"resolution": [320, 240]}, {"motion_gate": True}, {"pose_roi": True},
+    {"face_tracking": True}, {"face_interval": 6}, {"render": False},
+])
+def test_unlike_runs_are_refused(setting):
+    with pytest.raises(ValueError, match=next(iter(setting))):
+        compare(_report(**setting), _report(), threshold=0.1, min_ms=0.5)
+
+
+def test_baselines_without_a_resolution_are_refused():
+    baseline = _report()
+    del baseline["config"]["resolution"]
+    with pytest.raises(ValueError, match="resolution"):
+        compare(_report(), baseline, threshold=0.1, min_ms=0.5)
@@ -0,0 +1,149 @@
+import threading, time
+
+import cv2
+import numpy as np
+import pytest
+
+from camera_manager import RENDITION_LADDER, CameraManager, CameraPipeline, LatestFrameBuffer, rendition_level
+
+
+def _jpeg(image):
+    ok, buf = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, RENDITION_LADDER[0][1]])
+    assert ok
+    return buf
+
+
+def test_published_frame_is_one_shared_multipart_chunk():
+    buf    = _jpeg(np.zeros((48, 64, 3), np.uint8))
+    buffer = LatestFrameBuffer()
+    buffer.publish(buf)
+    frame = buffer.latest()
+
+    header, rest = frame.part.split(b"\r\n\r\n", 1)
+    assert header.startswith(b"--frame\r\nContent-Type: image/jpeg")
+    assert int(header.rsplit(b" ", 1)[1]) == buf.nbytes
+    assert rest == buf.tobytes() + b"\r\n"
+    assert bytes(frame.jpeg) == buf.tobytes()
+    assert frame.jpeg.obj is frame.part                          # a view, not a second copy
+    # Every viewer gets the same object for the same frame
+    assert buffer.wait_next(0) is frame and buffer.wait_next(0) is frame
+
+
+def test_wait_next_skips_to_the_newest_frame():
+    buffer = LatestFrameBuffer()
+    for _ in range(3):
+        buffer.publish(_jpeg(np.zeros((8, 8, 3), np.uint8)))
+    assert buffer.wait_next(0).seq == 3
+    assert buffer.wait_next(3, timeout=0.01) is None
+
+
+def test_wait_next_wakes_on_publish():
+    buffer = LatestFrameBuffer()
+    buf    = _jpeg(np.zeros((8, 8, 3), np.uint8))
+    timer  = threading.Timer(0.05, buffer.publish, (buf,))
+    timer.start()
+    frame = buffer.wait_next(0, timeout=2.0)
+    timer.join()
+    assert frame is not None and frame.seq == 1
+
+
+def test_reset_drops_the_frame():
+    buffer = LatestFrameBuffer()
+    buffer.publish(_jpeg(np.zeros((8, 8, 3), np.uint8)))
+    buffer.reset()
+    assert buffer.latest() is None
+    assert buffer.wait_next(0, timeout=0.01) is None
+
+
+def test_rendition_level_steps_down_the_ladder():
+    assert rendition_level() == 0
+    assert rendition_level(quality=65, width=640) == 0
+    assert rendition_level(quality=60) == 1
+    assert rendition_level(quality=45) == 2
+    assert rendition_level(width=480) == 1
+    assert rendition_level(width=400) == 2
+    assert rendition_level(width=400, frame_width=1280) == 3
+    assert rendition_level(quality=60, width=330) == 2         # both limits apply
+    assert rendition_level(quality=1) == len(RENDITION_LADDER) - 1
+
+
+def test_lower_renditions_are_encoded_once_and_shared():
+    image  = np.random.default_rng(0).integers(0, 256, (240, 320, 3), dtype=np.uint8)
+    buffer = LatestFrameBuffer()
+    buffer.publish(_jpeg(image), image=image)
+    frame = buffer.latest()
+
+    low = frame.part_for(2)
+    assert low is frame.part_for(2)
+    assert len(low) < len(frame.part)
+    header, payload = low.split(b"\r\n\r\n", 1)
+    decoded = cv2.imdecode(np.frombuffer(payload[:-2], np.uint8), cv2.IMREAD_COLOR)
+    assert decoded.shape == (120, 160, 3)
+    assert int(header.rsplit(b" ", 1)[1]) == len(payload) - 2
+
+
+@pytest.fixture
+def camera():
+    cam = CameraPipeline("t", "synthetic", producer=lambda c, g: None)
+    cam.active = True
+    image = np.random.default_rng(1).integers(0, 256, (240, 320, 3), dtype=np.uint8)
+    buf   = _jpeg(image)
+    stop  = threading.Event()
+
+    def produce():
+        while not stop.is_set():
+            cam.frame_buffer.publish(buf, timestamp=time.time(), image=image)
+            time.sleep(0.01)
+
+    threading.Thread(target=produce, daemon=True).start()
+    yield cam
+    stop.set()
+    cam.active = False
+
+
+def test_fps_cap_holds_from_the_first_frame(camera):
+    stream, sent = camera.stream(fps=5, adaptive=False), []
+    t0 = time.monotonic()
+    for _ in range(4):
+        next(stream)
+        sent.append(time.monotonic() - t0)
+    stream.close()
+
+    gaps = np.diff(sent)
+    assert np.all(gaps > 0.17) and np.all(gaps < 0.3)
+    assert camera.viewers == 0
+
+
+def _width(part):
+    payload = part.split(b"\r\n\r\n", 1)[1][:-2]
+    return cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_COLOR).shape[1]
+
+
+def test_slow_viewer_steps_down_the_ladder(camera):
+    stream = camera.stream(level=0, adaptive=True)
+    widths = []
+    for _ in range(7):
+        widths.append(_width(next(stream)))
+        time.sleep(0.1)                 # the socket takes far longer to drain than a frame lasts
+    stream.close()
+
+    # One level down after every three slow chunks
+    assert widths == [320] * 3 + [240] * 3 + [160]
+
+
+def test_close_all_stops_producers_and_releases_captures():
+    def producer(cam, generation):
+        while cam.is_current(generation):
+            cam.read()
+
+    manager = CameraManager(producer, pacing="fast")
+    manager.load_from_config("a=synthetic:64x48@50,b=synthetic:64x48@50")
+    cams = manager.all()
+    assert [c.id for c in cams] == ["a", "b"] and manager.default_id == "a"
+    assert all(cam.open() for cam in cams)
+    threads = [cam.thread for cam in cams]
+
+    manager.close_all()
+
+    assert not any(t.is_alive() for t in threads)
+    assert all(cam.capture is None and not cam.active for cam in cams)
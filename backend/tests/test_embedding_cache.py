@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+
+from embedding_cache import CACHE_NAME, EmbeddingCache, photo_key
+
+
+def test_photo_key_is_per_person_and_content():
+    assert photo_key("ann", b"x") == photo_key("ann", b"x")
+    assert photo_key("ann", b"x") != photo_key("bob", b"x")
+    assert photo_key("ann", b"x") != photo_key("ann", b"y")
+
+
+def test_round_trip_keeps_embeddings_and_no_face_entries(tmp_path):
+    feature = np.arange(128, dtype=np.float32)
+    cache = EmbeddingCache(str(tmp_path), "v1")
+    cache.begin()
+    cache.get("ann/a"); cache.put("ann/a", feature)
+    cache.get("ann/b"); cache.put("ann/b", None)
+    cache.save()
+    assert os.path.exists(tmp_path / CACHE_NAME)
+
+    reloaded = EmbeddingCache(str(tmp_path), "v1")
+    reloaded.begin()
+    found, row = reloaded.get("ann/a")
+    assert found and row.shape == (1, 128)
+    np.testing.assert_array_equal(row[0], feature)
+    assert reloaded.get("ann/b") == (True, None)
+    assert reloaded.get("ann/c") == (False, None)
+    assert (reloaded.hits, reloaded.misses) == (2, 1)
+
+
+def test_model_version_change_invalidates(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "v1")
+    cache.put("ann/a", np.ones(8, np.float32))
+    cache.used.add("ann/a")
+    cache.save()
+
+    assert EmbeddingCache(str(tmp_path), "v2").entries == {}
+    assert "ann/a" in EmbeddingCache(str(tmp_path), "v1").entries
+
+
+def test_save_drops_untouched_entries_of_the_rescanned_persons(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "v1")
+    for key in ("ann/a", "ann/b", "bob/a"):
+        cache.put(key, np.ones(4, np.float32))
+    cache.begin()
+    cache.get("ann/a")
+    cache.save(persons={"ann"})
+
+    assert set(EmbeddingCache(str(tmp_path), "v1").entries) == {"ann/a", "bob/a"}
+
+
+def test_unreadable_file_is_ignored(tmp_path):
+    (tmp_path / CACHE_NAME).write_bytes(b"not an npz")
+    assert EmbeddingCache(str(tmp_path), "v1").entries == {}
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from face_gallery import GallerySnapshot, MAX_EXEMPLARS, _encode, select_exemplars
+
+
+def _people(counts, dim=128, seed=0):
+    rng = np.random.default_rng(seed)
+    return {f"p{i}": rng.normal(size=(k, dim)).astype(np.float32) for i, k in enumerate(counts)}
+
+
+def _assert_consistent(snap, expected):
+    """Names, owners and matrix rows all describe exactly `expected`."""
+    assert sorted(snap.names) == sorted(expected)
+    assert snap.matrix.dtype == np.float16 and snap.matrix.flags.c_contiguous
+    assert len(snap.owners) == len(snap.matrix)
+    assert np.all(np.diff(snap.owners) >= 0)
+    for name, exemplars in expected.items():
+        np.testing.assert_array_equal(snap.exemplars(name), _encode(exemplars))
+    keys = snap.row_keys()
+    assert len(keys) == len(snap.matrix)
+    assert all(snap.names[o] == k[0] for o, k in zip(snap.owners, keys))
+
+
+def test_from_embeddings():
+    people = _people([3, 1, 5])
+    snap = GallerySnapshot.from_embeddings(people, version=1)
+    _assert_consistent(snap, people)
+    assert snap.version == 1 and len(snap) == 3
+    assert snap.row_keys()[:4] == [("p0", 0), ("p0", 1), ("p0", 2), ("p1", 0)]
+    np.testing.assert_allclose(np.linalg.norm(snap.matrix.astype(np.float32), axis=1), 1.0, atol=1e-3)
+
+
+def test_with_changes_removes_replaces_and_adds():
+    people = _people([2, 3, 1, 4])
+    snap   = GallerySnapshot.from_embeddings(people, version=1)
+    new    = _people([2, 5], seed=1)
+
+    changed = snap.with_changes({"p1": None, "p2": new["p1"], "p9": new["p0"]}, version=2)
+
+    expected = {"p0": people["p0"], "p3": people["p3"], "p2": new["p1"], "p9": new["p0"]}
+    _assert_consistent(changed, expected)
+    assert changed.version == 2
+    assert changed.exemplars("p1").shape == (0, 128)
+    # The old snapshot is unchanged
+    _assert_consistent(snap, people)
+
+
+def test_removing_everyone_leaves_an_empty_gallery():
+    snap  = GallerySnapshot.from_embeddings(_people([2, 2]))
+    empty = snap.with_changes({"p0": None, "p1": None}, version=3)
+    assert len(empty) == 0 and len(empty.owners) == 0 and empty.version == 3
+    assert empty.row_keys() == []
+
+
+def test_snapshot_arrays_are_read_only():
+    snap = GallerySnapshot.from_embeddings(_people([2]))
+    with pytest.raises(ValueError):
+        snap.matrix[0, 0] = 0
+    with pytest.raises(ValueError):
+        snap.owners[0] = 1
+
+
+def test_best_matches_exemplar_owner():
+    people = _people([3, 2, 4])
+    snap   = GallerySnapshot.from_embeddings(people)
+    probes = np.vstack([people["p2"][1], people["p0"][0]])
+
+    names, scores = snap.best(probes)
+
+    assert names == ["p2", "p0"]
+    np.testing.assert_allclose(scores, 1.0, atol=1e-2)
+
+
+def test_select_exemplars_caps_and_keeps_distinct_rows():
+    rng      = np.random.default_rng(2)
+    base     = rng.normal(size=(3, 64)).astype(np.float32)
+    features = np.vstack([base, base + 1e-4, base - 1e-4])   # three distinct directions, each three times
+
+    chosen = select_exemplars(features, k=MAX_EXEMPLARS)
+
+    assert len(chosen) <= MAX_EXEMPLARS
+    assert len(select_exemplars(features, k=3)) == 3
+    # Three picks out of near-duplicates must cover all three directions
+    picks = _encode(select_exemplars(features, k=3)).astype(np.float32) @ _encode(base).astype(np.float32).T
+    assert sorted(picks.argmax(axis=1).tolist()) == [0, 1, 2]
@@ -0,0 +1,63 @@
+import numpy as np
+
+from face_tracking import FaceTracker, _iou
+
+
+def _texture(h=240, w=320, seed=0):
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (h // 4, w // 4), dtype=np.uint8)
+    gray  = np.kron(small, np.ones((4, 4), np.uint8))          # blocky, so LK has corners to lock on
+    return np.dstack([gray] * 3)
+
+
+def _face(x, y, w=60, h=60, score=0.9):
+    landmarks = [x + 0.3 * w, y + 0.4 * h, x + 0.7 * w, y + 0.4 * h, x + 0.5 * w, y + 0.55 * h,
+                 x + 0.35 * w, y + 0.75 * h, x + 0.65 * w, y + 0.75 * h]
+    return np.array([x, y, w, h, *landmarks, score], np.float32)
+
+
+def test_iou():
+    assert _iou(_face(0, 0), _face(0, 0)) == 1.0
+    assert _iou(_face(0, 0), _face(100, 100)) == 0.0
+    assert abs(_iou(_face(0, 0), _face(30, 0)) - 1 / 3) < 1e-6
+
+
+def test_predict_follows_a_shifted_texture():
+    frame   = _texture()
+    tracker = FaceTracker()
+    tracker.correct(frame, [_face(100, 80)])
+
+    shifted = np.roll(frame, (3, 5), axis=(0, 1))               # 5 px right, 3 px down
+    faces   = tracker.predict(shifted)
+
+    assert len(faces) == 1 and tracker.ids == [1]
+    np.testing.assert_allclose(faces[0][:2], (105, 83), atol=0.5)
+    np.testing.assert_allclose(faces[0][2:4], (60, 60), atol=1.0)
+    np.testing.assert_allclose(faces[0][4:14], _face(105, 83)[4:14], atol=0.5)
+
+
+def test_correct_keeps_ids_of_overlapping_faces():
+    frame   = _texture()
+    tracker = FaceTracker()
+    tracker.correct(frame, [_face(20, 20), _face(200, 120)])
+    assert tracker.ids == [1, 2]
+
+    # Same two people, listed the other way round and slightly moved, plus a newcomer
+    tracker.correct(frame, [_face(204, 122), _face(250, 10), _face(23, 18)])
+
+    assert tracker.ids == [2, 3, 1]
+
+
+def test_lost_tracks_are_dropped():
+    tracker = FaceTracker()
+    tracker.correct(_texture(seed=0), [_face(100, 80)])
+    assert len(tracker.predict(_texture(seed=1))) == 0          # unrelated frame: flow fails
+    assert tracker.ids == []
+    assert tracker.predict(_texture(seed=1)) == []
+
+
+def test_no_detections_clears_the_tracker():
+    tracker = FaceTracker()
+    tracker.correct(_texture(), [_face(100, 80)])
+    assert tracker.correct(_texture(), []) == []
+    assert tracker.ids == [] and tracker.prev_gray is None
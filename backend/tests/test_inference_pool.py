@@ -0,0 +1,46 @@
+import time
+
+import numpy as np
+import pytest
+
+from inference_pool import InferencePool
+
+FRAME = np.zeros((48, 64, 3), np.uint8)
+
+
+@pytest.fixture
+def pool():
+    pool = InferencePool(2, FRAME.nbytes, slots_per_worker=1)
+    yield pool
+    pool.close()
+
+
+def _kill(pool, i):
+    proc = pool._procs[i]
+    proc.kill()
+    proc.join()
+    return proc
+
+
+def test_cameras_go_to_the_least_loaded_worker(pool):
+    assert [pool._worker_for(c) for c in ("a", "b", "c", "a", "d")] == [0, 1, 0, 0, 1]
+
+
+def test_dead_worker_fails_fast_and_is_restarted(pool):
+    dead = _kill(pool, 0)
+
+    t0 = time.monotonic()
+    with pytest.raises(RuntimeError, match="restarting"):
+        pool.infer("a", FRAME, False, [], False, False)
+    assert time.monotonic() - t0 < 1.0
+    assert pool._procs[0] is not dead and pool._procs[0].is_alive()
+
+
+def test_frames_pending_on_a_dead_worker_fail_and_free_their_slots(pool):
+    pool._worker_for("a")
+    pool._tasks[0].put(None)           # the worker exits once it is up, leaving the frame unanswered
+    t0 = time.monotonic()
+    with pytest.raises(RuntimeError, match="exited"):
+        pool.infer("a", FRAME, False, [], False, False, timeout=30)
+    assert time.monotonic() - t0 < 10
+    assert pool._free.qsize() == 2
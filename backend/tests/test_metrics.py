@@ -0,0 +1,57 @@
+from metrics import Registry
+
+
+def test_counter_exposition():
+    reg = Registry()
+    c = reg.counter("x_total", "Things.", ("camera", "reason"))
+    c.inc(camera="cam1", reason="read")
+    c.inc(2, camera="cam1", reason="read")
+    c.inc(camera='a"b\\c\nd', reason="skip")
+
+    assert c.value(camera="cam1", reason="read") == 3
+    assert reg.expose().splitlines() == [
+        "# HELP x_total Things.",
+        "# TYPE x_total counter",
+        'x_total{camera="cam1",reason="read"} 3',
+        'x_total{camera="a\\"b\\\\c\\nd",reason="skip"} 1',
+    ]
+
+
+def test_gauge_with_and_without_callback():
+    reg = Registry()
+    reg.gauge("plain", "Set directly.").set(2.5)
+    reg.gauge("viewers", "From a callback.", ("camera",), callback=lambda: {("cam1",): 4})
+    reg.gauge("size", "Unlabelled callback.", callback=lambda: 7)
+
+    lines = reg.expose().splitlines()
+    assert "# TYPE plain gauge" in lines and "plain 2.5" in lines
+    assert 'viewers{camera="cam1"} 4' in lines
+    assert "size 7" in lines
+
+
+def test_histogram_buckets_are_cumulative():
+    reg = Registry()
+    h = reg.histogram("lat_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 3.0):
+        h.observe(v, stage="pose")
+
+    assert reg.expose().splitlines() == [
+        "# HELP lat_seconds Latency.",
+        "# TYPE lat_seconds histogram",
+        'lat_seconds_bucket{stage="pose",le="0.1"} 2',
+        'lat_seconds_bucket{stage="pose",le="1.0"} 3',
+        'lat_seconds_bucket{stage="pose",le="+Inf"} 4',
+        'lat_seconds_sum{stage="pose"} 3.65',
+        'lat_seconds_count{stage="pose"} 4',
+    ]
+
+
+def test_failing_callback_does_not_break_the_scrape():
+    reg = Registry()
+    reg.gauge("broken", "Raises.", callback=lambda: 1 / 0)
+    reg.counter("ok_total", "Fine.").inc()
+
+    text = reg.expose()
+    assert text.endswith("\n")
+    assert "# broken unavailable: division by zero" in text
+    assert "ok_total 1" in text
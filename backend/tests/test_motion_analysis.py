@@ -0,0 +1,68 @@
+import numpy as np
+
+from motion_analysis import MotionGate
+
+
+def _still(h=240, w=320):
+    return np.full((h, w, 3), 90, np.uint8)
+
+
+def _moved(h=240, w=320):
+    frame = _still(h, w)
+    frame[60:180, 100:220] = 230      # a bright block appears
+    return frame
+
+
+def _gate(**kwargs):
+    """A gate that has seen its first frame (which always counts as motion) at t=0."""
+    gate = MotionGate(**kwargs)
+    assert gate.should_infer(_still(), 0.0)
+    return gate
+
+
+def test_static_scene_runs_only_on_keepalive():
+    gate = _gate(keepalive=1.0, hold=0.0)
+    runs = [t for t in np.arange(0.1, 3.05, 0.1).round(1) if gate.should_infer(_still(), t)]
+    assert runs == [1.0, 2.0, 3.0]
+    assert gate.motion_ratio == 0.0
+
+
+def test_motion_runs_and_holds_after_it_stops():
+    gate = _gate(keepalive=10.0, hold=0.5)
+    assert not gate.should_infer(_still(), 1.0)
+    assert gate.should_infer(_moved(), 1.1)
+    assert gate.motion_ratio > gate.min_area
+    # Still frames keep running for `hold` seconds after the last motion …
+    assert gate.should_infer(_moved(), 1.2)           # same frame again: no change, inside the hold
+    assert gate.should_infer(_moved(), 1.5)
+    # … and stop after it
+    assert not gate.should_infer(_moved(), 1.6)
+    assert not gate.should_infer(_moved(), 3.0)
+
+
+def test_force_runs_on_a_static_scene():
+    gate = _gate(keepalive=10.0, hold=0.5)
+    assert not gate.should_infer(_still(), 1.0)
+    assert gate.should_infer(_still(), 1.1, force=True)
+    assert not gate.should_infer(_still(), 1.2)
+
+
+def test_forced_run_restarts_the_keepalive():
+    gate = _gate(keepalive=1.0, hold=0.0)
+    assert gate.should_infer(_still(), 0.8, force=True)
+    assert not gate.should_infer(_still(), 1.0)
+    assert gate.should_infer(_still(), 1.8)
+
+
+def test_pixel_noise_is_not_motion():
+    gate = _gate(keepalive=10.0, hold=0.0)
+    frame = _still()
+    frame[100:102, 100:102] = 250     # a few noisy pixels, lost in the downscale + blur
+    assert not gate.should_infer(frame, 1.0)
+    assert gate.motion_ratio < gate.min_area
+
+
+def test_new_aspect_ratio_counts_as_motion():
+    gate = _gate(keepalive=10.0, hold=0.0)
+    assert not gate.should_infer(_still(480, 640), 1.0)   # same 160 px thumbnail
+    assert gate.should_infer(_still(320, 320), 2.0)
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pytest
+
+import ort_backend, vision
+
+needs_ort = pytest.mark.skipif(not ort_backend.AVAILABLE, reason="onnxruntime is not installed")
+
+
+def _model(path, batch="N"):
+    """Conv → ReLU → global average pool → Gemm → Softmax on a (batch, 3, 112, 112)
+    input: the layer types of the FER net, small enough to build here."""
+    onnx = pytest.importorskip("onnx")
+    from onnx import TensorProto, helper, numpy_helper
+    rng = np.random.default_rng(0)
+    weights = [
+        numpy_helper.from_array(rng.normal(0, 0.1, (8, 3, 3, 3)).astype(np.float32), "conv_w"),
+        numpy_helper.from_array(rng.normal(0, 0.1, (8,)).astype(np.float32), "conv_b"),
+        numpy_helper.from_array(rng.normal(0, 0.5, (8, 7)).astype(np.float32), "fc_w"),
+        numpy_helper.from_array(rng.normal(0, 0.1, (7,)).astype(np.float32), "fc_b"),
+    ]
+    nodes = [
+        helper.make_node("Conv", ["data", "conv_w", "conv_b"], ["conv"],
+                         kernel_shape=[3, 3], pads=[1, 1, 1, 1], strides=[2, 2]),
+        helper.make_node("Relu", ["conv"], ["relu"]),
+        helper.make_node("GlobalAveragePool", ["relu"], ["pool"]),
+        helper.make_node("Flatten", ["pool"], ["flat"]),
+        helper.make_node("Gemm", ["flat", "fc_w", "fc_b"], ["logits"]),
+        helper.make_node("Softmax", ["logits"], ["prob"], axis=1),
+    ]
+    graph = helper.make_graph(
+        nodes, "tiny_fer",
+        [helper.make_tensor_value_info("data", TensorProto.FLOAT, [batch, 3, 112, 112])],
+        [helper.make_tensor_value_info("prob", TensorProto.FLOAT, [batch, 7])],
+        initializer=weights,
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+    return str(path)
+
+
+def _blob(n, seed=1):
+    return np.random.default_rng(seed).random((n, 3, 112, 112), dtype=np.float32)
+
+
+@needs_ort
+# batch 1: a fixed-batch export, which BatchedNet falls back to running face by face
+@pytest.mark.parametrize("batch, sizes", [("N", (1, 4)), (1, (1, 4))])
+def test_ort_matches_opencv_dnn(tmp_path, batch, sizes):
+    path = _model(tmp_path / "tiny.onnx", batch)
+    blob = _blob(3)
+
+    ort_out = ort_backend.OrtNet(path).forward(blob)
+    cv_out  = vision.BatchedNet(path, sizes).forward(blob)
+
+    assert ort_out.shape == cv_out.shape == (3, 7)
+    np.testing.assert_allclose(ort_out, cv_out, rtol=1e-4, atol=1e-5)
+
+
+@needs_ort
+@pytest.mark.parametrize("path", [vision.EMOTION_MODEL_PATH, vision.SFACE_MODEL_PATH])
+def test_ort_matches_opencv_dnn_on_the_shipped_models(path):
+    if not os.path.exists(path):
+        pytest.skip(f"{os.path.basename(path)} has not been downloaded")
+    blob = _blob(2)
+    np.testing.assert_allclose(
+        ort_backend.OrtNet(path).forward(blob), vision.BatchedNet(path, (1, 2)).forward(blob),
+        rtol=1e-3, atol=1e-4,
+    )
+
+
+def test_configure_backends_rejects_unknown_names():
+    with pytest.raises(ValueError, match="emotion backend"):
+        vision.configure_backends(emotion="onnxruntim")
+    with pytest.raises(ValueError, match="graph_optimization"):
+        vision.configure_backends(sface="onnxruntime", graph_optimization="fast")
+    assert vision.BACKENDS == {"emotion": "opencv", "sface": "opencv"}
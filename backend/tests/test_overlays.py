@@ -0,0 +1,68 @@
+import cv2
+import numpy as np
+import pytest
+
+from overlays import HudRenderer
+
+
+def _baseline_hud(display, motion_status, fall_status, pose_analysis, faces_count):
+    """The full-frame addWeighted + putText HUD that HudRenderer replaced."""
+    w_frame = display.shape[1]
+    overlay = display.copy()
+    cv2.rectangle(overlay, (0, 0), (380, 160), (20,20,20), -1)
+    cv2.addWeighted(overlay, 0.55, display, 0.45, 0, display)
+
+    m_color = (0,210,255) if pose_analysis["motion"] else (100,255,100)
+    cv2.putText(display, f"Motion  : {motion_status}", (10,24),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.55, m_color, 2)
+    f_color = (0,0,255) if "FALL" in fall_status else (100,255,100)
+    cv2.putText(display, f"Fall    : {fall_status}", (10,50),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.55, f_color, 2)
+    cv2.putText(display, f"Posture : {pose_analysis['posture']}", (10,76),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.55, (255,200,0), 2)
+    cv2.putText(display, f"Activity: {pose_analysis['activity']}", (10,102),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.55, (200,180,255), 2)
+    cv2.putText(display, f"Faces   : {faces_count}", (10,128),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.55, (255,220,0), 2)
+    cv2.putText(display, f"Landmarks: {pose_analysis['landmark_count']}/33", (10,154),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.55, (0,255,200), 2)
+
+    if "FALL" in fall_status:
+        banner = "!! FALL DETECTED - CHECK IMMEDIATELY !!"
+        (bw, bh), _ = cv2.getTextSize(banner, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
+        bx = max((w_frame-bw)//2, 0)
+        cv2.rectangle(display, (bx-10, 8), (bx+bw+10, bh+24), (0,0,200), -1)
+        cv2.putText(display, banner, (bx, bh+16), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255,255,255), 2)
+
+
+def _frame(h, w, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (h, w, 3), dtype=np.uint8)
+
+
+def _pose(motion=False, posture="Standing", activity="Idle", landmarks=33):
+    return {"motion": motion, "posture": posture, "activity": activity, "landmark_count": landmarks}
+
+
+HUDS = [
+    ("No Motion", "No Fall", _pose(), 0),
+    ("Motion Detected", "Possible Fall", _pose(motion=True, activity="Walking"), 2),
+    ("Motion Detected", "FALL DETECTED!", _pose(motion=True, posture="Lying"), 1),
+]
+
+
+@pytest.mark.parametrize("size", [(480, 640), (720, 1280), (120, 200)])   # last: smaller than the panel
+def test_hud_matches_baseline(size):
+    hud = HudRenderer()
+    for seed, args in enumerate(HUDS * 2):   # second round draws from the glyph cache
+        frame = _frame(*size, seed=seed)
+        expected, actual = frame.copy(), frame.copy()
+        _baseline_hud(expected, *args)
+        hud.draw(actual, *args)
+        np.testing.assert_array_equal(actual, expected)
+
+
+def test_glyph_cache_is_bounded():
+    hud, frame = HudRenderer(), _frame(480, 640)
+    for n in range(2 * HudRenderer.MAX_GLYPHS):
+        hud.draw(frame, "No Motion", "No Fall", _pose(), n)
+    assert len(hud._glyphs) <= HudRenderer.MAX_GLYPHS
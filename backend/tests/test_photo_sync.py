@@ -0,0 +1,201 @@
+import hashlib, json, os, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from photo_sync import MANIFEST_NAME, PHOTO_NAME, PhotoSync
+
+
+class StandIn:
+    """Supabase Storage stand-in: path → photo bytes, plus scripted failures."""
+    def __init__(self):
+        self.photos    = {}     # path → (body, etag or None, last_modified or None)
+        self.redirects = {}     # path → Location
+        self.fail      = {}     # path → number of 503s still to answer
+        self.requests  = []     # (path, headers) of every request
+        self.lock      = threading.Lock()
+
+    def handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=b"", headers=()):
+                self.send_response(status)
+                for key, value in headers:
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with standin.lock:
+                    standin.requests.append((self.path, dict(self.headers)))
+                    failures = standin.fail.get(self.path, 0)
+                    if failures:
+                        standin.fail[self.path] = failures - 1
+                if failures:
+                    return self._send(503)
+                if self.path in standin.redirects:
+                    return self._send(302, headers=[("Location", standin.redirects[self.path])])
+                if self.path not in standin.photos:
+                    return self._send(404)
+                body, etag, last_modified = standin.photos[self.path]
+                if (etag and self.headers.get("If-None-Match") == etag) or (
+                    not etag and last_modified and self.headers.get("If-Modified-Since") == last_modified
+                ):
+                    return self._send(304)
+                headers = [("Content-Type", "image/jpeg")]
+                if etag:
+                    headers.append(("ETag", etag))
+                if last_modified:
+                    headers.append(("Last-Modified", last_modified))
+                self._send(200, body, headers)
+
+        return Handler
+
+    def hits(self, path):
+        return [headers for p, headers in self.requests if p == path]
+
+
+@pytest.fixture
+def server():
+    standin = StandIn()
+    httpd   = ThreadingHTTPServer(("127.0.0.1", 0), standin.handler())
+    thread  = threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    standin.url = f"http://127.0.0.1:{httpd.server_port}"
+    yield standin
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _sync(faces_dir, persons, **kwargs):
+    kwargs.setdefault("backoff", 0.01)
+    return PhotoSync(str(faces_dir), workers=4, **kwargs).run(persons)
+
+
+def _manifest(faces_dir):
+    with open(os.path.join(faces_dir, MANIFEST_NAME), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _photo(faces_dir, name):
+    with open(os.path.join(faces_dir, name, PHOTO_NAME), "rb") as f:
+        return f.read()
+
+
+def test_downloads_and_records_manifest(server, tmp_path):
+    server.photos["/alice.jpg"] = (b"alice-v1", '"a1"', None)
+    server.photos["/bob.jpg"]   = (b"bob-v1", None, "Mon, 01 Jan 2024 00:00:00 GMT")
+    persons = [{"name": "Alice", "photo_url": server.url + "/alice.jpg"},
+               {"name": "Bob",   "photo_url": server.url + "/bob.jpg"}]
+
+    stats = _sync(tmp_path, persons)
+
+    assert (stats["downloaded"], stats["failed"]) == (2, 0)
+    assert sorted(stats["changed"]) == ["Alice", "Bob"]
+    assert _photo(tmp_path, "Alice") == b"alice-v1"
+    manifest = _manifest(tmp_path)
+    assert manifest["Alice"]["sha1"] == hashlib.sha1(b"alice-v1").hexdigest()
+    assert manifest["Alice"]["etag"] == '"a1"'
+    assert manifest["Bob"]["last_modified"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+def test_revalidation_gets_304_and_keeps_files(server, tmp_path):
+    server.photos["/alice.jpg"] = (b"alice-v1", '"a1"', None)
+    server.photos["/bob.jpg"]   = (b"bob-v1", None, "Mon, 01 Jan 2024 00:00:00 GMT")
+    persons = [{"name": "Alice", "photo_url": server.url + "/alice.jpg"},
+               {"name": "Bob",   "photo_url": server.url + "/bob.jpg"}]
+    _sync(tmp_path, persons)
+    alice = os.path.join(tmp_path, "Alice", PHOTO_NAME)
+    mtime = os.stat(alice).st_mtime_ns
+
+    stats = _sync(tmp_path, persons)
+
+    assert (stats["downloaded"], stats["unchanged"], stats["changed"]) == (0, 2, [])
+    assert server.hits("/alice.jpg")[-1].get("If-None-Match") == '"a1"'
+    assert server.hits("/bob.jpg")[-1].get("If-Modified-Since") == "Mon, 01 Jan 2024 00:00:00 GMT"
+    assert os.stat(alice).st_mtime_ns == mtime
+
+
+def test_changed_photo_is_replaced_and_manifest_updated(server, tmp_path):
+    server.photos["/alice.jpg"] = (b"alice-v1", '"a1"', None)
+    persons = [{"name": "Alice", "photo_url": server.url + "/alice.jpg"}]
+    _sync(tmp_path, persons)
+
+    server.photos["/alice.jpg"] = (b"alice-v2", '"a2"', None)
+    stats = _sync(tmp_path, persons)
+
+    assert stats["changed"] == ["Alice"]
+    assert _photo(tmp_path, "Alice") == b"alice-v2"
+    assert _manifest(tmp_path)["Alice"]["sha1"] == hashlib.sha1(b"alice-v2").hexdigest()
+    assert _manifest(tmp_path)["Alice"]["etag"] == '"a2"'
+
+
+def test_local_edit_disables_conditional_request(server, tmp_path):
+    server.photos["/alice.jpg"] = (b"alice-v1", '"a1"', None)
+    persons = [{"name": "Alice", "photo_url": server.url + "/alice.jpg"}]
+    _sync(tmp_path, persons)
+    with open(os.path.join(tmp_path, "Alice", PHOTO_NAME), "wb") as f:
+        f.write(b"edited locally")
+
+    stats = _sync(tmp_path, persons)
+
+    assert "If-None-Match" not in server.hits("/alice.jpg")[-1]
+    assert stats["changed"] == ["Alice"]
+    assert _photo(tmp_path, "Alice") == b"alice-v1"
+
+
+def test_503_is_retried_with_backoff(server, tmp_path):
+    server.photos["/flaky.jpg"] = (b"flaky", '"f"', None)
+    server.fail["/flaky.jpg"] = 2
+    persons = [{"name": "Flaky", "photo_url": server.url + "/flaky.jpg"}]
+
+    started = time.monotonic()
+    stats = _sync(tmp_path, persons, retries=3, backoff=0.05)
+    elapsed = time.monotonic() - started
+
+    assert stats["downloaded"] == 1
+    assert len(server.hits("/flaky.jpg")) == 3
+    # Two jittered sleeps of backoff · 2^attempt · [0.5, 1.5)
+    assert elapsed >= 0.05 * 0.5 * (1 + 2)
+
+
+def test_503_gives_up_after_retries(server, tmp_path):
+    server.photos["/down.jpg"] = (b"down", None, None)
+    server.fail["/down.jpg"] = 10
+    stats = _sync(tmp_path, [{"name": "Down", "photo_url": server.url + "/down.jpg"}], retries=2)
+
+    assert stats["failed"] == 1
+    assert len(server.hits("/down.jpg")) == 3
+
+
+def test_redirect_is_followed(server, tmp_path):
+    server.redirects["/old/carol.jpg"] = "/new/carol.jpg"
+    server.photos["/new/carol.jpg"] = (b"carol", '"c"', None)
+
+    stats = _sync(tmp_path, [{"name": "Carol", "photo_url": server.url + "/old/carol.jpg"}])
+
+    assert stats["downloaded"] == 1
+    assert _photo(tmp_path, "Carol") == b"carol"
+    assert _manifest(tmp_path)["Carol"]["url"] == server.url + "/old/carol.jpg"
+
+
+def test_404_is_skipped_without_aborting_the_sync(server, tmp_path):
+    server.photos["/alice.jpg"] = (b"alice", '"a"', None)
+    server.photos["/bob.jpg"]   = (b"bob", '"b"', None)
+    persons = [{"name": "Alice", "photo_url": server.url + "/alice.jpg"},
+               {"name": "Ghost", "photo_url": server.url + "/ghost.jpg"},
+               {"name": "Bob",   "photo_url": server.url + "/bob.jpg"}]
+
+    stats = _sync(tmp_path, persons)
+
+    assert (stats["downloaded"], stats["failed"]) == (2, 1)
+    assert len(server.hits("/ghost.jpg")) == 1          # 4xx is not retried
+    assert not os.path.exists(os.path.join(tmp_path, "Ghost", PHOTO_NAME))
+    assert set(_manifest(tmp_path)) == {"Alice", "Bob"}
@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from vision import PoseRoi, detect_pose
+
+FRAME = np.zeros((480, 640, 3), np.uint8)
+
+
+def _landmarks(points, visibility=0.9):
+    """Pose landmarks at normalised (x, y) points."""
+    return SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=0.0, visibility=visibility) for x, y in points])
+
+
+def _person(cx=0.5, cy=0.5, half=0.1, visibility=0.9):
+    return _landmarks([(cx - half, cy - half), (cx + half, cy - half), (cx - half, cy + half),
+                       (cx + half, cy + half), (cx, cy)], visibility)
+
+
+class Pose:
+    """Stands in for MediaPipe Pose: finds `person` only in images of the given shapes."""
+    def __init__(self, person, found_in):
+        self.person, self.found_in, self.seen = person, found_in, []
+
+    def process(self, rgb):
+        self.seen.append(rgb.shape[:2])
+        found = self.person is not None and rgb.shape[:2] in self.found_in
+        return SimpleNamespace(pose_landmarks=self.person() if found else None)
+
+
+def test_update_crops_around_the_person():
+    roi = PoseRoi()
+    roi.update(_person(), FRAME.shape)
+    x0, y0, x1, y1 = roi.box
+    assert x0 < 0.4 * 640 and x1 > 0.6 * 640 and y0 < 0.4 * 480 and y1 > 0.6 * 480
+    assert roi.crop(FRAME).shape[:2] == (y1 - y0, x1 - x0)
+
+
+def test_to_frame_maps_crop_coordinates_back():
+    roi = PoseRoi()
+    roi.box = (100, 50, 300, 250)
+    lms = roi.to_frame(_landmarks([(0.0, 0.0), (1.0, 1.0), (0.5, 0.5)]), FRAME.shape)
+    assert [lm.x * 640 for lm in lms.landmark] == pytest.approx([100, 300, 200])
+    assert [lm.y * 480 for lm in lms.landmark] == pytest.approx([50, 250, 150])
+
+
+@pytest.mark.parametrize("landmarks", [
+    None,                                   # no pose
+    _person(visibility=0.2),                # landmarks, but none visible
+    _landmarks([(0.5, 0.5)] * 3),           # too few to place a crop
+])
+def test_a_lost_person_resets_to_the_full_frame(landmarks):
+    roi = PoseRoi()
+    roi.update(_person(), FRAME.shape)
+    roi.update(landmarks, FRAME.shape)
+    assert roi.box is None
+    assert roi.crop(FRAME) is FRAME
+
+
+def test_a_person_filling_the_frame_uses_the_full_frame():
+    roi = PoseRoi()
+    roi.update(_person(half=0.45), FRAME.shape)
+    assert roi.box is None
+
+
+def test_detect_pose_retries_the_full_frame_when_the_crop_loses_the_person():
+    roi = PoseRoi()
+    roi.update(_person(), FRAME.shape)
+    crop_shape = roi.crop(FRAME).shape[:2]
+    pose = Pose(_person, found_in={FRAME.shape[:2]})         # only the full frame finds them
+
+    landmarks = detect_pose(pose, FRAME, roi)
+
+    assert pose.seen == [crop_shape, FRAME.shape[:2]]
+    assert landmarks.landmark[4].x == pytest.approx(0.5)   # full-frame coordinates, not remapped
+    assert roi.box is not None                               # re-centred from the full-frame pass
+
+
+def test_detect_pose_runs_full_frames_while_no_one_is_there():
+    roi = PoseRoi()
+    roi.update(_person(), FRAME.shape)
+    pose = Pose(None, found_in=set())
+
+    assert detect_pose(pose, FRAME, roi) is None
+    assert roi.box is None
+    assert detect_pose(pose, FRAME, roi) is None
+    assert pose.seen[1:] == [FRAME.shape[:2]] * 2            # after the lost crop: full frames only
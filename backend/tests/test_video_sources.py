@@ -0,0 +1,36 @@
+import time
+
+from video_sources import MAX_LAG, SyntheticSource, is_live, open_source
+
+
+def test_is_live():
+    assert is_live(0) and is_live("1") and is_live("rtsp://cam/stream")
+    assert not is_live("clip.mp4") and not is_live("synthetic:320x240@15")
+
+
+def test_realtime_pacing_keeps_recorded_timing():
+    src = open_source("synthetic:64x48@50")
+    stamps = [src.read_frame()[2] for _ in range(5)]
+    assert all(abs((b - a) - 0.02) < 1e-6 for a, b in zip(stamps, stamps[1:]))
+    assert abs(time.time() - stamps[-1]) < 0.05
+
+
+def test_realtime_pacing_restarts_after_a_stall():
+    src = SyntheticSource(64, 48, fps=50)
+    src.read_frame()
+    time.sleep(MAX_LAG + 0.3)
+
+    _, _, ts = src.read_frame()
+    assert abs(time.time() - ts) < 0.05
+    t0 = time.monotonic()
+    _, _, ts2 = src.read_frame()
+    assert abs((ts2 - ts) - 0.02) < 1e-6
+    assert time.monotonic() - t0 > 0.01          # paced again, not bursting
+
+
+def test_fast_pacing_uses_media_time():
+    src = SyntheticSource(64, 48, fps=50, pacing="fast")
+    t0 = time.monotonic()
+    stamps = [src.read_frame()[2] for _ in range(50)]
+    assert time.monotonic() - t0 < 0.5
+    assert abs((stamps[-1] - stamps[0]) - 49 / 50) < 1e-6
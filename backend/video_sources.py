@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+Video sources
+=============
+Every frame producer (camera pipelines, the legacy scripts, offline tools)
+opens its input through `open_source(spec)`:
+
+    0, "1"                    → local webcam by device index
+    "rtsp://…", "http://…"    → network stream
+    "clip.mp4"                → recorded video file
+    "frames/"                 → directory of images, sorted by name
+    "synthetic[:WxH@FPS]"     → generated test pattern (no hardware needed)
+
+Sources keep the cv2.VideoCapture interface (isOpened / read / release /
+set / get) so they drop into existing loops, and add `read_frame()` which
+also returns the frame's capture timestamp in seconds. Live sources stamp
+frames with wall-clock time; recorded sources use media time offset from
+the moment they were opened, so detectors see the recording's real timing
+even when it is replayed faster than real time.
+
+Recorded sources support two pacings:
+    "realtime" — deliver frames no faster than they were recorded; after a
+                 stall of more than MAX_LAG seconds (slow consumer, model
+                 loading) timing restarts from now instead of bursting
+                 stale frames until it catches up
+    "fast"     — deliver frames as fast as the consumer reads them
+"""
+
+import os, time
+import cv2
+import numpy as np
+
+PACINGS = ("realtime", "fast")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+MAX_LAG  = 1.0    # seconds a realtime replay may fall behind before it re-anchors
+
+
+class VideoSource:
+    """Base class: VideoCapture-compatible reader that also yields capture timestamps."""
+    live = False      # True → frames are stamped with wall-clock time
+
+    def __init__(self, pacing="realtime", loop=False):
+        if pacing not in PACINGS:
+            raise ValueError(f"pacing must be one of {PACINGS}, got {pacing!r}")
+        self.pacing = pacing
+        self.loop   = loop
+        self._t0    = None    # wall time of the first frame (recorded sources)
+
+    # ── VideoCapture interface ──
+    def isOpened(self):
+        return False
+
+    def read(self):
+        ok, frame, _ = self.read_frame()
+        return ok, frame
+
+    def grab(self):
+        """Advance one frame without returning it (used to skip frames)."""
+        return self.read_frame()[0]
+
+    def release(self):
+        pass
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        return 0.0
+
+    # ── timestamped interface ──
+    def read_frame(self):
+        """Returns (ok, frame, timestamp_seconds)."""
+        raise NotImplementedError
+
+    def _pace(self, media_t):
+        """Map media time to a timestamp and, when realtime, wait until it is due."""
+        if self._t0 is None:
+            self._t0 = time.time() - media_t
+        ts = self._t0 + media_t
+        if self.pacing == "realtime":
+            delay = ts - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -MAX_LAG:
+                # Frames stamped this far back look stale to every consumer
+                self._t0 = time.time() - media_t
+                ts       = self._t0 + media_t
+        return ts
+
+
+class CaptureSource(VideoSource):
+    """Webcam (device index) or network stream (RTSP/HTTP) read through cv2.VideoCapture."""
+    live = True
+
+    def __init__(self, target, width=640, height=480):
+        super().__init__()
+        self.target = target
+        self.cap    = cv2.VideoCapture(target)
+        if self.cap.isOpened():
+            if isinstance(target, int):
+                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read_frame(self):
+        ok, frame = self.cap.read()
+        return ok, frame, time.time()
+
+    def release(self):
+        self.cap.release()
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+
+class FileSource(VideoSource):
+    """Recorded video file, timestamped by media time."""
+    def __init__(self, path, pacing="realtime", loop=False):
+        super().__init__(pacing, loop)
+        self.path = path
+        self.cap  = cv2.VideoCapture(path)
+        self.fps  = self.cap.get(cv2.CAP_PROP_FPS) or 25.0
+        self._index  = 0
+        self._offset = 0.0      # media time added per completed loop
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read_frame(self):
+        ok, frame = self.cap.read()
+        if not ok and self.loop and self._index > 0:
+            self._offset += self._index / self.fps
+            self._index   = 0
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.cap.read()
+        if not ok:
+            return False, None, time.time()
+        # Frame index is more reliable than CAP_PROP_POS_MSEC across backends.
+        media_t = self._offset + self._index / self.fps
+        self._index += 1
+        return True, frame, self._pace(media_t)
+
+    def grab(self):
+        # VideoCapture.grab() skips the BGR conversion of the skipped frame.
+        if not self.cap.grab():
+            return False
+        self._index += 1
+        return True
+
+    def release(self):
+        self.cap.release()
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+
+class ImageDirSource(VideoSource):
+    """Directory of still images played back as a video at `fps`."""
+    def __init__(self, path, fps=10.0, pacing="realtime", loop=False):
+        super().__init__(pacing, loop)
+        self.path  = path
+        self.fps   = fps
+        self.files = sorted(
+            os.path.join(path, f) for f in os.listdir(path)
+            if f.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self._index = 0
+
+    def isOpened(self):
+        return bool(self.files)
+
+    def read_frame(self):
+        for _ in range(len(self.files)):     # skip unreadable files, at most one pass
+            if self._index >= len(self.files) and not self.loop:
+                break
+            i = self._index
+            self._index += 1
+            frame = cv2.imread(self.files[i % len(self.files)])
+            if frame is not None:
+                return True, frame, self._pace(i / self.fps)
+        return False, None, time.time()
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self.files))
+        return 0.0
+
+
+class SyntheticSource(VideoSource):
+    """
+    Deterministic generated frames: a textured background with a bright block
+    sweeping across it. Useful for benchmarks and for running the pipeline on
+    machines without a camera.
+    """
+    def __init__(self, width=640, height=480, fps=24.0, frames=None, pacing="realtime", loop=False):
+        super().__init__(pacing, loop)
+        self.width, self.height, self.fps = width, height, fps
+        self.frames = frames              # None → endless
+        self._index = 0
+        rng = np.random.default_rng(0)
+        self._background = rng.integers(40, 90, (height, width, 3), dtype=np.uint8)
+
+    def isOpened(self):
+        return True
+
+    def read_frame(self):
+        if self.frames is not None and self._index >= self.frames:
+            if not self.loop:
+                return False, None, time.time()
+        i = self._index
+        self._index += 1
+        frame = self._background.copy()
+        block = max(self.width // 8, 8)
+        x = (i * 8) % max(self.width - block, 1)
+        y = self.height // 2 - block // 2
+        frame[y:y + block, x:x + block] = (220, 220, 220)
+        return True, frame, self._pace(i / self.fps)
+
+    def get(self, prop):
+        return {
+            cv2.CAP_PROP_FPS:          self.fps,
+            cv2.CAP_PROP_FRAME_WIDTH:  float(self.width),
+            cv2.CAP_PROP_FRAME_HEIGHT: float(self.height),
+            cv2.CAP_PROP_FRAME_COUNT:  float(self.frames or 0),
+        }.get(prop, 0.0)
+
+
+def _parse_synthetic(spec):
+    """'synthetic' / 'synthetic:320x240' / 'synthetic:640x480@15' → (w, h, fps)."""
+    w, h, fps = 640, 480, 24.0
+    _, _, params = spec.partition(":")
+    if params:
+        size, _, rate = params.partition("@")
+        if size:
+            w, h = (int(v) for v in size.lower().split("x"))
+        if rate:
+            fps = float(rate)
+    return w, h, fps
+
+
+def is_live(spec):
+    """True when open_source(spec) would open a webcam or network stream."""
+    if isinstance(spec, int):
+        return True
+    spec = str(spec).strip()
+    return spec.isdigit() or ("://" in spec and not spec.lower().startswith("synthetic"))
+
+
+def open_source(spec, pacing="realtime", loop=False):
+    """Open a VideoSource from a spec string / device index (see module docstring)."""
+    if isinstance(spec, int):
+        return CaptureSource(spec)
+    spec = str(spec).strip()
+    if spec.isdigit():
+        return CaptureSource(int(spec))
+    if spec.lower().startswith("synthetic"):
+        w, h, fps = _parse_synthetic(spec)
+        return SyntheticSource(w, h, fps, pacing=pacing, loop=loop)
+    if "://" in spec:
+        return CaptureSource(spec)
+    if os.path.isdir(spec):
+        return ImageDirSource(spec, pacing=pacing, loop=loop)
+    return FileSource(spec, pacing=pacing, loop=loop)
@@ -0,0 +1,541 @@
+# -*- coding: utf-8 -*-
+"""
+Detector models & per-frame inference
+=====================================
+Download/loading of YuNet (face detection), SFace (face recognition) and the
+FER ONNX net (emotion), plus the stateless inference stages run on every
+camera frame. Imported by the web process (app.py) and by the inference
+worker processes (inference_pool.py), each of which holds its own copies of
+the models.
+"""
+
+import hashlib, os, threading, time, urllib.request
+import cv2
+import numpy as np
+
+# MediaPipe takes over a second to import, so it is loaded on first use
+# (load_pose_runtime) rather than when this module is imported.
+mp_pose      = None
+landmark_pb2 = None
+
+# ─── Model files ──────────────────────────────────────────────────────────────
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "models")
+os.makedirs(MODEL_DIR, exist_ok=True)
+
+YUNET_MODEL_PATH = os.path.join(MODEL_DIR, "face_detection_yunet.onnx")
+SFACE_MODEL_PATH = os.path.join(MODEL_DIR, "face_recognition_sface.onnx")
+YUNET_URL = "https://github.com/opencv/opencv_zoo/raw/main/models/face_detection_yunet/face_detection_yunet_2023mar.onnx"
+SFACE_URL = "https://github.com/opencv/opencv_zoo/raw/main/models/face_recognition_sface/face_recognition_sface_2021dec.onnx"
+
+EMOTION_LABELS     = ["Angry", "Disgust", "Fear", "Happy", "Neutral", "Sad", "Surprise"]
+EMOTION_MODEL_PATH = os.path.join(MODEL_DIR, "fer_emotion.onnx")
+EMOTION_MODEL_URL  = (
+    "https://github.com/opencv/opencv_zoo/raw/main/models/"
+    "facial_expression_recognition/facial_expression_recognition_mobilefacenet_2022july.onnx"
+)
+
+yunet       = None
+sface       = None
+sface_net   = None    # BatchedNet over the SFace ONNX, for batched embeddings
+emotion_net = None    # BatchedNet over the FER ONNX
+_face_model_version = None  # see face_model_version(); set when the face models load
+
+MAX_FACES = 8         # faces per frame that get emotion + embedding
+
+# OpenCV DNN re-allocates a net's buffers whenever its input shape changes, and
+# the first pass at any shape pays that set-up. So camera frame sizes get their
+# own YuNet, batched passes are padded to a few fixed batch sizes with one net
+# each, and warm_up_*() run every instance once on dummy inputs at startup.
+EMOTION_BATCH_SIZES = (1, 2, 4, MAX_FACES)
+SFACE_BATCH_SIZES   = (MAX_FACES,)  # only used for 2+ new faces at once; ~37 MB per instance
+MAX_DETECTOR_SIZES  = 8             # frame sizes that get a dedicated YuNet
+POSE_POOL_SIZE      = 4             # idle warmed-up Pose trackers kept for the next camera
+
+# OpenCV DNN objects keep per-call state (input size / input blob), so every
+# camera thread must serialise on them.
+yunet_lock   = threading.Lock()
+sface_lock   = threading.Lock()
+_detectors   = {}                   # (w, h) → (FaceDetectorYN, lock)
+_detectors_lock = threading.Lock()
+
+# Execution backend of the FER and SFace nets: "opencv" (BatchedNet) or
+# "onnxruntime" (ort_backend.OrtNet, if installed). Set with configure_backends()
+# before the models are loaded.
+BACKEND_NAMES = ("opencv", "onnxruntime")
+BACKENDS      = {"emotion": "opencv", "sface": "opencv"}
+ORT_OPTIONS   = {}                  # overrides of ort_backend.OPTIONS
+
+def configure_backends(emotion=None, sface=None, **ort_options):
+    """Raises ValueError on an unknown backend or graph optimisation level, so a
+    typo in EMOTION_BACKEND / SFACE_BACKEND stops startup instead of silently
+    running on OpenCV DNN."""
+    for model, name in (("emotion", emotion), ("sface", sface)):
+        if name and name not in BACKEND_NAMES:
+            raise ValueError(f"{model} backend must be one of {BACKEND_NAMES}, not {name!r}")
+    if "onnxruntime" in (emotion, sface):
+        import ort_backend
+        level = ort_options.get("graph_optimization")
+        if level is not None and level not in ort_backend.GRAPH_LEVELS:
+            raise ValueError(f"graph_optimization must be one of {ort_backend.GRAPH_LEVELS}, not {level!r}")
+    if emotion:
+        BACKENDS["emotion"] = emotion
+    if sface:
+        BACKENDS["sface"] = sface
+    ORT_OPTIONS.update(ort_options)
+
+def _load_net(model, path, sizes, label):
+    """The `model` ("emotion" / "sface") ONNX as an OrtNet or a BatchedNet, per BACKENDS."""
+    if BACKENDS.get(model) == "onnxruntime":
+        import ort_backend         # imports onnxruntime — only when asked for
+        if ort_backend.AVAILABLE:
+            net = ort_backend.OrtNet(path, warm_sizes=sizes, **ORT_OPTIONS)
+            print(f"[{label}] Running on ONNX Runtime {ort_backend.ort.__version__}.")
+            return net
+        print(f"[{label}] onnxruntime is not installed — using OpenCV DNN.")
+    return BatchedNet(path, sizes)
+
+def _download_model(url, path, label):
+    """Fetch `url` to `path` unless it exists; True once the file is there. The
+    file only appears once complete, so other processes never load a partial one."""
+    if os.path.exists(path):
+        return True
+    print(f"[{label}] Downloading model…")
+    tmp = path + ".part"
+    try:
+        urllib.request.urlretrieve(url, tmp)
+        os.replace(tmp, path)
+        print(f"[{label}] Model downloaded to {path}")
+        return True
+    except Exception as e:
+        print(f"[{label}] Download failed: {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+
+def load_face_models(download=True):
+    global yunet, sface, sface_net, _face_model_version
+    if download:
+        _download_model(YUNET_URL, YUNET_MODEL_PATH, "YuNet")
+        _download_model(SFACE_URL, SFACE_MODEL_PATH, "SFace")
+    try:
+        yunet = cv2.FaceDetectorYN_create(YUNET_MODEL_PATH, "", (320, 320))
+        sface = cv2.FaceRecognizerSF_create(SFACE_MODEL_PATH, "")
+        sface_net = _load_net("sface", SFACE_MODEL_PATH, SFACE_BATCH_SIZES, "SFace")
+        with _detectors_lock:
+            _detectors.clear()
+        _face_model_version = _model_files_version()
+        print("[Face] YuNet + SFace models loaded successfully.")
+    except Exception as e:
+        print(f"[Face] YuNet/SFace init failed: {e}")
+
+def _model_files_version():
+    parts = []
+    for path in (YUNET_MODEL_PATH, SFACE_MODEL_PATH):
+        digest = hashlib.sha1()
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+        parts.append(f"{os.path.basename(path)}:{digest.hexdigest()}")
+    return "|".join(parts)
+
+def face_model_version():
+    """
+    Identifies the YuNet + SFace files in use by content (embedding_cache
+    invalidates on change). Hashed once when the models load, so a replaced
+    model is picked up on the next load_face_models().
+    """
+    return _face_model_version or _model_files_version()
+
+def load_emotion_model(download=True):
+    global emotion_net
+    if not os.path.exists(EMOTION_MODEL_PATH):
+        if not download or not _download_model(EMOTION_MODEL_URL, EMOTION_MODEL_PATH, "Emotion"):
+            return
+    try:
+        emotion_net = _load_net("emotion", EMOTION_MODEL_PATH, EMOTION_BATCH_SIZES, "Emotion")
+        print("[Emotion] FER ONNX model loaded.")
+    except Exception as e:
+        print(f"[Emotion] Load failed: {e}")
+
+def load_pose_runtime():
+    """Import MediaPipe Pose (idempotent; model_registry calls it during warm-up)."""
+    global mp_pose, landmark_pb2
+    if mp_pose is None:
+        from mediapipe.framework.formats import landmark_pb2 as pb2
+        from mediapipe.python.solutions import pose
+        landmark_pb2, mp_pose = pb2, pose
+
+def _new_pose():
+    load_pose_runtime()
+    return mp_pose.Pose(
+        static_image_mode=False,
+        model_complexity=1,
+        smooth_landmarks=True,
+        enable_segmentation=False,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5,
+    )
+
+_pose_pool      = []                # warmed-up, idle Pose trackers
+_pose_pool_lock = threading.Lock()
+
+def create_pose():
+    """
+    MediaPipe Pose tracker — one per camera, it is stateful and not threadsafe.
+    Taken from the warmed-up pool (warm_up_poses / release_pose) when possible.
+    """
+    with _pose_pool_lock:
+        if _pose_pool:
+            return _pose_pool.pop()
+    return _new_pose()
+
+def release_pose(pose, size=(640, 480)):
+    """
+    Give back a tracker whose camera stopped. A blank frame drops its
+    tracking state; it is then pooled for the next camera (or closed if the
+    pool is full).
+    """
+    with _pose_pool_lock:
+        full = len(_pose_pool) >= POSE_POOL_SIZE
+    if full:
+        pose.close()
+        return
+    pose.process(np.zeros((size[1], size[0], 3), np.uint8))
+    with _pose_pool_lock:
+        _pose_pool.append(pose)
+
+# ─── Pose region of interest ──────────────────────────────────────────────────
+class PoseRoi:
+    """
+    Crop window for MediaPipe Pose, following the person tracked in the
+    previous frame. Pose then sees the resident at a larger scale (better
+    landmarks for distant subjects) and colour conversion touches fewer
+    pixels. The window only moves when the person nears its edge, so
+    consecutive crops share coordinates and MediaPipe's own tracker and
+    landmark smoothing stay valid. One per camera, like the Pose tracker.
+    """
+    MARGIN     = 0.35    # padding around the landmark box, per side, relative to its size
+    KEEP_INSET = 0.08    # re-centre once landmarks come this close to the crop edge
+    MIN_SIDE   = 160     # px — never crop tighter than this
+    MAX_AREA   = 0.7     # larger crops than this fraction of the frame → just use the full frame
+
+    def __init__(self):
+        self.box = None   # (x0, y0, x1, y1) in pixels, or None for the full frame
+
+    def crop(self, frame):
+        if self.box is None:
+            return frame
+        x0, y0, x1, y1 = self.box
+        return frame[y0:y1, x0:x1]
+
+    def to_frame(self, landmarks, frame_shape):
+        """Remap landmarks normalised to the crop into full-frame normalised coordinates."""
+        if self.box is None or landmarks is None:
+            return landmarks
+        h, w = frame_shape[:2]
+        x0, y0, x1, y1 = self.box
+        sx, sy = (x1 - x0) / w, (y1 - y0) / h
+        ox, oy = x0 / w, y0 / h
+        for lm in landmarks.landmark:
+            lm.x = lm.x * sx + ox
+            lm.y = lm.y * sy + oy
+            lm.z = lm.z * sx        # z shares the x scale
+        return landmarks
+
+    def update(self, landmarks, frame_shape):
+        """Choose the next crop from full-frame landmarks (None → person lost → full frame)."""
+        h, w = frame_shape[:2]
+        pts = [(lm.x * w, lm.y * h) for lm in landmarks.landmark if lm.visibility > 0.5] if landmarks else []
+        if len(pts) < 4:
+            self.box = None
+            return
+        xs, ys = [p[0] for p in pts], [p[1] for p in pts]
+        bx0, by0, bx1, by1 = min(xs), min(ys), max(xs), max(ys)
+
+        if self.box is not None:
+            x0, y0, x1, y1 = self.box
+            ix, iy = (x1 - x0) * self.KEEP_INSET, (y1 - y0) * self.KEEP_INSET
+            if bx0 >= x0 + ix and by0 >= y0 + iy and bx1 <= x1 - ix and by1 <= y1 - iy:
+                return   # still comfortably inside — keep the window steady
+
+        side = max(bx1 - bx0, by1 - by0) * (1 + 2 * self.MARGIN)
+        side = max(side, self.MIN_SIDE)
+        cx, cy = (bx0 + bx1) / 2, (by0 + by1) / 2
+        x0, x1 = int(max(0, cx - side / 2)), int(min(w, cx + side / 2))
+        y0, y1 = int(max(0, cy - side / 2)), int(min(h, cy + side / 2))
+        if (x1 - x0) * (y1 - y0) > self.MAX_AREA * w * h:
+            self.box = None
+        else:
+            self.box = (x0, y0, x1, y1)
+
+
+# ─── Inference stages ─────────────────────────────────────────────────────────
+def _detector(w, h, create=False):
+    """The YuNet dedicated to (w, h) frames, created on request up to MAX_DETECTOR_SIZES."""
+    entry = _detectors.get((w, h))
+    if entry is None and create and yunet is not None:
+        with _detectors_lock:
+            entry = _detectors.get((w, h))
+            if entry is None and len(_detectors) < MAX_DETECTOR_SIZES:
+                det   = cv2.FaceDetectorYN_create(YUNET_MODEL_PATH, "", (w, h))
+                entry = _detectors[(w, h)] = (det, threading.Lock())
+    return entry
+
+def detect_faces(frame, dedicated=False):
+    """
+    YuNet face detection. Returns an (N, 15) array, or [] when nothing is found.
+    With `dedicated` (camera frames) the frame size gets its own detector, so
+    cameras of different resolutions never re-size a shared one; gallery
+    photos of arbitrary sizes share `yunet`.
+    """
+    if yunet is None:
+        return []
+    h, w = frame.shape[:2]
+    entry = _detector(w, h, create=dedicated)
+    if entry is not None:
+        det, lock = entry
+        with lock:
+            _, faces = det.detect(frame)
+    else:
+        with yunet_lock:
+            yunet.setInputSize((w, h))
+            _, faces = yunet.detect(frame)
+    return faces if faces is not None else []
+
+class BatchedNet:
+    """
+    An ONNX model as one OpenCV DNN net per batch size in `sizes`, so no net
+    ever sees a second input shape. A batch is padded up to the next size
+    (repeating its last image) and split when larger than the biggest.
+    Models exported with a fixed batch of 1 fall back to one pass per image.
+    """
+    backend = "opencv"
+
+    def __init__(self, path, sizes, input_size=(112, 112)):
+        self.path        = path
+        self.sizes       = tuple(sorted(sizes))
+        self.input_size  = input_size
+        self.fixed_batch = False
+        self._nets       = {}            # batch size → (net, lock)
+        self._lock       = threading.Lock()
+        self._net(self.sizes[0])         # fail on load, not on the first frame
+
+    def _net(self, size):
+        with self._lock:
+            entry = self._nets.get(size)
+            if entry is None:
+                entry = self._nets[size] = (cv2.dnn.readNetFromONNX(self.path), threading.Lock())
+        return entry
+
+    def _run(self, size, blob):
+        net, lock = self._net(size)
+        with lock:
+            net.setInput(blob)
+            return net.forward()
+
+    def forward(self, blob):
+        """(N, C, H, W) blob → (N, outputs)."""
+        n = blob.shape[0]
+        if not self.fixed_batch:
+            try:
+                rows = []
+                for start in range(0, n, self.sizes[-1]):
+                    chunk = blob[start:start + self.sizes[-1]]
+                    k     = chunk.shape[0]
+                    size  = next(s for s in self.sizes if s >= k)
+                    if size > k:
+                        chunk = np.concatenate([chunk, np.repeat(chunk[-1:], size - k, axis=0)])
+                    out = self._run(size, chunk)
+                    if out.shape[0] != size:
+                        raise ValueError("batch dimension not honoured")
+                    rows.append(out.reshape(size, -1)[:k])
+                return np.concatenate(rows)
+            except (cv2.error, ValueError):
+                if self.sizes == (1,):
+                    raise
+                print(f"[DNN] {os.path.basename(self.path)} has a fixed batch of 1 — running faces one by one.")
+                self.fixed_batch = True
+        return np.stack([self._run(1, blob[i:i + 1]).reshape(-1) for i in range(n)])
+
+    def warm_up(self):
+        """One pass per batch size on zeros (plus the size-1 net for fixed-batch models)."""
+        w, h = self.input_size
+        for size in self.sizes:
+            self.forward(np.zeros((size, 3, h, w), np.float32))
+
+def face_crop(frame, face_data):
+    fx, fy, fw, fh = map(lambda x: max(0, int(x)), face_data[:4])
+    return frame[fy:fy+fh, fx:fx+fw]
+
+def face_feature(frame, face_data):
+    """SFace embedding for one YuNet face, or None when alignment fails."""
+    if sface is None:
+        return None
+    if sface_net is not None and sface_net.backend != "opencv":
+        return face_features(frame, [face_data])[0]    # same backend as the live path
+    try:
+        with sface_lock:
+            aligned = sface.alignCrop(frame, face_data)
+            return sface.feature(aligned)
+    except Exception:
+        return None
+
+def face_features(frame, faces):
+    """
+    SFace embeddings for every face in one forward pass (same preprocessing
+    as FaceRecognizerSF.feature). List aligned with `faces`; None where
+    alignment fails.
+    """
+    out = [None] * len(faces)
+    if sface is None or not len(faces):
+        return out
+    aligned = []
+    with sface_lock:
+        for face_data in faces:
+            try:
+                aligned.append(sface.alignCrop(frame, face_data))
+            except Exception:
+                aligned.append(None)
+    valid = [i for i, a in enumerate(aligned) if a is not None]
+    # FaceRecognizerSF's own net handles a single face, unless SFace runs on ONNX Runtime
+    if valid and (sface_net is None or (len(valid) == 1 and sface_net.backend == "opencv")):
+        for i in valid:
+            with sface_lock:
+                out[i] = sface.feature(aligned[i])
+        return out
+    if not valid:
+        return out
+    try:
+        blob  = cv2.dnn.blobFromImages([aligned[i] for i in valid], 1.0, (112, 112), (0, 0, 0), swapRB=True)
+        feats = sface_net.forward(blob)
+    except Exception:
+        return out
+    for i, feat in zip(valid, feats):
+        out[i] = feat.reshape(1, -1).astype(np.float32)
+    return out
+
+def detect_emotions_dnn(face_crops):
+    """FER for several BGR face crops in one forward pass → [(label, confidence)]."""
+    out = [("N/A", 0.0)] * len(face_crops)
+    valid = [i for i, c in enumerate(face_crops) if c is not None and c.size > 0]
+    if emotion_net is None or not valid:
+        return out
+    try:
+        blob  = cv2.dnn.blobFromImages(
+            [face_crops[i] for i in valid], 1.0/255.0, (112, 112), (0, 0, 0), swapRB=True
+        )
+        preds = emotion_net.forward(blob)
+    except Exception:
+        return out
+    for i, p in zip(valid, preds):
+        idx = int(np.argmax(p))
+        out[i] = (EMOTION_LABELS[idx], round(float(p[idx]), 2))
+    return out
+
+def detect_pose(pose, frame, roi=None):
+    """
+    MediaPipe Pose on `frame`, or on `roi`'s crop of it when one is given.
+    Landmarks are always returned in full-frame coordinates. If the person
+    is lost inside the crop, the full frame is tried in the same call.
+    """
+    if roi is None:
+        return pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)).pose_landmarks
+    landmarks = None
+    if roi.box is not None:
+        landmarks = pose.process(cv2.cvtColor(roi.crop(frame), cv2.COLOR_BGR2RGB)).pose_landmarks
+        landmarks = roi.to_frame(landmarks, frame.shape)
+        if landmarks is None:
+            roi.box = None
+    if landmarks is None:
+        landmarks = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)).pose_landmarks
+    roi.update(landmarks, frame.shape)
+    return landmarks
+
+def infer_frame(pose, frame, detect_faces_now, cached_faces, want_emotion, want_feature,
+                timings=None, roi=None):
+    """
+    Run every model stage that is due on one BGR frame.
+    Returns a dict with:
+      landmarks — MediaPipe NormalizedLandmarkList or None
+      faces     — YuNet detections (fresh if `detect_faces_now`, else `cached_faces`)
+      emotions  — [(label, confidence)] per face (first MAX_FACES), or None if not requested
+      features  — [SFace embedding or None] per face (first MAX_FACES), or None if not requested
+    Emotion crops and embeddings are each computed in one batched forward pass.
+    If `timings` is a dict, the seconds spent in each stage that ran are stored
+    under "pose", "face_detect", "emotion" and "face_feature". With a PoseRoi,
+    pose runs on the crop around the person tracked in the previous frame.
+    """
+    t0 = time.perf_counter()
+    landmarks = detect_pose(pose, frame, roi)
+    t1 = time.perf_counter()
+    if timings is not None:
+        timings["pose"] = t1 - t0
+
+    if detect_faces_now:
+        faces = detect_faces(frame, dedicated=True)
+        t2 = time.perf_counter()
+        if timings is not None:
+            timings["face_detect"] = t2 - t1
+    else:
+        faces = cached_faces
+
+    emotions = features = None
+    if len(faces) > 0:
+        batch = faces[:MAX_FACES]
+        if want_emotion:
+            t2 = time.perf_counter()
+            emotions = detect_emotions_dnn([face_crop(frame, f) for f in batch])
+            if timings is not None:
+                timings["emotion"] = time.perf_counter() - t2
+        if want_feature:
+            t2 = time.perf_counter()
+            features = face_features(frame, batch)
+            if timings is not None:
+                timings["face_feature"] = time.perf_counter() - t2
+
+    return {"landmarks": landmarks, "faces": faces, "emotions": emotions, "features": features}
+
+# ─── Warm-up ──────────────────────────────────────────────────────────────────
+# Each runs the loaded models once on dummy inputs, so allocation and kernel
+# set-up happen at startup rather than on the first camera frame.
+def warm_up_poses(count, size=(640, 480)):
+    """Pool `count` Pose trackers that have each processed a blank frame."""
+    for _ in range(count):
+        pose = _new_pose()
+        pose.process(np.zeros((size[1], size[0], 3), np.uint8))
+        with _pose_pool_lock:
+            _pose_pool.append(pose)
+
+def warm_up_face_models(frame_sizes=((640, 480),)):
+    """A dedicated, warmed-up YuNet per frame size, plus both SFace paths."""
+    if yunet is None or sface is None:
+        return
+    for w, h in frame_sizes:
+        detect_faces(np.zeros((h, w, 3), np.uint8), dedicated=True)
+    with sface_lock:
+        sface.feature(np.zeros((112, 112, 3), np.uint8))
+    sface_net.warm_up()
+
+def warm_up_emotion_model():
+    if emotion_net is not None:
+        emotion_net.warm_up()
+
+# ─── Compact landmark transport ───────────────────────────────────────────────
+def landmarks_to_array(landmarks):
+    """NormalizedLandmarkList → (33, 4) float32 [x, y, z, visibility]."""
+    if landmarks is None:
+        return None
+    return np.array(
+        [(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks.landmark], dtype=np.float32
+    )
+
+def array_to_landmarks(arr):
+    """(33, 4) float32 → NormalizedLandmarkList usable by the drawing utils and analyser."""
+    if arr is None:
+        return None
+    load_pose_runtime()
+    out = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z, v in arr.tolist():
+        out.landmark.add(x=x, y=y, z=z, visibility=v)
+    return out